@@ -121,4 +121,55 @@ class BuilderTestCase(VfxTestCase):
         new_names = [item.name for item in builder.get_scene_items()]
 
         # Verify
-        self.assertEqual(old_names, new_names)
\ No newline at end of file
+        self.assertEqual(old_names, new_names)
+
+    def test_filtered_scene_items_keep_scene_item_order(self):
+        # Setup
+        builder = retrieve_builder_from_scene()
+        types = ['zMaterial', 'zTissue', 'map']
+
+        # Act
+        items = builder.get_scene_items(type_filter=types)
+
+        # Verify
+        expected = [x for x in builder.get_scene_items() if x.type in types]
+        self.assertEqual(len(items), len(expected))
+        for item, expected_item in zip(items, expected):
+            self.assertIs(item, expected_item)
+
+    def test_get_scene_items_finds_renamed_scene_item(self):
+        # Setup
+        builder = retrieve_builder_from_scene()
+        item = builder.get_scene_items(type_filter='zMaterial')[0]
+        old_name = item.name
+
+        # Act
+        item.name = 'renamed_zMaterial'
+
+        # Verify
+        self.assertIs(builder.get_scene_items(name_filter='renamed_zMaterial')[0], item)
+        self.assertEqual(builder.get_scene_items(name_filter=old_name), [])
+
+    def test_parameter_factory_reuses_existing_parameter(self):
+        # Setup
+        builder = retrieve_builder_from_scene()
+        mesh_item = builder.get_scene_items(type_filter='mesh')[0]
+
+        # Act
+        parameter = builder.parameter_factory('mesh', mesh_item.long_name)
+
+        # Verify
+        self.assertIs(parameter, mesh_item)
+
+    def test_parameter_factory_follows_string_replace(self):
+        # Setup
+        builder = retrieve_builder_from_scene()
+        mesh_item = builder.get_scene_items(type_filter='mesh', name_regex='^l_')[0]
+        old_name = mesh_item.long_name
+
+        # Act
+        builder.string_replace('^l_', 'r_')
+
+        # Verify
+        self.assertIs(builder.parameter_factory('mesh', mesh_item.long_name), mesh_item)
+        self.assertIsNot(builder.parameter_factory('mesh', old_name), mesh_item)
@@ -1,14 +1,21 @@
 import zBuilder.builders.ziva as zva
 
+from collections import defaultdict
 from maya import cmds
 from maya import mel
 from vfx_test_case import VfxTestCase
 from tests.utils import (build_mirror_sample_geo, build_anatomical_arm_with_no_popup, load_scene,
                          retrieve_builder_from_scene)
+from zBuilder.builders.build_order import get_build_order
+from zBuilder.builders.build_plan import retrieve_scene_connections
+from zBuilder.builders.scene_graph import ZivaSceneGraph
 from zBuilder.commands import clean_scene
 from zBuilder.utils.solverDisabler import SolverDisabler
 from zBuilder.nodes.base import Base
 from zBuilder.nodes.dg_node import DGNode
+from zBuilder.nodes.ziva.zTissue import get_tissue_parent
+from zBuilder.utils.commonUtils import none_to_empty
+from zBuilder.utils.vfxUtils import get_association, get_fiber_lineofaction
 
 class ZivaBuilderSearchExclude(VfxTestCase):
 
@@ -136,6 +143,55 @@ class ZivaBuilderTestCase(VfxTestCase):
         self.builder.build()
         self.assertTrue(len(zAttachments) == len(cmds.ls(type='zAttachment')))
 
+    def test_scene_graph_matches_scene_queries(self):
+        # Setup
+        solver = cmds.zQuery(t='zSolver', l=True)[0]
+        nodes = zva._zQuery(get_build_order(), solver)
+
+        # Act
+        scene_graph = ZivaSceneGraph(solver, nodes)
+
+        # Verify
+        for node in nodes:
+            self.assertEqual(scene_graph.get_solver(node), solver)
+            self.assertEqual(scene_graph.get_meshes(node), none_to_empty(get_association(node)))
+        for tissue in cmds.ls(type='zTissue'):
+            self.assertEqual(scene_graph.get_tissue_parent(tissue), get_tissue_parent(tissue))
+            self.assertEqual(sorted(scene_graph.get_tissue_children(tissue)),
+                             sorted(none_to_empty(cmds.listConnections(tissue + '.oChildTissue'))))
+        for fiber in cmds.ls(type='zFiber'):
+            self.assertEqual(scene_graph.get_fiber_line_of_action(fiber),
+                             get_fiber_lineofaction(fiber))
+        # the snapshot is only kept while retrieving
+        self.assertIsNone(self.builder.scene_graph)
+
+    def test_scene_graph_rest_shape_without_input_has_no_meshes(self):
+        # Setup
+        solver = cmds.zQuery(t='zSolver', l=True)[0]
+        scene_graph = ZivaSceneGraph(solver, zva._zQuery(get_build_order(), solver))
+        scene_graph.types['disconnected_zRestShape'] = 'zRestShape'
+
+        # Act
+        meshes = scene_graph._get_meshes('disconnected_zRestShape', defaultdict(list), {}, set())
+
+        # Verify
+        self.assertEqual(meshes, [])
+
+    def test_retrieve_connections_reads_the_scene_graph(self):
+        # Setup
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+
+        # Act
+        builder.retrieve_connections()
+
+        # Verify
+        self.assertIsNone(builder.scene_graph)
+        for item in builder.get_scene_items(type_filter=['zTissue', 'zBone', 'zAttachment']):
+            expected = self.builder.get_scene_items(name_filter=item.name)[0]
+            self.assertEqual(item.association, expected.association)
+            self.assertEqual(item.solver.name, expected.solver.name)
+
     def test_string_replace(self):
         # remove ziva nodes from scene so all we have left is geo
         clean_scene()
@@ -186,6 +242,67 @@ class ZivaBuilderTestCase(VfxTestCase):
         # if the attribute is 0 we know it worked
         self.assertTrue(cmds.getAttr("r_bicep_muscle_zTissue.inertialDamping") == 0)
 
+    def test_build_skip_unchanged_writes_only_differences(self):
+        # Setup
+        cmds.setAttr("r_bicep_muscle_zTissue.inertialDamping", .5)
+        attachment = self.builder.get_scene_items(type_filter='zAttachment')[0]
+        map_ = attachment.parameters['map'][0]
+        map_.values = [1.0 - v for v in map_.values]
+
+        # Act
+        self.builder.build(skip_unchanged=True)
+
+        # Verify
+        self.assertEqual(cmds.getAttr("r_bicep_muscle_zTissue.inertialDamping"), 0)
+        self.assertTrue(map_.is_same_as_scene())
+        self.assertFalse(self.builder.skip_unchanged)
+
+    def test_scene_connections_tell_reconnected_nodes_apart(self):
+        # Setup
+        tissues = self.builder.get_scene_items(type_filter='zTissue')
+        bone = self.builder.get_scene_items(type_filter='zBone')[0]
+
+        # Act
+        scene_connections = retrieve_scene_connections(self.builder)
+        tissues[0]._association = list(bone.long_association)
+
+        # Verify
+        self.assertTrue(tissues[1].is_connected_as_in_scene(scene_connections))
+        self.assertFalse(tissues[0].is_connected_as_in_scene(scene_connections))
+
+    def test_map_of_missing_node_is_not_same_as_scene(self):
+        # Setup
+        map_ = self.builder.get_scene_items(type_filter='map')[0]
+
+        # Act
+        clean_scene()
+
+        # Verify
+        self.assertFalse(map_.is_same_as_scene())
+
+    def test_plan_build_follows_build_filters(self):
+        # Setup
+        clean_scene()
+
+        # Act
+        plan = self.builder.plan_build(bones=False, fibers=False, fields=False)
+
+        # Verify
+        stage_types = [stage.node_types for stage in plan]
+        self.assertEqual(stage_types[:2], [['zSolver', 'zSolverTransform'], ['zTissue', 'zCloth']])
+        planned_types = sum(stage_types, [])
+        self.assertNotIn('zBone', planned_types)
+        self.assertNotIn('zFiber', planned_types)
+        dry_run = plan.dry_run()
+        tissue_steps = [
+            step for step in dry_run['stages'][1]['steps'] if step['type'] == 'zTissue'
+        ]
+        tissue_items = self.builder.get_scene_items(type_filter='zTissue')
+        self.assertEqual(len(tissue_steps), len(tissue_items))
+        self.assertTrue(all(step['create'] for step in tissue_steps))
+        # a dry run does not change the scene
+        self.assertEqual(cmds.ls(type='zTissue'), [])
+
     def test_retrieve_connections_single(self):
         # this tests retrieve_connections on a a full setup where you have 1 tissue
         # selected with no attachments.  This was a bug fix.  The expected result
@@ -206,7 +323,7 @@ class ZivaBuilderTestCase(VfxTestCase):
 class RetrieveConnectionsOrderTestCase(VfxTestCase):
 
     def test_order_retrieved(self):
-        desired_type_order = zva.ZNODES
+        desired_type_order = get_build_order()
         load_scene("generic_tissue.ma")
         builder = zva.Ziva()
         builder.retrieve_connections()
@@ -223,9 +340,8 @@ class RetrieveConnectionsOrderTestCase(VfxTestCase):
         for item in desired_type_order:
             if item in retrieved_type_order:
                 new_desired_type_order.append(item)
-        # the retrieved_type_order is going to have a few extra node types at end of list.
-        # the items NOT in ZNODES needs to be at the end, this is up for refactor
-        # when this ticket is done then this can do a complete equal
+        # the retrieved_type_order may have a few extra node types at end of list,
+        # the ones without declared dependencies.
         self.assertEqual(new_desired_type_order,
                          retrieved_type_order[0:len(new_desired_type_order)])
 
@@ -2,6 +2,8 @@ import zBuilder.builders.ziva as zva
 
 from maya import cmds
 from vfx_test_case import VfxTestCase
+from zBuilder.nodes.parameters.maps import interpolate_values
+from zBuilder.nodes.parameters.mesh import get_mesh_info
 
 
 class ZivaMeshTestCase(VfxTestCase):
@@ -41,4 +43,86 @@ class ZivaMeshTestCase(VfxTestCase):
         mesh = cube.build_mesh()
         new_position = cmds.xform(mesh + '.vtx[0]', q=True, ws=True, t=True)
         self.assertApproxEqual(base_position[2], -new_position[2])
-        cmds.delete(mesh)
\ No newline at end of file
+        cmds.delete(mesh)
+
+    def test_get_mesh_info_matches_scene_mesh(self):
+        # Setup
+        cmds.rotate(0, 30, 0, 'cube')
+
+        # Act
+        poly_counts, poly_connects, points = get_mesh_info('cube')
+
+        # Verify
+        self.assertEqual(poly_counts, [4] * 6)
+        self.assertEqual(poly_connects, [
+            0, 1, 3, 2, 2, 3, 5, 4, 4, 5, 7, 6, 6, 7, 1, 0, 1, 7, 5, 3, 6, 0, 2, 4
+        ])
+        expected = cmds.xform('cube.vtx[*]', q=True, ws=True, t=True)
+        self.assertAllApproxEqual(points, expected)
+
+    def test_get_mesh_info_returns_points_in_ui_units(self):
+        # Setup
+        cmds.currentUnit(linear='m')
+        self.addCleanup(cmds.currentUnit, linear='cm')
+
+        # Act
+        points = get_mesh_info('cube')[2]
+
+        # Verify
+        expected = cmds.xform('cube.vtx[*]', q=True, ws=True, t=True)
+        self.assertAllApproxEqual(points, expected)
+
+    def test_points_of_older_files_are_flattened(self):
+        # Setup
+        cube = self.builder.get_scene_items(name_filter='cube')[0]
+        points = cube._pointList
+        data = dict(cube.__dict__)
+        data['_pointList'] = [points[i:i + 3] for i in range(0, len(points), 3)]
+
+        # Act
+        cube.deserialize(data)
+
+        # Verify
+        self.assertEqual(cube._pointList, points)
+
+    def test_mesh_key_is_cached_until_the_points_change(self):
+        # Setup
+        cube = self.builder.get_scene_items(name_filter='cube')[0]
+        key = cube.get_key()
+
+        # Act
+        cube.mirror(mirror_axis='X')
+
+        # Verify
+        self.assertNotEqual(cube.get_key(), key)
+        self.assertNotIn('_key', cube.serialize())
+
+    def test_get_correspondence_is_shared_and_matches_interpolate_values(self):
+        # Setup
+        cube = self.builder.get_scene_items(name_filter='cube')[0]
+        cmds.polySmooth('cube')
+        values = [i / 7.0 for i in range(8)]
+        built_mesh = cube.build_mesh()
+        expected = interpolate_values(built_mesh, 'cube', values)
+        cmds.delete(built_mesh)
+
+        # Act
+        correspondence = cube.get_correspondence('cube')
+
+        # Verify
+        self.assertIs(cube.get_correspondence('cube'), correspondence)
+        self.assertEqual(len(correspondence), len(expected))
+        self.assertAllApproxEqual(correspondence.interpolate(values, clamp_range=[0, 1]), expected)
+
+    def test_numpy_correspondence_matches_maya_correspondence(self):
+        # Setup
+        cube = self.builder.get_scene_items(name_filter='cube')[0]
+        cmds.polySmooth('cube')
+        values = [i / 7.0 for i in range(8)]
+
+        # Act
+        maya_values = cube.get_correspondence('cube', backend='maya').interpolate(values)
+        numpy_values = cube.get_correspondence('cube', backend='numpy').interpolate(values)
+
+        # Verify
+        self.assertAllApproxEqual(numpy_values, maya_values)
@@ -0,0 +1,46 @@
+from vfx_test_case import VfxTestCase
+from zBuilder.nodes.dg_node import DGNode
+from zBuilder.nodes.parameters.maps import Map
+from zBuilder.nodes.utils.fields import Field
+from zBuilder.nodes.ziva.zTissue import TissueNode
+from zBuilder.nodes.registry import (find_class, get_node_class, register_node_class,
+                                     unregister_node_class)
+
+
+class ModuleTissueNode(TissueNode):
+    """ A class of this module for a registered type, see find_class().
+    """
+    type = 'zTissue'
+
+
+class NodeRegistryTestCase(VfxTestCase):
+
+    def test_find_class_returns_registered_class(self):
+        self.assertIs(find_class('zBuilder.nodes', 'zTissue'), TissueNode)
+        self.assertIs(find_class('zBuilder.nodes', 'airField'), Field)
+        self.assertIs(find_class('zBuilder.parameters', 'map'), Map)
+
+    def test_find_class_prefers_the_classes_of_the_module(self):
+        self.assertIs(find_class(__name__, 'zTissue'), ModuleTissueNode)
+        # Types the module has no class for come from the registry
+        self.assertIs(find_class(__name__, 'zBone'), get_node_class('zBone'))
+
+    def test_find_class_returns_dg_node_for_unknown_type(self):
+        self.assertIs(find_class('zBuilder.nodes', 'notAZivaType'), DGNode)
+        self.assertIsNone(get_node_class('notAZivaType'))
+
+    def test_register_custom_node_class(self):
+        # Setup
+        class CustomTissueNode(TissueNode):
+            type = 'zTissue'
+
+        # Act
+        register_node_class(CustomTissueNode)
+
+        # Verify
+        try:
+            self.assertIs(find_class('zBuilder.nodes', 'zTissue'), CustomTissueNode)
+        finally:
+            unregister_node_class(CustomTissueNode)
+            register_node_class(TissueNode)
+        self.assertIs(find_class('zBuilder.nodes', 'zTissue'), TissueNode)
@@ -79,6 +79,35 @@ class ZivaAttachmentGenericTestCase(VfxTestCase):
         builder = self.get_builder_after_write_and_read(self.builder)
         self.check_retrieve_zattachment_looks_good(builder, {})
 
+    def test_do_build_multiple_creates_missing_attachments_only(self):
+        # Setup
+        cmds.delete(self.attachment_names[0])
+        scene_items = self.builder.get_scene_items(type_filter='zAttachment')
+
+        # Act
+        AttachmentNode.do_build_multiple(scene_items)
+
+        # Verify
+        self.assertEqual(sorted(cmds.ls(type='zAttachment')), sorted(self.attachment_names))
+        self.assertEqual(cmds.getAttr(self.attachment_names[0] + '.damping'), 0)
+        self.assertAlmostEqual(cmds.getAttr(self.attachment_names[1] + '.damping'), 0.1)
+
+    def test_do_build_multiple_recreates_attachments_on_their_meshes(self):
+        # Setup
+        scene_items = self.builder.get_scene_items(type_filter='zAttachment')
+        cmds.delete(self.attachment_names)
+
+        # Act
+        AttachmentNode.do_build_multiple(scene_items)
+
+        # Verify
+        self.assertEqual(sorted(cmds.ls(type='zAttachment')), sorted(self.attachment_names))
+        for scene_item in scene_items:
+            self.assertEqual(cmds.zQuery(scene_item.name, attachmentSource=True, l=True),
+                             scene_item.long_association[:1])
+            self.assertEqual(cmds.zQuery(scene_item.name, attachmentTarget=True, l=True),
+                             scene_item.long_association[1:])
+
     def test_rename(self):
         ## SETUP
         cmds.select("r_tissue_1")
@@ -1,5 +1,6 @@
 import os
 import glob
+import zipfile
 import zBuilder.builders.ziva as zva
 import zBuilder.builders.skinClusters as skn
 
@@ -8,7 +9,8 @@ from vfx_test_case import VfxTestCase
 from tests.utils import (build_mirror_sample_geo, get_tmp_file_location,
                          build_anatomical_arm_with_no_popup, get_test_asset_path, load_scene)
 from zBuilder.commands import clean_scene, load_rig
-from zBuilder.builders.serialize import read, write
+from zBuilder.builders.serialize import read, write, write_async
+from zBuilder.utils.mayaUtils import invert_weights
 
 
 class SerializeTestCase(VfxTestCase):
@@ -53,6 +55,181 @@ class SerializeTestCase(VfxTestCase):
         # check the read back data matches with the one we wrote
         self.assertEqual(old_names, new_names)
 
+    def test_write_streams_json_into_zip_file(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+        file_name = get_tmp_file_location('.zBuilder')
+        self.temp_files.append(file_name)
+        json_name = os.path.splitext(file_name)[0] + '.json'
+
+        # Action
+        write(file_name, builder)
+
+        # Verify
+        self.assertFalse(os.path.exists(json_name))
+        with zipfile.ZipFile(file_name, 'r') as archive:
+            self.assertIn(os.path.basename(json_name), archive.namelist())
+
+    def test_map_and_mesh_arrays_are_written_as_binary_data(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+        file_name = get_tmp_file_location('.zBuilder')
+        self.temp_files.append(file_name)
+
+        # Action
+        write(file_name, builder)
+        builder_from_file = zva.Ziva()
+        read(file_name, builder_from_file)
+
+        # Verify
+        with zipfile.ZipFile(file_name, 'r') as archive:
+            self.assertTrue(any(x.startswith('arrays/') for x in archive.namelist()))
+        for item_type in ['map', 'mesh']:
+            items = builder.get_scene_items(type_filter=item_type)
+            items_from_file = builder_from_file.get_scene_items(type_filter=item_type)
+            self.assertEqual(items, items_from_file)
+
+    def test_read_with_filter_reads_matching_scene_items_and_their_parameters(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+        file_name = get_tmp_file_location('.zBuilder')
+        self.temp_files.append(file_name)
+        write(file_name, builder)
+        tissue = builder.get_scene_items(type_filter='zTissue')[0]
+
+        # Action
+        builder_from_file = zva.Ziva()
+        read(file_name, builder_from_file, type_filter='zTet', association_filter=tissue.association)
+
+        # Verify
+        tets = builder_from_file.get_scene_items(type_filter='zTet')
+        self.assertEqual(tets, builder.get_scene_items(type_filter='zTet',
+                                                       association_filter=tissue.association))
+        parameters = [x for tet in tets for v in tet.parameters.values() for x in v]
+        self.assertEqual(len(builder_from_file.get_scene_items()), len(tets) + len(parameters))
+
+    def test_write_does_not_change_scene_item_pointers(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+        file_name = get_tmp_file_location('.zBuilder')
+        self.temp_files.append(file_name)
+        tet = builder.get_scene_items(type_filter='zTet')[0]
+        parameters = dict((k, list(v)) for k, v in tet.parameters.items())
+
+        # Action
+        tet.serialize()
+        write(file_name, builder)
+
+        # Verify
+        for parameter_type, items in parameters.items():
+            for item, written_item in zip(items, tet.parameters[parameter_type]):
+                self.assertIs(item, written_item)
+
+    def test_write_async_writes_same_file_as_write(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+        file_name = get_tmp_file_location('.zBuilder')
+        self.temp_files.append(file_name)
+
+        # Action
+        handle = write_async(file_name, builder)
+        # Changes after write_async() returns are not written
+        builder.get_scene_items(type_filter='zMaterial')[0].attrs['massDensity']['value'] += 777
+        handle.wait()
+
+        # Verify
+        self.assertTrue(handle.done())
+        self.assertEqual(handle.progress(), 1.0)
+        self.assertEqual(handle.result(), file_name)
+        builder_from_file = zva.Ziva()
+        read(file_name, builder_from_file)
+        builder_orig = zva.Ziva()
+        builder_orig.retrieve_from_scene()
+        self.assertEqual(builder_from_file, builder_orig)
+
+    def test_sharded_file_reads_the_same_scene_items(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+
+        for shard_by, codec in [('solver', 'deflate'), ('type', 'store'), (3, 'deflate')]:
+            file_name = get_tmp_file_location('.zBuilder')
+            self.temp_files.append(file_name)
+
+            # Action
+            write(file_name, builder, shard_by=shard_by, codec=codec, level=1, workers=2)
+            builder_from_file = zva.Ziva()
+            read(file_name, builder_from_file, workers=2)
+
+            # Verify
+            self.assertEqual(builder.get_scene_items(), builder_from_file.get_scene_items())
+
+    def test_identical_arrays_are_written_once(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+        maps = builder.get_scene_items(type_filter='map')[:2]
+        maps[1].values = list(maps[0].values)
+        file_name = get_tmp_file_location('.zBuilder')
+        self.temp_files.append(file_name)
+
+        # Action
+        write(file_name, builder)
+        builder_from_file = zva.Ziva()
+        read(file_name, builder_from_file)
+
+        # Verify
+        maps_from_file = [builder_from_file.get_scene_items(name_filter=x.name)[0] for x in maps]
+        self.assertEqual(maps_from_file[0].values, maps[0].values)
+        # The maps share one buffer
+        self.assertIs(maps_from_file[0].values, maps_from_file[1].values)
+
+    def test_shared_arrays_are_replaced_not_changed(self):
+        # Setup
+        build_mirror_sample_geo()
+        cmds.select(cl=True)
+        builder = zva.Ziva()
+        builder.retrieve_from_scene()
+        maps = builder.get_scene_items(type_filter='map')[:2]
+        maps[1].values = list(maps[0].values)
+        file_name = get_tmp_file_location('.zBuilder')
+        self.temp_files.append(file_name)
+        write(file_name, builder)
+        builder_from_file = zva.Ziva()
+        read(file_name, builder_from_file)
+        maps_from_file = [builder_from_file.get_scene_items(name_filter=x.name)[0] for x in maps]
+
+        # Act
+        with self.assertRaises(TypeError):
+            maps_from_file[0].values[0] += 1
+        maps_from_file[0].invert()
+        maps_from_file[1].set_values([1.0] * len(maps[0].values))
+        builder_from_file.string_replace('^l_', 'r_')
+
+        # Verify
+        self.assertIsNot(maps_from_file[0].values, maps_from_file[1].values)
+        self.assertEqual(maps_from_file[0].values, invert_weights(maps[0].values))
+        self.assertEqual(maps_from_file[1].values, [1.0] * len(maps[0].values))
+
     def test_builder_write_build(self):
         '''
         Write out a zBuilder file then immediatly build.
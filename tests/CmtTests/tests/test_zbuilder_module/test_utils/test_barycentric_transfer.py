@@ -0,0 +1,100 @@
+import numpy as np
+
+from vfx_test_case import VfxTestCase
+from zBuilder.utils.barycentric_transfer import (get_correspondence, transfer_end_points,
+                                                 transfer_values)
+from zBuilder.utils.spatial_index import closest_points_on_triangles, triangulate
+
+
+def make_grid(size):
+    """ A flat grid of size x size quads on the XZ plane, each quad 1 unit wide.
+    """
+    points = [(x, 0.0, z) for z in range(size + 1) for x in range(size + 1)]
+    poly_counts = [4] * size * size
+    poly_connects = []
+    for z in range(size):
+        for x in range(size):
+            first = z * (size + 1) + x
+            poly_connects.extend([first, first + 1, first + size + 2, first + size + 1])
+    return points, poly_counts, poly_connects
+
+
+class BarycentricTransferTestCase(VfxTestCase):
+
+    def test_triangulate_fans_out_polygons(self):
+        # Act
+        triangles = triangulate([3, 5], [0, 1, 2, 3, 4, 5, 6, 7])
+
+        # Verify
+        self.assertEqual(triangles.tolist(), [[0, 1, 2], [3, 4, 5], [3, 5, 6], [3, 6, 7]])
+
+    def test_correspondence_finds_closest_points(self):
+        # Setup
+        points, poly_counts, poly_connects = make_grid(20)
+        destination_points = np.random.RandomState(0).uniform(-2, 22, (500, 3))
+
+        # Act
+        vertex_ids, weights = get_correspondence(points, poly_counts, poly_connects,
+                                                 destination_points)
+
+        # Verify
+        points = np.asarray(points)
+        closest = np.einsum('ijk,ij->ik', points[vertex_ids], weights)
+        # Brute force over all the triangles
+        triangles = triangulate(poly_counts, poly_connects)
+        corners = points[triangles]
+        expected = [
+            closest_points_on_triangles(np.tile(point, (len(triangles), 1)), corners[:, 0],
+                                        corners[:, 1], corners[:, 2])[0].min()
+            for point in destination_points
+        ]
+        distances = ((destination_points - closest)**2).sum(axis=1)
+        self.assertAllApproxEqual(distances.tolist(), expected)
+        self.assertAllApproxEqual(weights.sum(axis=1).tolist(), [1.0] * len(weights))
+
+    def test_transfer_values_to_the_same_mesh_keeps_them(self):
+        # Setup
+        points, poly_counts, poly_connects = make_grid(5)
+        values = np.linspace(-1, 2, len(points))
+        vertex_ids, weights = get_correspondence(points, poly_counts, poly_connects, points)
+
+        # Act
+        transferred = transfer_values(vertex_ids, weights, values)
+        clamped = transfer_values(vertex_ids, weights, values, clamp_range=[0, 1])
+
+        # Verify
+        self.assertAllApproxEqual(transferred.tolist(), values.tolist())
+        self.assertAllApproxEqual(clamped.tolist(), np.clip(values, 0, 1).tolist())
+
+    def test_transfer_end_points_matches_per_vertex_rule(self):
+        # Setup
+        points, poly_counts, poly_connects = make_grid(10)
+        random = np.random.RandomState(1)
+        source_points = np.asarray(points) + random.uniform(-0.3, 0.3, (len(points), 3))
+        values = random.choice([0.0, 0.05, 0.5, 0.95, 1.0], len(points))
+
+        # Act
+        transferred = transfer_end_points(source_points, values, points, poly_counts,
+                                          poly_connects)
+
+        # Verify
+        # One source vertex at a time, as maps.interpolate_end_points_weights() does
+        points = np.asarray(points)
+        triangles = triangulate(poly_counts, poly_connects)
+        corners = points[triangles]
+        expected = [0.5] * len(points)
+        for point, value in zip(source_points, values):
+            value = 1.0 if value >= 0.9 else 0.0 if value <= 0.1 else value
+            if value not in (0, 1):
+                continue
+            distances = closest_points_on_triangles(np.tile(point, (len(triangles), 1)),
+                                                    corners[:, 0], corners[:, 1],
+                                                    corners[:, 2])[0]
+            face = int(np.argmin(distances)) // 2
+            polygon = poly_connects[face * 4:face * 4 + 4]
+            vertex_distances = [np.linalg.norm(points[x] - point) for x in polygon]
+            average = sum(vertex_distances) / len(vertex_distances)
+            for vertex, distance in zip(polygon, vertex_distances):
+                if distance <= average:
+                    expected[vertex] = value
+        self.assertAllApproxEqual(transferred.tolist(), expected)
@@ -1,5 +1,9 @@
+from maya import cmds
 from vfx_test_case import VfxTestCase
-from zBuilder.utils.mayaUtils import replace_long_name
+from zBuilder.utils.mayaUtils import (build_attr_key_values, build_attr_list, build_attrs,
+                                      clear_attr_schema_cache, get_attr_schema, get_long_names,
+                                      get_settable_attrs, object_exists, replace_long_name,
+                                      scene_query_cache, set_attrs)
 
 
 class MayaUtilsTestCase(VfxTestCase):
@@ -94,3 +98,150 @@ class MayaUtilsTestCase(VfxTestCase):
         observed = {k: replace_long_name('(^|_)r($|_)', 'l', k) for k in expected.keys()}
 
         self.assertDictEqual(expected, observed)
+
+    def test_build_attr_key_values_matches_maya_commands(self):
+        # Setup
+        node = cmds.polySphere(name='sphere')[0]
+        cmds.setAttr(node + '.translateX', 2.5)
+        cmds.setAttr(node + '.visibility', False)
+        cmds.setAttr(node + '.rotateOrder', 3)
+        cmds.setAttr(node + '.scaleY', lock=True)
+        cmds.aliasAttr('moveX', node + '.translateX')
+        attr_list = build_attr_list(node)
+
+        # Act
+        observed = build_attr_key_values(node, attr_list)
+
+        # Verify
+        self.assertTrue(attr_list)
+        self.assertEqual(sorted(observed.keys()), sorted(set(attr_list)))
+        for attr, entry in observed.items():
+            obj = '{}.{}'.format(node, attr)
+            self.assertEqual(entry['type'], cmds.getAttr(obj, type=True))
+            self.assertEqual(entry['value'], cmds.getAttr(obj))
+            self.assertEqual(entry['locked'], cmds.getAttr(obj, lock=True))
+            self.assertEqual(entry['alias'], cmds.aliasAttr(obj, q=True))
+        self.assertEqual(observed['translateX']['value'], 2.5)
+        self.assertEqual(observed['translateX']['alias'], 'moveX')
+        self.assertEqual(observed['rotateOrder']['type'], 'enum')
+        self.assertTrue(observed['scaleY']['locked'])
+
+    def test_build_attrs_matches_build_attr_key_values(self):
+        # Setup
+        node = cmds.polySphere(name='sphere')[0]
+        extend_attr_list = ['rotatePivot', 'visibility']
+
+        # Act
+        observed = build_attrs(node, extend_attr_list)
+
+        # Verify
+        expected = build_attr_key_values(node, build_attr_list(node) + extend_attr_list)
+        self.assertEqual(observed, expected)
+
+    def test_attr_schema_is_shared_by_node_type(self):
+        # Setup
+        clear_attr_schema_cache()
+        sphere = cmds.polySphere(name='sphere')[0]
+        cube = cmds.polyCube(name='cube')[0]
+        cmds.addAttr(sphere, longName='dynamicAttr', attributeType='double', keyable=True)
+
+        # Act
+        sphere_attrs = build_attrs(sphere)
+        cube_attrs = build_attrs(cube)
+
+        # Verify
+        schema = get_attr_schema(sphere)
+        self.assertIs(schema, get_attr_schema(cube))
+        self.assertIn('translateX', schema)
+        # Dynamic attributes are only looked up for the node that has them
+        self.assertNotIn('dynamicAttr', schema)
+        self.assertEqual(sphere_attrs['dynamicAttr']['type'], 'double')
+        self.assertNotIn('dynamicAttr', cube_attrs)
+
+    def test_get_settable_attrs_matches_maya_commands(self):
+        # Setup
+        node = cmds.polySphere(name='sphere')[0]
+        cmds.setAttr(node + '.translateY', lock=True)
+        cmds.connectAttr(node + '.translateX', node + '.translateZ')
+        attr_list = ['translateX', 'translateY', 'translateZ', 'notAnAttr']
+
+        # Act
+        observed = get_settable_attrs(node, attr_list)
+
+        # Verify
+        self.assertEqual(observed, {'translateX': True, 'translateY': False, 'translateZ': False})
+
+    def test_set_attrs_sets_values_and_reports_skipped(self):
+        # Setup
+        node = cmds.polySphere(name='sphere')[0]
+        cmds.setAttr(node + '.translateX', 1.5)
+        cmds.setAttr(node + '.rotateOrder', 2)
+        cmds.setAttr(node + '.visibility', False)
+        attrs = build_attrs(node)
+        cmds.setAttr(node + '.scaleZ', lock=True)
+        attrs['notAnAttr'] = {'type': 'double', 'value': 1.0, 'locked': False, 'alias': None}
+
+        # Values are set the same way with the undo queue on and off
+        for undo_state in (True, False):
+            cmds.setAttr(node + '.translateX', 0)
+            cmds.setAttr(node + '.rotateOrder', 0)
+            cmds.setAttr(node + '.visibility', True)
+            cmds.undoInfo(stateWithoutFlush=undo_state)
+            try:
+                # Act
+                skipped, failed = set_attrs([(node, attrs)])
+            finally:
+                cmds.undoInfo(stateWithoutFlush=True)
+
+            # Verify
+            self.assertEqual(cmds.getAttr(node + '.translateX'), 1.5)
+            self.assertEqual(cmds.getAttr(node + '.rotateOrder'), 2)
+            self.assertFalse(cmds.getAttr(node + '.visibility'))
+            self.assertEqual(sorted(skipped), [node + '.notAnAttr', node + '.scaleZ'])
+            self.assertEqual(failed, [])
+
+    def test_set_attrs_can_be_undone(self):
+        # Setup
+        node = cmds.polySphere(name='sphere')[0]
+        cmds.setAttr(node + '.translateX', 1.5)
+        cmds.setAttr(node + '.rotateOrder', 2)
+        attrs = build_attrs(node)
+        cmds.setAttr(node + '.translateX', 0)
+        cmds.setAttr(node + '.rotateOrder', 0)
+
+        # Act
+        set_attrs([(node, attrs)])
+        cmds.undo()
+
+        # Verify
+        self.assertEqual(cmds.getAttr(node + '.translateX'), 0)
+        self.assertEqual(cmds.getAttr(node + '.rotateOrder'), 0)
+
+        # Act
+        cmds.redo()
+
+        # Verify
+        self.assertEqual(cmds.getAttr(node + '.translateX'), 1.5)
+        self.assertEqual(cmds.getAttr(node + '.rotateOrder'), 2)
+
+    def test_scene_query_cache_is_cleared_when_nodes_change(self):
+        # Setup
+        node = cmds.polySphere(name='sphere')[0]
+
+        with scene_query_cache():
+            self.assertTrue(object_exists(node))
+            self.assertEqual(get_long_names('renamed_sphere'), [])
+
+            # Act
+            cmds.rename(node, 'renamed_sphere')
+
+            # Verify
+            self.assertFalse(object_exists(node))
+            self.assertEqual(get_long_names('renamed_sphere'), ['|renamed_sphere'])
+
+            # Act
+            cmds.delete('renamed_sphere')
+
+            # Verify
+            self.assertFalse(object_exists('renamed_sphere'))
+            self.assertEqual(get_long_names('renamed_sphere'), [])
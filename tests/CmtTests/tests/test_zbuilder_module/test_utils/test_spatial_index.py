@@ -0,0 +1,82 @@
+import json
+import numpy as np
+
+from vfx_test_case import VfxTestCase
+from zBuilder.utils.spatial_index import (MeshSpatialIndex, clear_spatial_index_cache,
+                                          get_spatial_index)
+
+
+def make_point_cloud(count):
+    """ Random points, with a cluster of duplicates, and one triangle per three points.
+    """
+    points = np.random.RandomState(2).uniform(-5, 5, (count, 3))
+    points[:20] = points[0]
+    poly_counts = [3] * (count // 3)
+    poly_connects = list(range(len(poly_counts) * 3))
+    return points, poly_counts, poly_connects
+
+
+class SpatialIndexTestCase(VfxTestCase):
+
+    def setUp(self):
+        super(SpatialIndexTestCase, self).setUp()
+        clear_spatial_index_cache()
+        self.points, self.poly_counts, self.poly_connects = make_point_cloud(1000)
+        self.queries = np.random.RandomState(3).uniform(-6, 6, (300, 3))
+        # Brute force distances, (query, vertex)
+        delta = self.queries[:, np.newaxis] - self.points[np.newaxis]
+        self.distances = np.sqrt((delta**2).sum(axis=2))
+
+    def test_nearest_vertices_match_brute_force(self):
+        # Setup
+        index = MeshSpatialIndex(self.points, self.poly_counts, self.poly_connects)
+
+        # Act
+        vertex_ids, distances = index.nearest_vertices(self.queries, k=30)
+
+        # Verify
+        expected = np.sort(self.distances, axis=1)[:, :30]
+        self.assertAllApproxEqual(distances.ravel().tolist(), expected.ravel().tolist())
+        found = np.take_along_axis(self.distances, vertex_ids, axis=1)
+        self.assertAllApproxEqual(found.ravel().tolist(), expected.ravel().tolist())
+
+    def test_vertices_in_radius_match_brute_force(self):
+        # Setup
+        index = MeshSpatialIndex(self.points, self.poly_counts, self.poly_connects)
+
+        # Act
+        results = index.vertices_in_radius(self.queries, 1.5)
+
+        # Verify
+        self.assertEqual(len(results), len(self.queries))
+        for (vertex_ids, distances), expected in zip(results, self.distances):
+            self.assertEqual(sorted(vertex_ids.tolist()),
+                             np.nonzero(expected <= 1.5)[0].tolist())
+            self.assertEqual(distances.tolist(), sorted(distances.tolist()))
+
+    def test_index_restored_from_dict_gives_the_same_results(self):
+        # Setup
+        index = MeshSpatialIndex(self.points, self.poly_counts, self.poly_connects)
+        expected_closest = index.closest_points(self.queries)
+        expected_nearest = index.nearest_vertices(self.queries, k=3)
+
+        # Act
+        restored = MeshSpatialIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+
+        # Verify
+        self.assertIsNotNone(restored._triangle_tree)
+        self.assertIsNotNone(restored._vertex_tree)
+        for expected, result in zip(expected_closest + expected_nearest,
+                                    restored.closest_points(self.queries) +
+                                    restored.nearest_vertices(self.queries, k=3)):
+            self.assertAllApproxEqual(result.ravel().tolist(), expected.ravel().tolist())
+
+    def test_spatial_index_is_shared_per_mesh(self):
+        # Act
+        index = get_spatial_index(self.points, self.poly_counts, self.poly_connects)
+        same_mesh = get_spatial_index(self.points.tolist(), self.poly_counts, self.poly_connects)
+        other_mesh = get_spatial_index(self.points + 1, self.poly_counts, self.poly_connects)
+
+        # Verify
+        self.assertIs(index, same_mesh)
+        self.assertIsNot(index, other_mesh)
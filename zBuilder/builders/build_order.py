@@ -0,0 +1,101 @@
+""" The order Ziva node types are retrieved and built in.
+
+Each node type declares the node types it depends on, the ones whose nodes have to be in
+the scene, and in the builder, before its own nodes are built or populated.
+Node types that do not depend on each other are built in the same level,
+so each level can create all of its nodes in batches.
+"""
+from collections import OrderedDict
+from zBuilder.utils.mayaUtils import FIELD_TYPES
+
+BODY_TYPES = ('zBone', 'zTissue', 'zCloth')
+
+# Node type -> node types it depends on.
+# The order here breaks ties between node types of the same level.
+# TODO: Use plain dict once Python 2 retires,
+# Python 3 guarantees the inserted items are ordered.
+NODE_DEPENDENCIES = OrderedDict([
+    ('zSolver', ()),
+    ('zSolverTransform', ('zSolver', )),
+    ('zBone', ('zSolverTransform', )),
+    ('zTissue', ('zSolverTransform', )),
+    ('zCloth', ('zSolverTransform', )),
+    ('zTet', ('zTissue', )),
+    ('zMaterial', ('zTissue', 'zCloth')),
+    ('zAttachment', BODY_TYPES),
+    ('zFiber', ('zTissue', )),
+    ('zEmbedder', ('zTissue', )),
+    ('zLineOfAction', ('zFiber', )),
+    ('zRivetToBone', ('zFiber', 'zBone')),
+    ('zRestShape', ('zTet', )),
+] + [(field_type, ()) for field_type in FIELD_TYPES] + [
+    ('zFieldAdaptor', FIELD_TYPES + ('zTissue', 'zCloth')),
+])
+
+
+def _get_levels():
+    """ Works out the level of every node type in NODE_DEPENDENCIES,
+    one more than the highest level of the node types it depends on.
+
+    Returns:
+        dict: node type -> level
+    """
+    levels = {}
+
+    def visit(node_type, path):
+        if node_type in levels:
+            return levels[node_type]
+        assert node_type not in path, 'Node type dependency cycle: {}'.format(
+            ' -> '.join(path + [node_type]))
+        dependencies = NODE_DEPENDENCIES.get(node_type, ())
+        level = 1 + max([visit(x, path + [node_type]) for x in dependencies] or [-1])
+        levels[node_type] = level
+        return level
+
+    for node_type in NODE_DEPENDENCIES:
+        visit(node_type, [])
+    return levels
+
+
+def get_build_levels(node_types):
+    """ Groups node types into levels to build one after another.
+    Node types of a level do not depend on each other.
+    Node types missing from NODE_DEPENDENCIES come last, in the order given.
+
+    Args:
+        node_types (list): Node types to build.
+
+    Returns:
+        list: of lists of node types, in build order.
+    """
+    levels = _get_levels()
+    declared_order = dict((node_type, i) for i, node_type in enumerate(NODE_DEPENDENCIES))
+
+    known = sorted(set(x for x in node_types if x in levels),
+                   key=lambda x: (levels[x], declared_order[x]))
+    build_levels = []
+    for node_type in known:
+        if build_levels and levels[build_levels[-1][0]] == levels[node_type]:
+            build_levels[-1].append(node_type)
+        else:
+            build_levels.append([node_type])
+
+    unknown = [x for x in node_types if x not in levels]
+    if unknown:
+        build_levels.append(list(OrderedDict.fromkeys(unknown)))
+    return build_levels
+
+
+def get_build_order(node_types=None):
+    """ Orders node types so each comes after those it depends on.
+
+    Args:
+        node_types (list, optional): Node types to order.
+            Defaults to all the node types in NODE_DEPENDENCIES.
+
+    Returns:
+        list: of node types.
+    """
+    if node_types is None:
+        node_types = list(NODE_DEPENDENCIES)
+    return [x for level in get_build_levels(node_types) for x in level]
@@ -0,0 +1,244 @@
+import json
+import logging
+import time
+
+from maya import cmds
+from zBuilder.utils.mayaUtils import get_changed_attrs
+from zBuilder.utils.solverDisabler import SolverDisabler
+
+logger = logging.getLogger(__name__)
+
+
+def retrieve_scene_connections(builder):
+    """ Gets how the Ziva nodes in the scene connect to the meshes of the builder,
+    with Ziva.retrieve_connections() on those meshes.
+
+    Returns:
+        dict: long name -> (type, long associations) of the Ziva nodes in the scene.
+    """
+    # Imported here to avoid a circular import with zBuilder.builders.ziva
+    from zBuilder.builders.ziva import Ziva
+
+    meshes = set()
+    for item in builder.get_scene_items():
+        meshes.update(getattr(item, 'long_association', None) or [])
+    meshes = cmds.ls(list(meshes), long=True)
+    if not meshes:
+        return {}
+
+    sel = cmds.ls(sl=True)
+    cmds.select(meshes, r=True)
+    try:
+        scene = Ziva()
+        scene.retrieve_connections()
+    finally:
+        cmds.select(sel, r=True)
+    return dict((item.long_name, (item.type, list(item.long_association)))
+                for item in scene.get_scene_items()
+                if getattr(item, 'long_association', None) is not None)
+
+
+class BuildStep(object):
+    """ Building one scene item: creating its node if it is not in the scene,
+    renaming it to the stored name, then writing its attributes and weight maps.
+    """
+
+    def __init__(self, scene_item, build_kwargs, post_build=True):
+        self.scene_item = scene_item
+        # Keyword arguments passed to scene_item.do_build()
+        self.build_kwargs = build_kwargs
+        # Whether scene_item.do_post_build() runs after do_build()
+        self.post_build = post_build
+
+    def execute(self):
+        self.scene_item.do_build(**self.build_kwargs)
+        if self.post_build:
+            self.scene_item.do_post_build()
+
+    def to_dict(self, skip_unchanged=False, scene_connections=None):
+        """ Describes what building the scene item would change in the current scene.
+
+        Args:
+            skip_unchanged (bool): Leave out the attributes and maps that match the scene,
+                for scene items connected as in the scene.
+            scene_connections (dict, optional): See retrieve_scene_connections().
+
+        Returns:
+            dict: type and name of the scene item, whether it gets created,
+            and the attributes and maps it writes.
+        """
+        item = self.scene_item
+        exists = cmds.objExists(item.name)
+        if skip_unchanged and exists and hasattr(item, 'is_connected_as_in_scene'):
+            skip_unchanged = item.is_connected_as_in_scene(scene_connections or {})
+        attrs = getattr(item, 'attrs', {})
+        if skip_unchanged and exists:
+            attrs = get_changed_attrs(item.name, attrs)
+        maps = getattr(item, 'parameters', {}).get('map', [])
+        if skip_unchanged and exists:
+            maps = [map_ for map_ in maps if not map_.is_same_as_scene()]
+
+        return {
+            'type': item.type,
+            'name': item.name,
+            'create': not exists,
+            'attrs': sorted(attrs),
+            'maps': [map_.name for map_ in maps],
+        }
+
+
+class BuildStage(object):
+    """ The scene items of node types that do not depend on each other,
+    built together and timed as a whole.
+    Node types with a batch creator, e.g. zBone, create all their nodes at once.
+    """
+
+    def __init__(self, node_types, steps):
+        self.node_types = node_types
+        self.name = ', '.join(node_types)
+        self.steps = steps
+        # Seconds it took to execute, None until executed
+        self.elapsed = None
+
+    def execute(self):
+        if self.steps:
+            logger.info('Building: {}'.format(self.name))
+        before = time.time()
+        for steps in self._group_steps():
+            scene_items = [step.scene_item for step in steps]
+            build_multiple = getattr(type(scene_items[0]), 'do_build_multiple', None)
+            if build_multiple and len(steps) > 1:
+                # The node type builds all of its scene items at once
+                build_multiple(scene_items, **steps[0].build_kwargs)
+                for step in steps:
+                    if step.post_build:
+                        step.scene_item.do_post_build()
+            else:
+                for step in steps:
+                    step.execute()
+        self.elapsed = time.time() - before
+
+    def _group_steps(self):
+        """ Groups consecutive steps building the same type of scene item with
+        the same arguments.
+
+        Returns:
+            list: of lists of steps.
+        """
+        groups = []
+        for step in self.steps:
+            if groups and type(groups[-1][0].scene_item) is type(step.scene_item) and \
+               groups[-1][0].build_kwargs == step.build_kwargs and \
+               groups[-1][0].post_build == step.post_build:
+                groups[-1].append(step)
+            else:
+                groups.append([step])
+        return groups
+
+    def to_dict(self, skip_unchanged=False, scene_connections=None):
+        return {
+            'name': self.name,
+            'node_types': self.node_types,
+            'elapsed': self.elapsed,
+            'steps': [step.to_dict(skip_unchanged, scene_connections) for step in self.steps],
+        }
+
+
+class BuildPlan(object):
+    """ The list of stages Ziva.build() runs, see Ziva.plan_build().
+    It can be inspected, dry-run and written out for review before it is executed.
+
+    Args:
+        builder (:obj:`Ziva`): The builder holding the scene items to build.
+        solver_stages (list): Stages building the solver, run before the others.
+        stages (list): Stages run while the solver is disabled.
+        skip_unchanged (bool): Only write attributes and maps that differ from the scene.
+    """
+
+    def __init__(self, builder, solver_stages, stages, skip_unchanged=False):
+        self.builder = builder
+        self.solver_stages = solver_stages
+        self.stages = stages
+        self.skip_unchanged = skip_unchanged
+
+    def __iter__(self):
+        for stage in self.solver_stages + self.stages:
+            yield stage
+
+    def get_scene_items(self):
+        """ Gets the scene items in the order they get built.
+
+        Returns:
+            list: of scene items.
+        """
+        return [step.scene_item for stage in self for step in stage.steps]
+
+    def execute(self):
+        """ Builds the plan into the Maya scene.
+        """
+        # Imported here to avoid a circular import with zBuilder.builders.ziva
+        from zBuilder.builders.ziva import _check_map_validity
+
+        sel = cmds.ls(sl=True)
+
+        # get stored solver enable value to build later. The solver comes in OFF
+        solver_transform = self.builder.get_scene_items(type_filter='zSolverTransform')
+
+        self.builder.skip_unchanged = self.skip_unchanged
+        if self.skip_unchanged:
+            self.builder.scene_connections = retrieve_scene_connections(self.builder)
+        try:
+            for stage in self.solver_stages:
+                stage.execute()
+
+            with SolverDisabler(solver_transform[0].name):
+                for stage in self.stages:
+                    stage.execute()
+        finally:
+            self.builder.skip_unchanged = False
+            self.builder.scene_connections = None
+
+        cmds.select(sel, r=True)
+
+        # last ditch check of map validity for zAttachments and zFibers
+        _check_map_validity(self.builder.get_scene_items(type_filter='map'))
+
+        for stage in self:
+            if stage.steps:
+                logger.debug('Building {} took {:.3f}s'.format(stage.name, stage.elapsed))
+
+    def to_dict(self):
+        """ Describes the plan against the current scene without changing it.
+
+        Returns:
+            dict: of the stages, each with the scene items it builds.
+        """
+        scene_connections = retrieve_scene_connections(
+            self.builder) if self.skip_unchanged else None
+        return {
+            'skip_unchanged': self.skip_unchanged,
+            'stages': [stage.to_dict(self.skip_unchanged, scene_connections) for stage in self],
+        }
+
+    def dry_run(self):
+        """ Logs what executing the plan would do, without changing the scene.
+
+        Returns:
+            dict: the plan, see to_dict().
+        """
+        plan = self.to_dict()
+        for stage in plan['stages']:
+            for step in stage['steps']:
+                logger.info('{}: {} {} ({} attributes, {} maps)'.format(
+                    stage['name'], 'create' if step['create'] else 'update', step['name'],
+                    len(step['attrs']), len(step['maps'])))
+        return plan
+
+    def write(self, file_path):
+        """ Writes the plan to a json file for review.
+
+        Args:
+            file_path (str): The file path to write to.
+        """
+        with open(file_path, 'w') as handle:
+            json.dump(self.to_dict(), handle, sort_keys=True, indent=4, separators=(',', ': '))
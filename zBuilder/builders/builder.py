@@ -1,14 +1,15 @@
-import inspect
 import logging
 import re
-import sys
 # For parameter_factory() and find_class(), though not use directly,
+# importing the package registers the zBuilder node classes.
 import zBuilder.nodes.parameters
 
 from collections import Counter
-from zBuilder.utils.commonUtils import is_sequence, is_string, parse_version_info
+from zBuilder.utils.commonUtils import is_sequence, is_string
 from zBuilder.utils.mayaUtils import get_type, parse_maya_node_for_selection
-from zBuilder import __version__
+# find_class() is imported here for backward compatibility.
+from zBuilder.nodes.registry import find_class, get_node_class
+from .scene_item_store import SceneItemStore
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +20,15 @@ class Builder(object):
     """
 
     def __init__(self):
-        self.scene_items = list()
+        self.scene_items = SceneItemStore()
+        # (parameter type, long name) -> parameter scene item, see parameter_factory().
+        # It is rebuilt from the scene items when it is None.
+        self._parameter_cache = None
+        # True while building only what differs from the scene, see Ziva.build().
+        self.skip_unchanged = False
+        # long name -> (type, long associations) of the Ziva nodes in the scene
+        # while building only what differs from it, see retrieve_scene_connections().
+        self.scene_connections = None
         from zBuilder.nodes.base import Base
         self.root_node = Base()
         self.root_node.name = 'ROOT'
@@ -99,7 +108,7 @@ class Builder(object):
         return parameters
 
     def parameter_factory(self, parameter_type, parameter_args):
-        ''' This looks for zBuilder objects in sys.modules and instantiates
+        ''' This looks up the registered zBuilder class of parameter_type and instantiates
         desired one based on arguments.
 
         Args:
@@ -118,22 +127,57 @@ class Builder(object):
         if not is_sequence(parameter_args):
             parameter_args = [parameter_args]
 
-        for _, obj in inspect.getmembers(sys.modules['zBuilder.nodes']):
-            if inspect.isclass(obj) and parameter_type == obj.type:
-                scene_item_nodes = self.get_scene_items(type_filter=parameter_type)
-                scene_item_names = [y.long_name for y in scene_item_nodes]
-
-                # the first element in parameter_args is the name.
-                parameter_name = parameter_args[0]
-                try:
-                    # There is an existing scene item for this item so lets just
-                    # return that.
-                    index = scene_item_names.index(parameter_name)
-                    return scene_item_nodes[index]
-                except ValueError:
-                    # No scene item with given parameter_name,
-                    # create one and return that.
-                    return obj(*parameter_args, builder=self)
+        obj = get_node_class(parameter_type)
+        if obj is None:
+            return None
+
+        # the first element in parameter_args is the name.
+        parameter_name = parameter_args[0]
+        existing = self._get_parameter_cache().get((parameter_type, parameter_name))
+        if existing is not None:
+            # There is an existing scene item for this item so lets just
+            # return that.
+            return existing
+
+        # No scene item with given parameter_name,
+        # create one and return that.
+        return obj(*parameter_args, builder=self)
+
+    def _get_parameter_cache(self):
+        """ Gets the lookup of existing parameters by type and long name,
+        building it from the scene items if needed.
+        The first scene item in order wins, the same as a search through scene items would.
+
+        Returns:
+            dict: (parameter type, long name) -> parameter scene item
+        """
+        if self._parameter_cache is None:
+            self._parameter_cache = {}
+            for item in self.scene_items:
+                self._add_to_parameter_cache(item)
+        return self._parameter_cache
+
+    def _add_to_parameter_cache(self, item):
+        self._parameter_cache.setdefault((item.type, item.long_name), item)
+
+    def _refresh_parameter_cache(self, parameter_type, long_name):
+        """ Updates one key of the parameter cache, if it is built,
+        after a scene item was renamed to or from that long name.
+        """
+        if self._parameter_cache is None:
+            return
+        key = (parameter_type, long_name)
+        for item in self.scene_items.get_all_by_long_name(long_name):
+            if item.type == parameter_type:
+                self._parameter_cache[key] = item
+                return
+        self._parameter_cache.pop(key, None)
+
+    def _invalidate_parameter_cache(self):
+        """ The parameter cache is rebuilt on next use.
+        Call this when scene items are replaced, removed or renamed.
+        """
+        self._parameter_cache = None
 
     def make_node_connections(self):
         """This makes connections between this node and any other node in scene_items.  The expectations
@@ -203,6 +247,11 @@ class Builder(object):
             item.string_replace(search, replace)
             #TODO: include parent and attachment: VFXACT-1113
 
+        # Scene items re-index themselves when renamed, this catches the ones
+        # that do not point back to this builder.
+        self.scene_items.reindex_all()
+        self._invalidate_parameter_cache()
+
     def print_(self, type_filter=None, name_filter=None):
         """
         Prints out basic information for each scene item in the Builder.  Information is all
@@ -269,7 +318,7 @@ class Builder(object):
            not name_filter and \
            not name_regex and \
            not association_regex:
-            return self.scene_items
+            return self.scene_items.to_list()
 
         type_set = set(type_filter) if type_filter else None
         name_set = set(name_filter) if name_filter else None
@@ -290,7 +339,15 @@ class Builder(object):
                 return invert
             return not invert
 
-        return [item for item in self.scene_items if keep_me(item, invert_match)]
+        # The exact-match filters are looked up in the scene item indexes, so only
+        # the matching items get tested.  An inverted match has to test every item.
+        candidates = None
+        if not invert_match:
+            candidates = self.scene_items.candidates(type_set, name_set, association_set)
+        if candidates is None:
+            candidates = self.scene_items
+
+        return [item for item in candidates if keep_me(item, invert_match)]
 
     def remove_scene_item(self, item_to_remove):
         """
@@ -299,6 +356,7 @@ class Builder(object):
             item_to_remove (:obj:`obj`): The item object to remove.
         """
         self.scene_items.remove(item_to_remove)
+        self._invalidate_parameter_cache()
 
     def _extend_scene_items(self, new_scene_items):
         """
@@ -311,43 +369,20 @@ class Builder(object):
         """
         # The order of items in self.scene_items is important,
         # so we must update existing items in place and append new items in the order given.
-        # To easily update existing items, here's an index to lookup where they are by name.
-        old_items = {item.long_name: index for index, item in enumerate(self.scene_items)}
-
-        bad_index = -1
-        for item in new_scene_items:
-            index = old_items.get(item.long_name, bad_index)
-            if index != bad_index:
-                self.scene_items[index] = item
-            else:
+        # Duplicates are only looked up among the items that existed before this call,
+        # the same existing item may be replaced more than once by this batch.
+        existing_items = [
+            self.scene_items.get_by_long_name(item.long_name) for item in new_scene_items
+        ]
+        occupants = {}
+        for item, existing_item in zip(new_scene_items, existing_items):
+            if existing_item is None:
                 self.scene_items.append(item)
+                if self._parameter_cache is not None:
+                    self._add_to_parameter_cache(item)
+            else:
+                occupant = occupants.get(id(existing_item), existing_item)
+                self.scene_items.replace(occupant, item)
+                occupants[id(existing_item)] = item
+                self._invalidate_parameter_cache()
 
-
-# TODO: Move node registration and type introspection methods such as, find_class,
-# node_factory, parameter_factory functions out of builder.py
-def find_class(module, obj_type):
-    """
-    Given a module and a type returns class object. If no class objects are
-    found it returns a DGNode class object.
-
-    Args:
-        module (:obj:`str`): The module to look for.
-        obj_type (:obj:`str`): The type to look for.
-
-    Returns:
-        obj: class object.
-    """
-    # The parameters module is moved to zBuilder.nodes since version 2.1,
-    # patch the module path to compatible old setups.
-    major, minor, patch, _ = parse_version_info(__version__)
-    if module == 'zBuilder.parameters' and (major, minor, patch) >= (2, 1, 0):
-        module = 'zBuilder.nodes'
-
-    for _, obj in inspect.getmembers(sys.modules[module]):
-        if inspect.isclass(obj):
-            if obj_type in obj.TYPES or obj_type == obj.type:
-                return obj
-
-    # if class object is not found lets return a DG node object
-    from zBuilder.nodes.dg_node import DGNode
-    return DGNode
@@ -0,0 +1,226 @@
+""" A snapshot of how the Ziva nodes of one solver are connected.
+
+It is taken once before the nodes of the solver get populated,
+so populating each node reads its solver, meshes and related nodes from the snapshot
+instead of querying the scene for them again.
+"""
+import re
+
+from collections import defaultdict
+from itertools import chain
+from maya import cmds
+from zBuilder.utils.commonUtils import none_to_empty
+from zBuilder.utils.mayaUtils import get_deformer_meshes, FIELD_TYPES
+
+# Node type -> the input attributes connecting it to the other nodes the snapshot records.
+_INPUT_ATTRS = {
+    'zTissue': ('iParentTissue', ),
+    'zFiber': ('iLineOfActionData', ),
+    'zLineOfAction': ('curves', ),
+    'zRivetToBone': ('rivetMesh', ),
+    'zRestShape': ('iGeo', ),
+}
+
+# Node types that are not associated with any mesh.
+_MESHLESS_TYPES = ('zSolver', 'zSolverTransform', 'zFieldAdaptor', 'zEmbedder')
+
+# Node types connecting fields to the bodies they act on.
+_FIELD_NODE_TYPES = ('zFieldAdaptor', ) + tuple(FIELD_TYPES)
+
+
+class ZivaSceneGraph(object):
+    """ Records, for the Ziva nodes of one solver, the solver of each node,
+    the meshes each node is associated with, attachment sources and targets,
+    sub-tissues, the fields of each body,
+    the zLineOfAction of each zFiber and the zRestShape of each zTet.
+
+    The scene is queried in batches when the snapshot is taken:
+    one query for the node types, one for the connections of all the nodes,
+    one for the zGeo nodes among the connected nodes, and one pass over the output geometry
+    of the deformers, e.g. zAttachments, and of the zGeo nodes for their meshes.
+    The nodes that are not deformers, e.g. zTissues and zBones, get the meshes of their zGeo.
+    A node whose meshes are not found that way falls back to zQuery.
+
+    Args:
+        solver (str): The zSolver the nodes belong to.
+        nodes (list): Names of the Ziva nodes of the solver, e.g. from _zQuery().
+    """
+
+    def __init__(self, solver, nodes):
+        self.solver = solver
+        # node -> node type
+        self.types = {}
+        # node -> list of long names of the meshes it is associated with
+        self.meshes = {}
+        # zAttachment -> (source mesh, target mesh)
+        self.attachment_meshes = {}
+        # zTissue -> parent zTissue of the sub-tissue, and the other way around
+        self.tissue_parents = {}
+        self.tissue_children = defaultdict(list)
+        # node -> the nodes connected to it
+        self.connected = defaultdict(list)
+        # zFiber -> zLineOfAction, and the other way around
+        self.fiber_line_of_actions = {}
+        self.line_of_action_fibers = {}
+        # zTet -> zRestShape, and zRestShape -> zTissue
+        self.tet_rest_shapes = {}
+        self.rest_shape_tissues = {}
+
+        nodes = list(nodes)
+        if solver not in nodes:
+            nodes.insert(0, solver)
+
+        typed = none_to_empty(cmds.ls(nodes, showType=True))
+        ls_types = dict(zip(typed[::2], typed[1::2]))
+        for node in nodes:
+            self.types[node] = ls_types.get(node) or cmds.objectType(node)
+
+        inputs = self._get_connections(nodes)
+        geos = set(none_to_empty(cmds.ls(list(set(chain.from_iterable(self.connected.values()))),
+                                         type='zGeo')))
+        deformer_meshes = get_deformer_meshes(
+            none_to_empty(cmds.ls(nodes + list(geos), type='geometryFilter')))
+        # zRestShapes take the meshes of their zTet, they come after the other nodes
+        for node in sorted(nodes, key=lambda x: self.types[x] == 'zRestShape'):
+            self.meshes[node] = self._get_meshes(node, inputs, deformer_meshes, geos)
+
+        tissue_by_mesh = {}
+        tet_by_mesh = {}
+        for node, type_ in self.types.items():
+            if type_ == 'zTissue':
+                parent = inputs[(node, 'iParentTissue')]
+                if parent:
+                    self.tissue_parents[node] = parent[0]
+                    self.tissue_children[parent[0]].append(node)
+                tissue_by_mesh.update((mesh, node) for mesh in self.meshes[node])
+            elif type_ == 'zTet':
+                tet_by_mesh.update((mesh, node) for mesh in self.meshes[node])
+            elif type_ == 'zAttachment':
+                self.attachment_meshes[node] = tuple(self.meshes[node])
+            elif type_ == 'zFiber':
+                line_of_action = inputs[(node, 'iLineOfActionData')]
+                if line_of_action:
+                    self.fiber_line_of_actions[node] = line_of_action[0]
+                    self.line_of_action_fibers[line_of_action[0]] = node
+
+        for node, type_ in self.types.items():
+            if type_ == 'zRestShape':
+                for mesh in self.meshes[node]:
+                    if mesh in tissue_by_mesh:
+                        self.rest_shape_tissues[node] = tissue_by_mesh[mesh]
+                    if mesh in tet_by_mesh:
+                        self.tet_rest_shapes[tet_by_mesh[mesh]] = node
+
+    def __contains__(self, node):
+        return node in self.types
+
+    def _get_connections(self, nodes):
+        """ Records the nodes connected to each node in connected, and gets the nodes
+        connected to the input attributes in _INPUT_ATTRS, with one query for all the nodes.
+
+        Returns:
+            defaultdict: (node, attribute name) -> list of connected nodes
+        """
+        inputs = defaultdict(list)
+
+        # [node.attr, connected node, node.attr, connected node, ...]
+        connections = none_to_empty(cmds.listConnections(nodes, connections=True))
+        for plug, connected in zip(connections[::2], connections[1::2]):
+            node, attr = plug.split('.', 1)
+            if connected not in self.connected[node]:
+                self.connected[node].append(connected)
+            # Drop the array index and child attributes, e.g. curves[0] -> curves
+            attr = re.split(r'[\[.]', attr)[0]
+            if attr in _INPUT_ATTRS.get(self.types.get(node), ()):
+                inputs[(node, attr)].append(connected)
+        return inputs
+
+    def _get_meshes(self, node, inputs, deformer_meshes, geos):
+        """ The same as vfxUtils.get_association(), reading connections from inputs
+        and the meshes of deformers, e.g. the source and target of zAttachments,
+        from deformer_meshes, see mayaUtils.get_deformer_meshes().
+        The other nodes, e.g. zTissues, get the meshes of the zGeo nodes in geos
+        connected to them.
+        """
+        type_ = self.types[node]
+        if type_ in _MESHLESS_TYPES:
+            return []
+        elif type_ == 'zRestShape':
+            tet = inputs[(node, 'iGeo')]
+            if not tet:
+                return []
+            # The zTet is on the mesh of its zTissue
+            return list(self.meshes.get(tet[0], []))
+        elif type_ == 'zLineOfAction':
+            return inputs[(node, 'curves')]
+        elif type_ == 'zRivetToBone':
+            return inputs[(node, 'rivetMesh')]
+        elif node in deformer_meshes:
+            return list(deformer_meshes[node])
+
+        meshes = []
+        for geo in self.connected[node]:
+            if geo in geos:
+                meshes.extend(x for x in deformer_meshes.get(geo, []) if x not in meshes)
+        if meshes:
+            return meshes
+
+        if type_ == 'zAttachment':
+            meshes = none_to_empty(cmds.zQuery(node, attachmentSource=True, l=True))
+            meshes.extend(none_to_empty(cmds.zQuery(node, attachmentTarget=True, l=True)))
+            return meshes
+        return none_to_empty(cmds.zQuery(node, t=type_, l=True, m=True))
+
+    def get_type(self, node):
+        return self.types[node]
+
+    def get_solver(self, node):
+        """ Gets the solver of the node, None if the node is not in the snapshot.
+        """
+        return self.solver if node in self else None
+
+    def get_meshes(self, node):
+        """ Gets the long names of the meshes associated with the node,
+        see vfxUtils.get_association().
+        """
+        return list(self.meshes.get(node, []))
+
+    def get_attachment_meshes(self, attachment):
+        """ Gets the source and target meshes of the zAttachment.
+        """
+        return self.attachment_meshes.get(attachment)
+
+    def get_tissue_parent(self, tissue):
+        """ Gets the parent zTissue of a sub-tissue, None if it has no parent.
+        """
+        return self.tissue_parents.get(tissue)
+
+    def get_tissue_children(self, tissue):
+        """ Gets the sub-tissues of a zTissue.
+        """
+        return list(self.tissue_children.get(tissue, []))
+
+    def get_fields(self, body):
+        """ Gets the zFieldAdaptors and fields connected to a body, e.g. a zTissue,
+        directly or through other zFieldAdaptors and fields.
+        """
+        fields = []
+        pending = [body]
+        while pending:
+            for node in self.connected.get(pending.pop(), []):
+                if node not in fields and self.types.get(node) in _FIELD_NODE_TYPES:
+                    fields.append(node)
+                    pending.append(node)
+        return fields
+
+    def get_fiber_line_of_action(self, fiber):
+        return self.fiber_line_of_actions.get(fiber)
+
+    def get_line_of_action_fiber(self, line_of_action):
+        return self.line_of_action_fibers.get(line_of_action)
+
+    def get_rest_shape(self, tet):
+        return self.tet_rest_shapes.get(tet)
+
+    def get_rest_shape_tissue(self, rest_shape):
+        return self.rest_shape_tissues.get(rest_shape)
@@ -0,0 +1,304 @@
+import logging
+
+from collections import OrderedDict, defaultdict
+from zBuilder.utils.mayaUtils import get_short_name
+
+logger = logging.getLogger(__name__)
+
+# Names of the lookup indexes maintained by SceneItemStore.
+TYPE_INDEX = 'type'
+NAME_INDEX = 'name'
+LONG_NAME_INDEX = 'long_name'
+ASSOCIATION_INDEX = 'association'
+
+
+class SceneItemStore(object):
+    """ Ordered container of scene items with hash indexes.
+
+    Items are kept in insertion order.  Replacing an item keeps the position of the
+    item it replaces.  Next to that order the store keeps indexes by type, short name,
+    long name and association so exact-match filters only touch matching items.
+
+    The indexes are refreshed with reindex() when a scene item changes its name or
+    association.  Scene items do that themselves through Base._reindex().
+    """
+
+    def __init__(self, items=None):
+        self._clear()
+        for item in items or []:
+            self.append(item)
+
+    def _clear(self):
+        # sequence number -> scene item, in scene item order
+        self._items = OrderedDict()
+        # The scene items in order, built on first use and dropped when the order changes.
+        # It is replaced, never changed in place, so iterators over it stay valid.
+        self._ordered = None
+        # id(scene item) -> sequence number
+        self._seqs = {}
+        # id(scene item) -> index keys the item is currently stored under
+        self._keys = {}
+        # index name -> index key -> {sequence number: scene item}
+        self._indexes = dict((index, defaultdict(dict)) for index in
+                             (TYPE_INDEX, NAME_INDEX, LONG_NAME_INDEX, ASSOCIATION_INDEX))
+        # Items without association.  Association filters do not exclude them.
+        self._no_association = {}
+        # (index name, index key) -> sorted sequence numbers of the bucket
+        self._sorted_buckets = {}
+        self._next_seq = 0
+
+    def __iter__(self):
+        return iter(self._get_ordered())
+
+    def __len__(self):
+        self._flush_pending()
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._get_ordered()[index]
+
+    def __contains__(self, item):
+        self._flush_pending()
+        return id(item) in self._seqs
+
+    def __eq__(self, other):
+        if isinstance(other, SceneItemStore):
+            other = other.to_list()
+        return self.to_list() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __getstate__(self):
+        # The indexes are keyed by id(), which does not survive copy or pickle.
+        # Only store the items and rebuild the indexes on the other side.
+        return {'items': self.to_list()}
+
+    def __setstate__(self, state):
+        self._clear()
+        self._pending = state['items']
+
+    def _flush_pending(self):
+        """ Items restored by __setstate__ are indexed on first use.  During deepcopy
+        the items may not be fully constructed when __setstate__ runs.
+        """
+        pending = self.__dict__.pop('_pending', None)
+        if pending:
+            for item in pending:
+                self.append(item)
+
+    def to_list(self):
+        """ Returns:
+            list: Scene items in order.
+        """
+        return list(self._get_ordered())
+
+    def _get_ordered(self):
+        self._flush_pending()
+        if self._ordered is None:
+            self._ordered = list(self._items.values())
+        return self._ordered
+
+    def append(self, item):
+        """ Add a scene item at the end of the store.
+
+        Args:
+            item (:obj:`obj`): Scene item to add.
+        """
+        self._flush_pending()
+        seq = self._next_seq
+        self._next_seq += 1
+        self._items[seq] = item
+        self._ordered = None
+        self._seqs[id(item)] = seq
+        self._add_to_indexes(item, seq)
+
+    def replace(self, old_item, new_item):
+        """ Put new_item at the position of old_item.
+
+        Args:
+            old_item (:obj:`obj`): Scene item in the store.
+            new_item (:obj:`obj`): Scene item taking its place.
+        """
+        self._flush_pending()
+        seq = self._seqs.pop(id(old_item))
+        self._remove_from_indexes(old_item, seq)
+        # new_item may already be in the store at another position, keep one copy.
+        if id(new_item) in self._seqs:
+            self.remove(new_item)
+        self._items[seq] = new_item
+        self._ordered = None
+        self._seqs[id(new_item)] = seq
+        self._add_to_indexes(new_item, seq)
+
+    def remove(self, item):
+        """ Remove a scene item while keeping order of the remaining ones.
+
+        Args:
+            item (:obj:`obj`): Scene item to remove.
+
+        Raises:
+            ValueError: If item is not in the store.
+        """
+        self._flush_pending()
+        seq = self._seqs.pop(id(item), None)
+        if seq is None:
+            raise ValueError('{} is not in scene items.'.format(item))
+        self._remove_from_indexes(item, seq)
+        del self._items[seq]
+        self._ordered = None
+
+    def reindex(self, item):
+        """ Refresh the index keys of an item after its name or association changed.
+        Items not in the store are ignored.
+
+        Args:
+            item (:obj:`obj`): Scene item to refresh.
+
+        Returns:
+            str: The long name the item was stored under, None if it is not in the store.
+        """
+        self._flush_pending()
+        seq = self._seqs.get(id(item))
+        if seq is None:
+            return None
+        old_long_name = next(iter(self._keys[id(item)][LONG_NAME_INDEX]))
+        self._remove_from_indexes(item, seq)
+        self._add_to_indexes(item, seq)
+        return old_long_name
+
+    def reindex_all(self):
+        """ Refresh index keys of all items.
+        """
+        for item in self.to_list():
+            self.reindex(item)
+
+    def get_by_long_name(self, long_name):
+        """ Gets the last scene item in order with the given long name.
+
+        Args:
+            long_name (str): Long name to look for.
+
+        Returns:
+            obj: The scene item or None.
+        """
+        self._flush_pending()
+        bucket = self._indexes[LONG_NAME_INDEX].get(long_name)
+        if not bucket:
+            return None
+        return bucket[max(bucket)]
+
+    def get_all_by_long_name(self, long_name):
+        """ Gets the scene items with the given long name, in order.
+
+        Args:
+            long_name (str): Long name to look for.
+
+        Returns:
+            list: Scene items.
+        """
+        self._flush_pending()
+        return [self._items[seq] for seq in self._sorted_bucket(LONG_NAME_INDEX, long_name)]
+
+    def candidates(self, type_set=None, name_set=None, association_set=None):
+        """ Gets the scene items that may match the given exact-match filters, in order.
+        This only narrows down the search, callers still have to test each candidate
+        as the association filter depends on the Maya scene.
+
+        Args:
+            type_set (set, optional): Scene item types.
+            name_set (set, optional): Scene item short names.
+            association_set (set, optional): Long or short association names.
+
+        Returns:
+            list: Scene items, or None if no filter is given.
+        """
+        self._flush_pending()
+        lookups = []
+        if type_set:
+            lookups.append((TYPE_INDEX, type_set))
+        if name_set:
+            lookups.append((NAME_INDEX, name_set))
+        if association_set:
+            lookups.append((ASSOCIATION_INDEX, association_set))
+        if not lookups:
+            return None
+
+        # Fast path: a single bucket, we can use its cached order.
+        if len(lookups) == 1 and len(lookups[0][1]) == 1 and lookups[0][0] != ASSOCIATION_INDEX:
+            index_name, keys = lookups[0]
+            key = next(iter(keys))
+            return [self._items[seq] for seq in self._sorted_bucket(index_name, key)]
+
+        seqs = None
+        for index_name, keys in lookups:
+            found = set()
+            index = self._indexes[index_name]
+            for key in keys:
+                found.update(index.get(key, ()))
+            if index_name == ASSOCIATION_INDEX:
+                found.update(self._no_association)
+            seqs = found if seqs is None else seqs.intersection(found)
+            if not seqs:
+                return []
+        return [self._items[seq] for seq in sorted(seqs)]
+
+    def _sorted_bucket(self, index_name, key):
+        cache_key = (index_name, key)
+        seqs = self._sorted_buckets.get(cache_key)
+        if seqs is None:
+            seqs = sorted(self._indexes[index_name].get(key, ()))
+            self._sorted_buckets[cache_key] = seqs
+        return seqs
+
+    def _add_to_indexes(self, item, seq):
+        keys = _index_keys(item)
+        self._keys[id(item)] = keys
+        for index_name, index_keys in keys.items():
+            if index_keys is None:
+                continue
+            index = self._indexes[index_name]
+            for key in index_keys:
+                index[key][seq] = item
+                self._sorted_buckets.pop((index_name, key), None)
+        if keys[ASSOCIATION_INDEX] is None:
+            self._no_association[seq] = item
+
+    def _remove_from_indexes(self, item, seq):
+        keys = self._keys.pop(id(item), None)
+        if keys is None:
+            return
+        for index_name, index_keys in keys.items():
+            if index_keys is None:
+                continue
+            index = self._indexes[index_name]
+            for key in index_keys:
+                bucket = index.get(key)
+                if bucket is not None:
+                    bucket.pop(seq, None)
+                    if not bucket:
+                        del index[key]
+                self._sorted_buckets.pop((index_name, key), None)
+        self._no_association.pop(seq, None)
+
+
+def _index_keys(item):
+    """ Computes the index keys of a scene item.
+
+    Returns:
+        dict: index name -> set of keys.  Association is None for items without one.
+    """
+    keys = {
+        TYPE_INDEX: set([getattr(item, 'type', None)]),
+        NAME_INDEX: set([item.name]),
+        LONG_NAME_INDEX: set([item.long_name]),
+        ASSOCIATION_INDEX: None,
+    }
+    # Same test as used by Builder.get_scene_items() for association filters.
+    if hasattr(item, 'association'):
+        associations = set()
+        for name in item.long_association or []:
+            associations.add(name)
+            associations.add(get_short_name(name))
+        keys[ASSOCIATION_INDEX] = associations
+    return keys
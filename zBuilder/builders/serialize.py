@@ -1,31 +1,52 @@
-import inspect
+import array
+import copy
+import hashlib
+import io
 import zipfile
 import json
 import logging
 import os
 import sys
+import threading
 import time
+import zlib
 
 from maya import cmds
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 from zBuilder.utils.commonUtils import is_sequence, parse_version_info, time_this
 from zBuilder.utils.mayaUtils import get_short_name, construct_map_names
-from zBuilder.builders.builder import find_class
+from zBuilder.nodes.registry import find_class, get_node_classes
 from zBuilder import __version__
 
 logger = logging.getLogger(__name__)
-__file_version__ = 1
+__file_version__ = 2
+
+# Sidecar data type name -> array module typecode.
+# The typecodes are chosen by item size so the binary layout is the same on every platform.
+_ARRAY_TYPECODES = {
+    'float32': [tc for tc in 'f' if array.array(tc).itemsize == 4][0],
+    'float64': [tc for tc in 'd' if array.array(tc).itemsize == 8][0],
+    'int32': [tc for tc in 'ilh' if array.array(tc).itemsize == 4][0],
+}
+
+# Name of the table of contents member of a .zBuilder file.
+_TOC_NAME = 'toc.json'
+
+# Codecs of sharded .zBuilder files.
+CODECS = ['store', 'deflate', 'lzma']
 
 
 def _get_node_types_with_maps():
-    """ Searches through the modules for existing node type objects and 
-    returns the ones that have maps associated with it.
+    """ Searches through the registered node classes and
+    returns the types of the ones that have maps associated with it.
     Useful for performing actions on node types with maps.
     MAP_LIST is a class attr so it is not being instantiated here.
     """
     map_class_type_list = []
-    for _, obj in inspect.getmembers(sys.modules['zBuilder.nodes']):
-        if inspect.isclass(obj) and hasattr(obj, 'MAP_LIST') and obj.MAP_LIST:
+    for obj in get_node_classes():
+        if hasattr(obj, 'MAP_LIST') and obj.MAP_LIST:
             map_class_type_list.append(obj.type)
     return map_class_type_list
 
@@ -63,6 +84,8 @@ def _update_json_pre_1_0_11(json_object):
 class BaseNodeEncoder(json.JSONEncoder):
 
     def default(self, obj):
+        if isinstance(obj, _SceneItemSnapshot):
+            return obj.data
         if hasattr(obj, '_class'):
             if hasattr(obj, 'serialize'):
                 return obj.serialize()
@@ -107,6 +130,85 @@ def pack_zbuilder_contents(builder, type_filter, invert_match):
     return [info, node_data]
 
 
+class SharedArray(list):
+    """ A number array read from a sidecar, one object shared by all the scene items
+    referencing the sidecar.  It can not be changed in place, scene items replace
+    their values with a new list instead, e.g. ``list(values)``.
+    Copies of it are the same object, it is immutable.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Values read from a file are shared between scene items, '
+                        'replace them with a new list instead of changing them.')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = _read_only
+    if sys.version_info[0] == 2:
+        __setslice__ = __delslice__ = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce_ex__(self, protocol):
+        # Pickled as a plain list
+        return list, (list(self), )
+
+
+class _SceneItemSnapshot(object):
+    """ The serializable state of a scene item.
+
+    With copy_values it is copied so it can be written out while the scene item keeps
+    changing.  Without, it refers to the values of the scene item, which must not change
+    until it is written, and only the dict holding them is new.
+    """
+    __slots__ = ('data', 'array_attributes')
+
+    def __init__(self, item, copy_values=True):
+        # attribute name -> data type of the number arrays, see Base.ARRAY_ATTRIBUTES
+        self.array_attributes = dict(getattr(item, 'ARRAY_ATTRIBUTES', {}))
+        output = item.serialize() if hasattr(item, 'serialize') else item.__dict__
+        if not copy_values:
+            # Writing replaces the arrays in the dict by sidecar references,
+            # the scene item keeps its own.
+            self.data = dict(output)
+            return
+        self.data = {}
+        for key, value in output.items():
+            if isinstance(value, SharedArray):
+                # Read from a file, it can not change
+                pass
+            elif key in self.array_attributes and is_sequence(value):
+                # Number arrays are large, a copy of the lists is enough.
+                if value and is_sequence(value[0]):
+                    value = [list(row) for row in value]
+                else:
+                    value = list(value)
+            else:
+                value = copy.deepcopy(value)
+            self.data[key] = value
+
+
+def snapshot_zbuilder_contents(builder, type_filter, invert_match, copy_values=True):
+    """ Packages the data like pack_zbuilder_contents(), with the scene items replaced
+    by snapshots of their serializable state.  The snapshot does not refer to the builder
+    or the Maya scene, so it can be written out from another thread.
+
+    Args:
+        copy_values (bool): Copy the values of the scene items.  Without, the snapshot
+            shares them with the scene items and has to be written before they change.
+            Defaults to ``True``
+    """
+    contents = pack_zbuilder_contents(builder, type_filter, invert_match)
+    for d in contents:
+        if d['d_type'] == 'node_data':
+            d['data'] = [_SceneItemSnapshot(item, copy_values) for item in d['data']]
+    return contents
+
+
 def unpack_zbuilder_contents(builder, json_data):
     """ Gets data out of json serialization and assigns it to node collection
     object.
@@ -124,6 +226,7 @@ def unpack_zbuilder_contents(builder, json_data):
     for item in builder.scene_items:
         if item:
             item.builder = builder
+    builder._invalidate_parameter_cache()
 
 
 def load_base_node(json_object):
@@ -164,17 +267,31 @@ def _restore_scene_attributes(builder):
     Args:
         builder: builder object
     """
-    for scene_item in builder.get_scene_items():
+    scene_items = builder.get_scene_items()
+    # Scene items by name, looked up for all the attributes at once.
+    name_index = defaultdict(list)
+    for position, scene_item in enumerate(scene_items):
+        name_index[scene_item.name].append((position, scene_item))
+
+    for scene_item in scene_items:
         # loop through scene item attributes as defined by each scene item
         for attr in scene_item.SCENE_ITEM_ATTRIBUTES:
             if attr in scene_item.__dict__:
                 if scene_item.__dict__[attr]:
-                    restored = _replace_string_with_scene_items(builder, scene_item.__dict__[attr])
+                    restored = _replace_string_with_scene_items(name_index,
+                                                                scene_item.__dict__[attr])
                     scene_item.__dict__[attr] = restored
 
 
 @time_this
-def write(file_path, builder, type_filter=None, invert_match=False):
+def write(file_path,
+          builder,
+          type_filter=None,
+          invert_match=False,
+          shard_by=None,
+          codec='deflate',
+          level=None,
+          workers=None):
     """ Writes out the scene items to a json file given a file path.
 
     Args:
@@ -183,45 +300,801 @@ def write(file_path, builder, type_filter=None, invert_match=False):
         type_filter (list, optional): Types of scene items to write.
         invert_match (bool): Invert the sense of matching, to select non-matching items.
             Defaults to ``False``
+        shard_by (str or int, optional): Split the scene items into several json members,
+            compressed in parallel.  'solver', 'type' or the number of scene items per member.
+            Defaults to ``None``, a single json member.
+        codec (str): Compression of the file, one of CODECS.  Defaults to ``'deflate'``
+        level (int, optional): Compression level of the codec.
+        workers (int, optional): Threads compressing sharded members.
+            Defaults to the number of CPUs.
+    """
+    # Written before returning, the values of the scene items do not need copies.
+    contents = snapshot_zbuilder_contents(builder, type_filter, invert_match, copy_values=False)
+    _write_contents(file_path, contents, None, shard_by, codec, level, workers)
+
+    builder.stats()
+
+
+def write_async(file_path,
+                builder,
+                type_filter=None,
+                invert_match=False,
+                shard_by=None,
+                codec='deflate',
+                level=None,
+                workers=None):
+    """ Writes out the scene items to a file given a file path, in a background thread.
+    The scene items are copied before this returns, the builder and the Maya scene
+    can be changed while the file is written.
+
+    Args:
+        file_path (str): The file path to write to disk.
+        builder: builder object
+        type_filter (list, optional): Types of scene items to write.
+        invert_match (bool): Invert the sense of matching, to select non-matching items.
+            Defaults to ``False``
+        shard_by, codec, level, workers: See write().
+
+    Returns:
+        WriteHandle: To follow progress and wait for completion of the write.
+    """
+    _get_codec(codec, level)  # Fail on the calling thread for an unknown codec.
+    contents = snapshot_zbuilder_contents(builder, type_filter, invert_match)
+    handle = WriteHandle(file_path, contents, shard_by, codec, level, workers)
+    handle.start()
+
+    builder.stats()
+    return handle
+
+
+class WriteHandle(object):
+    """ Handle of a write running in a background thread, as started by write_async().
+    """
+
+    def __init__(self,
+                 file_path,
+                 contents,
+                 shard_by=None,
+                 codec='deflate',
+                 level=None,
+                 workers=None):
+        self.file_path = file_path
+        self._contents = contents
+        self._options = (shard_by, codec, level, workers)
+        # Each scene item is visited once for its arrays and once for its json.
+        self._total = 2 * sum(len(d['data']) for d in contents if d['d_type'] == 'node_data')
+        self._count = 0
+        self._exception = None
+        # Not a daemon thread, so quitting Maya waits for the file to be complete.
+        self._thread = threading.Thread(target=self._run, name='zBuilder write')
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        try:
+            _write_contents(self.file_path, self._contents, self._advance, *self._options)
+        except Exception as e:
+            logger.exception('Failed to write file: {}'.format(self.file_path))
+            self._exception = e
+        finally:
+            self._contents = None
+
+    def _advance(self):
+        self._count += 1
+
+    def progress(self):
+        """ Returns:
+            float: Fraction of the work done, from 0.0 to 1.0.
+        """
+        if self.done():
+            return 1.0
+        if not self._total:
+            return 0.0
+        return min(float(self._count) / self._total, 1.0)
+
+    def done(self):
+        """ Returns:
+            bool: True if the write has finished, successfully or not.
+        """
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """ Waits for the write to finish.
+
+        Args:
+            timeout (float, optional): Seconds to wait at most. Waits until done by default.
+
+        Returns:
+            bool: True if the write has finished.
+        """
+        self._thread.join(timeout)
+        return self.done()
+
+    def exception(self, timeout=None):
+        """ Waits for the write to finish and returns the exception it raised.
+
+        Returns:
+            Exception: The exception, or None if the file was written.
+        """
+        if not self.wait(timeout):
+            raise RuntimeError('Writing {} is not done.'.format(self.file_path))
+        return self._exception
+
+    def result(self, timeout=None):
+        """ Waits for the write to finish and raises its exception if it failed.
+
+        Returns:
+            str: The file path written.
+        """
+        exception = self.exception(timeout)
+        if exception is not None:
+            raise exception
+        return self.file_path
+
+
+def _write_contents(file_path,
+                    contents,
+                    progress=None,
+                    shard_by=None,
+                    codec='deflate',
+                    level=None,
+                    workers=None):
+    """ Writes packaged scene item snapshots to a file.
+    This does not use the builder or the Maya scene.
+
+    Args:
+        file_path (str): The file path to write to disk.
+        contents (list): Data from snapshot_zbuilder_contents().
+        progress (function, optional): Called once per scene item and per step of the write.
+        shard_by, codec, level, workers: See write().
     """
     tmp_path, _ = os.path.splitext(file_path)
     json_file = tmp_path + ".json"
-    with zipfile.ZipFile(file_path, mode="w") as archive:
-        with open(json_file, 'w') as outfile:
-            json.dump(pack_zbuilder_contents(builder, type_filter, invert_match),
-                      outfile,
-                      cls=BaseNodeEncoder,
-                      sort_keys=True)
-        archive.write(json_file,
-                      arcname=os.path.basename(json_file),
-                      compress_type=zipfile.ZIP_DEFLATED)
+    if shard_by is None:
+        compression, kwargs = _get_zip_compression(codec, level)
+        with zipfile.ZipFile(file_path, mode="w", compression=compression, **kwargs) as archive:
+            _write_array_sidecars(archive, contents, progress)
+            _write_json_to_archive(archive, os.path.basename(json_file), contents, progress)
+            logger.info('Wrote File: %s' % file_path)
+        return
+
+    with zipfile.ZipFile(file_path, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        writer = _MemberWriter(archive, codec, level, workers)
+        try:
+            _write_array_sidecars(archive, contents, progress, writer)
+            _write_json_shards(archive, os.path.basename(json_file), contents, shard_by, writer,
+                               progress)
+        finally:
+            writer.close()
         logger.info('Wrote File: %s' % file_path)
-    os.remove(json_file)
 
-    builder.stats()
-    # loop through the scene items
-    _restore_scene_attributes(builder)
+
+def _get_codec(codec, level=None):
+    """ Gets the functions of a codec.
+
+    Args:
+        codec (str): One of CODECS.
+        level (int, optional): Compression level, the codec default if ``None``.
+
+    Returns:
+        tuple: compress and decompress functions, both take and return bytes.
+    """
+    if codec == 'store':
+        return (lambda data: data), (lambda data: data)
+    if codec == 'deflate':
+        level = zlib.Z_DEFAULT_COMPRESSION if level is None else level
+        return (lambda data: zlib.compress(data, level)), zlib.decompress
+    if codec == 'lzma':
+        try:
+            import lzma
+        except ImportError:
+            raise ValueError('The lzma codec is not available with this version of Python.')
+        return (lambda data: lzma.compress(data, preset=level)), lzma.decompress
+    raise ValueError('Unknown codec: {}, expected one of {}'.format(codec, CODECS))
+
+
+def _get_zip_compression(codec, level=None):
+    """ Gets the zip file compression for a codec, for files that are not sharded.
+
+    Returns:
+        tuple: zipfile compression and the other zipfile.ZipFile keyword arguments.
+    """
+    _get_codec(codec, level)
+    compression = {
+        'store': zipfile.ZIP_STORED,
+        'deflate': zipfile.ZIP_DEFLATED,
+        'lzma': getattr(zipfile, 'ZIP_LZMA', None),
+    }[codec]
+    kwargs = {}
+    # compresslevel is only supported since Python 3.7
+    if level is not None and sys.version_info >= (3, 7):
+        kwargs['compresslevel'] = level
+    return compression, kwargs
+
+
+class _MemberWriter(object):
+    """ Writes archive members compressed with a codec by a pool of threads.
+    The members are compressed in batches and stored as they are in the archive.
+    zlib and lzma release the GIL while compressing, so the threads use several CPUs.
+    """
+
+    def __init__(self, archive, codec='deflate', level=None, workers=None):
+        self.archive = archive
+        self.codec = codec
+        self._compress = _get_codec(codec, level)[0]
+        workers = workers or cpu_count()
+        self._pool = ThreadPool(workers)
+        self._batch_size = 2 * workers
+        self._pending = []
+
+    def write(self, arcname, data):
+        """ Adds a member to the archive.
+
+        Args:
+            arcname (str): Name of the member.
+            data (bytes): Uncompressed data of the member.
+        """
+        self._pending.append((arcname, data))
+        if len(self._pending) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """ Compresses and writes the members added so far.
+        """
+        if not self._pending:
+            return
+        names = [x[0] for x in self._pending]
+        compressed = self._pool.map(self._compress, [x[1] for x in self._pending])
+        self._pending = []
+        for arcname, data in zip(names, compressed):
+            self.archive.writestr(arcname, data, zipfile.ZIP_STORED)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._pool.close()
+            self._pool.join()
+
+
+def _read_members(archive, arcnames, codec, workers=None):
+    """ Reads and decompresses archive members written by _MemberWriter.
+    Members are read in batches and decompressed by a pool of threads.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for reading.
+        arcnames (list): Names of the members.
+        codec (str): Codec the members are compressed with.
+        workers (int, optional): Number of threads, defaults to the number of CPUs.
+
+    Returns:
+        generator: Uncompressed data of the members, in the order of arcnames.
+    """
+    decompress = _get_codec(codec)[1]
+    workers = workers or cpu_count()
+    pool = ThreadPool(workers)
+    try:
+        batch_size = 2 * workers
+        for i in range(0, len(arcnames), batch_size):
+            batch = [archive.read(x) for x in arcnames[i:i + batch_size]]
+            for data in pool.map(decompress, batch):
+                yield data
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _shard_scene_items(items, shard_by):
+    """ Splits scene items into shards.
+
+    Args:
+        items (list): Scene item snapshots.
+        shard_by (str or int): 'solver', 'type' or the number of scene items per shard.
+            Splitting by solver keeps the scene items without solver, e.g. maps and meshes,
+            with the scene item before them.
+
+    Returns:
+        list: The shards, each a list of scene item indexes in scene item order.
+    """
+    if shard_by not in ('solver', 'type'):
+        size = int(shard_by)
+        if size < 1:
+            raise ValueError('Expected a positive number of scene items per shard.')
+        return [list(range(i, min(i + size, len(items)))) for i in range(0, len(items), size)]
+
+    shards = OrderedDict()
+    key = None
+    for i, item in enumerate(items):
+        if shard_by == 'type':
+            key = item.data.get('type')
+        elif item.data.get('solver'):
+            key = item.data['solver']
+        shards.setdefault(key, []).append(i)
+    return list(shards.values())
+
+
+def _pack_array(values, dtype):
+    """ Packs a list of numbers, or a list of equally sized lists of numbers,
+    into little-endian binary data.
+
+    Returns:
+        tuple: Binary data and shape of values, or None if values can not be packed.
+    """
+    if values and is_sequence(values[0]):
+        width = len(values[0])
+        if any(len(row) != width for row in values):
+            return None
+        shape = [len(values), width]
+        flat = [x for row in values for x in row]
+    else:
+        shape = [len(values)]
+        flat = values
+    try:
+        packed = array.array(_ARRAY_TYPECODES[dtype], flat)
+    except (TypeError, OverflowError):
+        return None
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    data = packed.tobytes() if hasattr(packed, 'tobytes') else packed.tostring()
+    return data, shape
+
+
+def _unpack_array(data, dtype, shape):
+    """ Unpacks binary data written by _pack_array() into a SharedArray of given shape,
+    the rows of 2D arrays are SharedArrays too.
+    """
+    values = array.array(_ARRAY_TYPECODES[dtype])
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    # tolist() converts all the values at once, the rest of zBuilder works with lists.
+    values = values.tolist()
+    if len(shape) == 2:
+        width = shape[1]
+        values = [SharedArray(values[i:i + width]) for i in range(0, len(values), width)]
+    return SharedArray(values)
+
+
+def _write_array_sidecars(archive, contents, progress=None, writer=None):
+    """ Writes the large number arrays of scene items, e.g. map values and mesh points,
+    as binary members of the archive.  Arrays are declared by ARRAY_ATTRIBUTES of a scene item.
+    The arrays in the snapshots are replaced by references to the members.
+
+    Members are named by the hash of their data, so identical arrays, e.g. maps of all ones
+    or the same mesh in several solvers, are stored once and referenced by each scene item.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for writing.
+        contents (list): Data from snapshot_zbuilder_contents().
+        progress (function, optional): Called once per scene item.
+        writer (_MemberWriter, optional): Writes the members with its codec.
+    """
+    written = set()
+    for d in contents:
+        if d['d_type'] != 'node_data':
+            continue
+        for item in d['data']:
+            for attr, dtype in item.array_attributes.items():
+                values = item.data.get(attr)
+                if not values or not is_sequence(values):
+                    continue
+                packed = _pack_array(values, dtype)
+                if packed is None:
+                    continue
+                data, shape = packed
+                arcname = 'arrays/{}.bin'.format(hashlib.sha256(data).hexdigest())
+                item.data[attr] = {'_array': arcname, 'dtype': dtype, 'shape': shape}
+                if writer is not None:
+                    item.data[attr]['codec'] = writer.codec
+                if arcname in written:
+                    continue
+                written.add(arcname)
+                if writer is None:
+                    archive.writestr(arcname, data)
+                else:
+                    writer.write(arcname, data)
+            if progress:
+                progress()
+
+
+def _make_object_hook(archive, arrays=None):
+    """ Makes the json object hook for reading an archive.
+    Sidecar references are replaced by the arrays they point to,
+    everything else goes through load_base_node().
+    A sidecar is decoded once, all the references to it get the same SharedArray.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for reading.
+        arrays (dict, optional): member name -> uncompressed data of sidecars read already.
+    """
+    # (member name, dtype, shape) -> SharedArray
+    decoded = {}
+
+    def object_hook(json_object):
+        if '_array' in json_object and '_class' not in json_object:
+            arcname = json_object['_array']
+            key = (arcname, json_object['dtype'], tuple(json_object['shape']))
+            if key not in decoded:
+                if arrays and arcname in arrays:
+                    data = arrays[arcname]
+                else:
+                    data = archive.read(arcname)
+                    if 'codec' in json_object:
+                        data = _get_codec(json_object['codec'])[1](data)
+                decoded[key] = _unpack_array(data, json_object['dtype'], json_object['shape'])
+            return decoded[key]
+        return load_base_node(json_object)
+
+    return object_hook
+
+
+class _PositionWriter(object):
+    """ Passes json text to a write function and counts the bytes written.
+    """
+
+    def __init__(self, write):
+        self._write = write
+        self.position = 0
+
+    def __call__(self, text):
+        self._write(text)
+        self.position += len(text)
+
+
+def _encode_scene_items(encoder, items, write, progress=None):
+    """ Encodes scene item snapshots one by one as the items of a json list.
+
+    Args:
+        encoder (BaseNodeEncoder): The json encoder.
+        items (list): Scene item snapshots.
+        write (_PositionWriter): Receives the json text.
+        progress (function, optional): Called once per scene item.
+
+    Returns:
+        list: Table of contents entries of the scene items, see _make_toc_entry().
+    """
+    # With ensure_ascii every character of the json text is one byte in the file.
+    assert encoder.ensure_ascii
+    toc_entries = []
+    for j, item in enumerate(items):
+        if j:
+            write(', ')
+        start = write.position
+        for chunk in encoder.iterencode(item.data):
+            write(chunk)
+        toc_entries.append(_make_toc_entry(item.data, start, write.position))
+        if progress:
+            progress()
+    return toc_entries
+
+
+def _encode_contents(contents, write, progress=None):
+    """ Encodes the data from pack_zbuilder_contents() as json and passes it to write()
+    piece by piece.  Each scene item is encoded on its own so the position of its json
+    in the output can be recorded in the table of contents.
+
+    Args:
+        contents (list): Data from snapshot_zbuilder_contents().
+        write (function): Called with each piece of json text.
+        progress (function, optional): Called once per scene item.
+
+    Returns:
+        list: Table of contents entries of the scene items, see _make_toc_entry().
+    """
+    encoder = BaseNodeEncoder(sort_keys=True)
+    write_text = _PositionWriter(write)
+
+    toc_entries = []
+    write_text('[')
+    for i, d in enumerate(contents):
+        if i:
+            write_text(', ')
+        if d['d_type'] != 'node_data':
+            write_text(encoder.encode(d))
+            continue
+        write_text('{"d_type": "node_data", "data": [')
+        toc_entries.extend(_encode_scene_items(encoder, d['data'], write_text, progress))
+        write_text(']}')
+    write_text(']')
+    return toc_entries
+
+
+def _write_json_shards(archive, arcname, contents, shard_by, writer, progress=None):
+    """ Encodes the scene items as json into several members of the archive.
+    The json member only lists the members and the position of their scene items,
+    the table of contents records the member of each scene item.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for writing.
+        arcname (str): Name of the json member in the archive.
+        contents (list): Data from snapshot_zbuilder_contents().
+        shard_by (str or int): See _shard_scene_items().
+        writer (_MemberWriter): Compresses and writes the members.
+        progress (function, optional): Called once per scene item.
+    """
+    encoder = BaseNodeEncoder(sort_keys=True)
+    main_data = []
+    toc_entries = []
+    for d in contents:
+        if d['d_type'] != 'node_data':
+            main_data.append(d)
+            continue
+        items = d['data']
+        shards = []
+        item_entries = [None] * len(items)
+        for indexes in _shard_scene_items(items, shard_by):
+            member = 'scene_items/{:06d}.json'.format(len(shards))
+            pieces = []
+            write_text = _PositionWriter(pieces.append)
+            write_text('[')
+            entries = _encode_scene_items(encoder, [items[x] for x in indexes], write_text,
+                                          progress)
+            write_text(']')
+            writer.write(member, ''.join(pieces).encode('utf-8'))
+            for index, entry in zip(indexes, entries):
+                entry['member'] = member
+                item_entries[index] = entry
+            shards.append({'member': member, 'positions': indexes})
+        writer.flush()
+        main_data.append({
+            'd_type': 'node_data_shards',
+            'data': {
+                'codec': writer.codec,
+                'shards': shards,
+                'count': len(items)
+            }
+        })
+        toc_entries.extend(item_entries)
+
+    archive.writestr(arcname, json.dumps(main_data, cls=BaseNodeEncoder, sort_keys=True))
+    toc = {'json': arcname, 'codec': writer.codec, 'scene_items': toc_entries}
+    archive.writestr(_TOC_NAME, json.dumps(toc, sort_keys=True))
+
+
+def _read_json_shards(archive, json_data, object_hook, workers=None):
+    """ Replaces the shard lists of json data by the scene items decoded from the shards,
+    in their original order.
+
+    Returns:
+        list: json data in the layout of a file that is not sharded.
+    """
+    result = []
+    for d in json_data:
+        if d['d_type'] != 'node_data_shards':
+            result.append(d)
+            continue
+        shards = d['data']['shards']
+        items = [None] * d['data']['count']
+        members = _read_members(archive, [x['member'] for x in shards], d['data']['codec'],
+                                workers)
+        for shard, data in zip(shards, members):
+            decoded = json.loads(data.decode('utf-8'), object_hook=object_hook)
+            for position, item in zip(shard['positions'], decoded):
+                items[position] = item
+        result.append({'d_type': 'node_data', 'data': items})
+    return result
+
+
+def _read_sidecars(archive, codec, workers=None):
+    """ Reads and decompresses all the array sidecars of a sharded file in parallel.
+
+    Returns:
+        dict: member name -> uncompressed data.
+    """
+    arcnames = [x for x in archive.namelist() if x.startswith('arrays/')]
+    return dict(zip(arcnames, _read_members(archive, arcnames, codec, workers)))
+
+
+def _write_json_to_archive(archive, arcname, data, progress=None):
+    """ Encodes data as json straight into a zip archive member.
+    The encoder output is compressed chunk by chunk as it is produced, so no temporary
+    json file is written to disk and the full json string is never held in memory.
+    Python 2 cannot write to a zip member as a stream, there the json string is built
+    in memory and added to the archive without touching disk.
+
+    A table of contents of the scene items is written next to the json,
+    it lets read() decode only the scene items it is asked for.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for writing.
+        arcname (str): Name of the json member in the archive.
+        data: Data from snapshot_zbuilder_contents().
+        progress (function, optional): Called once per scene item.
+    """
+    if sys.version_info < (3, 6):
+        pieces = []
+        toc_entries = _encode_contents(data, pieces.append, progress)
+        archive.writestr(arcname, ''.join(pieces))
+    else:
+        # force_zip64 as the size of the member is unknown until it is written.
+        with archive.open(arcname, mode='w', force_zip64=True) as member:
+            with io.TextIOWrapper(member, encoding='utf-8') as outfile:
+                toc_entries = _encode_contents(data, outfile.write, progress)
+
+    toc = {'json': arcname, 'scene_items': toc_entries}
+    archive.writestr(_TOC_NAME, json.dumps(toc, sort_keys=True))
+
+
+def _make_toc_entry(data, start, end):
+    """ Table of contents entry of a scene item.
+
+    Args:
+        data (dict): The serialized scene item.
+        start (int): Offset of the scene item json in the json member.
+        end (int): Offset of the end of the scene item json.
+
+    Returns:
+        dict: type, short name, long associations, parameter names
+        and the byte range of the scene item.
+    """
+    parameters = {}
+    for parameter_type, parameter_items in (data.get('parameters') or {}).items():
+        parameters[parameter_type] = [getattr(x, 'name', x) for x in parameter_items]
+    name = data.get('_name')
+    return {
+        'type': data.get('type'),
+        'name': get_short_name(name) if name else None,
+        'association': data.get('_association'),
+        'parameters': parameters,
+        'range': [start, end],
+    }
+
+
+def _select_toc_entries(toc_entries, type_filter=None, name_filter=None, association_filter=None):
+    """ Selects the table of contents entries matching the filters,
+    together with the entries of the parameters they reference.
+    Unlike Builder.get_scene_items(), scene items without association do not pass
+    an association filter, they are only selected as a parameter of a selected item.
+
+    Returns:
+        list: The selected entries in scene item order.
+    """
+
+    def to_set(filter_):
+        if not filter_:
+            return None
+        return set(filter_) if is_sequence(filter_) else set([filter_])
+
+    type_set = to_set(type_filter)
+    name_set = to_set(name_filter)
+    association_set = to_set(association_filter)
+
+    def keep_me(entry):
+        if type_set and entry['type'] not in type_set:
+            return False
+        if name_set and entry['name'] not in name_set:
+            return False
+        if association_set:
+            associations = set()
+            for name in entry['association'] or []:
+                associations.add(name)
+                associations.add(get_short_name(name))
+            if association_set.isdisjoint(associations):
+                return False
+        return True
+
+    selected = set()
+    parameters = set()
+    for i, entry in enumerate(toc_entries):
+        if keep_me(entry):
+            selected.add(i)
+            for parameter_type, names in entry['parameters'].items():
+                parameters.update((parameter_type, name) for name in names)
+
+    return [
+        entry for i, entry in enumerate(toc_entries)
+        if i in selected or (entry['type'], entry['name']) in parameters
+    ]
+
+
+def _read_toc(archive):
+    """ Returns:
+        dict: The table of contents of the archive, None for files written without one.
+    """
+    if _TOC_NAME not in archive.namelist():
+        return None
+    return json.loads(archive.read(_TOC_NAME).decode('utf-8'))
+
+
+def _read_toc_scene_items(archive, toc, toc_entries, object_hook, workers=None):
+    """ Decodes the json of the given scene items only.
+    A json member is read in a single pass, the text in between scene items is skipped
+    without being parsed.  Of a sharded file only the members holding the scene items
+    are read.
+
+    Returns:
+        list: The scene items, in scene item order.
+    """
+    # json member -> entries of the scene items in it
+    members = OrderedDict()
+    for position, entry in enumerate(toc_entries):
+        members.setdefault(entry.get('member', toc['json']), []).append((position, entry))
+
+    scene_items = [None] * len(toc_entries)
+    sharded = [x for x in members if x != toc['json']]
+    if sharded:
+        for arcname, data in zip(sharded, _read_members(archive, sharded, toc['codec'],
+                                                        workers)):
+            for position, entry in members[arcname]:
+                start, end = entry['range']
+                scene_items[position] = json.loads(data[start:end].decode('utf-8'),
+                                                   object_hook=object_hook)
+
+    if toc['json'] not in members:
+        return scene_items
+    with archive.open(toc['json']) as member:
+        position = 0
+        for index, entry in sorted(members[toc['json']], key=lambda x: x[1]['range'][0]):
+            start, end = entry['range']
+            while position < start:
+                skipped = member.read(min(start - position, 1 << 20))
+                if not skipped:
+                    break
+                position += len(skipped)
+            text = member.read(end - start)
+            position = end
+            scene_items[index] = json.loads(text.decode('utf-8'), object_hook=object_hook)
+    return scene_items
 
 
 @time_this
-def read(file_path, builder):
+def read(file_path,
+         builder,
+         type_filter=None,
+         name_filter=None,
+         association_filter=None,
+         workers=None):
     """ Reads scene items from a given file.
+    When filters are given only the matching scene items and the parameters they
+    reference are read.  Files with a table of contents only decode those scene items.
 
     Args:
         file_path (:obj:`str`): The file path to read from disk.
         builder: builder object
+        type_filter (:obj:`str` or :obj:`list`, optional): filter by scene_item ``type``.
+            Defaults to ``None``.
+        name_filter (:obj:`str` or :obj:`list`, optional): filter by scene_item ``name``.
+            Defaults to ``None``.
+        association_filter (:obj:`str` or :obj:`list`, optional): filter by scene_item
+            ``association``.  Defaults to ``None``.
+        workers (int, optional): Threads decompressing the members of sharded files.
+            Defaults to the number of CPUs.
     """
     logger.info('Reading from file: %s' % file_path)
+    filters = (type_filter, name_filter, association_filter)
+    toc = None
     if zipfile.is_zipfile(file_path):
         with zipfile.ZipFile(file_path, "r") as archive:
-            tmp_path, _ = os.path.splitext(file_path)
-            json_file = tmp_path + ".json"
-            with archive.open(os.path.basename(json_file)) as file:
-                unpack_zbuilder_contents(builder, json.loads(file.read(),
-                                                             object_hook=load_base_node))
+            toc = _read_toc(archive)
+            if toc is not None and any(filters):
+                toc_entries = _select_toc_entries(toc['scene_items'], *filters)
+                scene_items = _read_toc_scene_items(archive, toc, toc_entries,
+                                                    _make_object_hook(archive), workers)
+                json_data = [{'d_type': 'node_data', 'data': scene_items}]
+            else:
+                arrays = None
+                if toc is not None and 'codec' in toc:
+                    # Sharded file, the array sidecars are decompressed in parallel up front.
+                    arrays = _read_sidecars(archive, toc['codec'], workers)
+                object_hook = _make_object_hook(archive, arrays)
+                tmp_path, _ = os.path.splitext(file_path)
+                json_file = tmp_path + ".json"
+                with archive.open(os.path.basename(json_file)) as file:
+                    json_data = json.loads(file.read(), object_hook=object_hook)
+                json_data = _read_json_shards(archive, json_data, object_hook, workers)
     else:
         with open(file_path, 'r') as handle:
-            unpack_zbuilder_contents(builder, json.load(handle, object_hook=load_base_node))
+            json_data = json.load(handle, object_hook=load_base_node)
+
+    if any(filters) and toc is None:
+        # Files without table of contents are decoded in full, then filtered.
+        json_data = _filter_json_data(json_data, *filters)
+
+    unpack_zbuilder_contents(builder, json_data)
 
     # The json data is now loaded.  We need to loop through the defined scene item attributes
     # and replace the string name with the proper scene item.
@@ -230,41 +1103,69 @@ def read(file_path, builder):
     builder.stats()
 
 
-def _replace_string_with_scene_items(builder, item):
-    """ This method taked a zBuilder object and a scene item. For each scene item
-    attribute it replaces the string name with the proper scene item.
+def _filter_json_data(json_data, type_filter=None, name_filter=None, association_filter=None):
+    """ Keeps the scene items matching the filters in fully decoded json data,
+    the same selection as a read through the table of contents.
+    """
+    filtered = []
+    for d in json_data:
+        if d['d_type'] == 'node_data':
+            toc_entries = [
+                _make_toc_entry(getattr(item, '__dict__', item), i, i)
+                for i, item in enumerate(d['data'])
+            ]
+            selected = _select_toc_entries(toc_entries, type_filter, name_filter,
+                                           association_filter)
+            d = {'d_type': 'node_data', 'data': [d['data'][x['range'][0]] for x in selected]}
+        filtered.append(d)
+    return filtered
+
+
+def _replace_string_with_scene_items(name_index, item):
+    """ This method takes a scene item attribute value and replaces the string names
+    with the proper scene items.
     Args:
-        builder: builder object
-        item: scene item
+        name_index (dict): scene item name -> list of (position, scene item),
+            as built by _restore_scene_attributes()
+        item: scene item attribute value
     """
+
+    def find_scene_items(names):
+        # Scene items with any of the names, in scene item order.
+        found = {}
+        for name in names:
+            for position, scene_item in name_index.get(name, []):
+                found[position] = scene_item
+        return [found[position] for position in sorted(found)]
+
     if is_sequence(item):
         if item:
-            item = builder.get_scene_items(name_filter=item)
+            item = find_scene_items(item)
     elif isinstance(item, dict):
         for parm in item:
-            item[parm] = builder.get_scene_items(name_filter=item[parm])
+            item[parm] = find_scene_items(item[parm])
     else:
-        item = builder.get_scene_items(name_filter=item)
+        item = find_scene_items([item])
         if item:
             item = item[0]
     return item
 
 
 def replace_scene_items_with_string(item):
-    """ This method takes a scene item, and replaces each instance with an embedded scene item
-    with the scene item's name. The reason for this is, scene items are not serializable by
-    themselves. This enables us to "re-apply" the item after it has been loaded from disk.
+    """ This method takes a scene item attribute value, and returns a copy of it with each
+    embedded scene item replaced by the scene item's name. The reason for this is, scene items
+    are not serializable by themselves. This enables us to "re-apply" the item after it has
+    been loaded from disk.  The given value is not modified.
 
     Args:
          item: scene item
     """
     if is_sequence(item):
-        item = [x.name for x in item]
+        item = [getattr(x, 'name', x) for x in item]
     elif isinstance(item, dict):
-        for key in item:
-            item[key] = [x.name for x in item[key]]
+        item = dict((key, [getattr(x, 'name', x) for x in value]) for key, value in item.items())
     else:
         if item:
-            item = item.name
+            item = getattr(item, 'name', item)
 
     return item
@@ -3,18 +3,17 @@ import zBuilder.utils.vfxUtils as vfx_util
 
 from collections import defaultdict, OrderedDict
 from maya import cmds
-from zBuilder.utils.mayaUtils import get_type, is_type, FIELD_TYPES
+from zBuilder.utils.mayaUtils import cache_scene_queries, get_type, is_type, FIELD_TYPES
 from zBuilder.utils.commonUtils import none_to_empty, time_this
-from zBuilder.utils.solverDisabler import SolverDisabler
+from .build_order import get_build_levels, get_build_order
+from .build_plan import BuildPlan, BuildStage, BuildStep
 from .builder import Builder
+from .scene_graph import ZivaSceneGraph
 
 logger = logging.getLogger(__name__)
 
-# This is order that the Ziva nodes get retrieved and built.
-# We need to have solver first then the bodies.
-# After that the order is not so crutial.
-# This is an uncomplete list as of now.
-# Some nodes get added on after, that will be changed in VFXACT-578
+# The Ziva node types zQuery knows how to find.
+# The order they get retrieved and built in is declared in build_order.NODE_DEPENDENCIES.
 ZNODES = [
     'zSolver',
     'zSolverTransform',
@@ -122,6 +121,35 @@ def _zQuery(types, solver):
     return return_value
 
 
+def _get_solver_nodes(solver):
+    """ Gets the nodes of a solver that get retrieved, in build order.
+
+    Args:
+        solver (str): The zSolver.
+
+    Returns:
+        list of str
+    """
+    node_types = [
+        'zSolverTransform',
+        'zBone',
+        'zTet',
+        'zTissue',
+        'zCloth',
+        'zMaterial',
+        'zAttachment',
+        'zFiber',
+        'zEmbedder',
+        'zLineOfAction',
+        'zFieldAdaptor',
+        'zRivetToBone',
+        'zRestShape',
+    ]
+
+    node_types.extend(FIELD_TYPES)
+    return _zQuery(get_build_order(node_types), solver)
+
+
 class Ziva(Builder):
     """To capture a Ziva rig.
     """
@@ -130,6 +158,10 @@ class Ziva(Builder):
         super(Ziva, self).__init__()
 
         self.geo = {}
+        # Snapshot of the solver being retrieved, read by populate().
+        # It is only set while retrieve_from_scene() or retrieve_connections() runs,
+        # see ZivaSceneGraph.
+        self.scene_graph = None
 
     def setup_tree_hierarchy(self):
         """Sets up hierarchy for a tree view.  This will look at items and assign the proper 
@@ -266,8 +298,15 @@ class Ziva(Builder):
         nodes = cmds.zQuery(a=True, l=True)
 
         if nodes:
+            graph = self.scene_graph or ()
+
             # find zFiber---------------------------------------------
             fiber_names = [x for x in nodes if is_type(x, 'zFiber')]
+            for fiber_name in [x for x in fiber_names if x in graph]:
+                line_of_action = graph.get_fiber_line_of_action(fiber_name)
+                if line_of_action:
+                    nodes.append(line_of_action)
+            fiber_names = [x for x in fiber_names if x not in graph]
             if fiber_names:
                 # find line of action----------------------------------------
                 line_of_actions = cmds.listHistory(fiber_names)
@@ -277,7 +316,12 @@ class Ziva(Builder):
             tet_names = [x for x in nodes if is_type(x, 'zTet')]
             for tet_name in tet_names:
                 # find the rest shape--------------------------------------
-                rest_shape = cmds.listConnections('{}.oGeo'.format(tet_name), type='zRestShape')
+                if tet_name in graph:
+                    rest_shape = graph.get_rest_shape(tet_name)
+                    rest_shape = [rest_shape] if rest_shape else []
+                else:
+                    rest_shape = cmds.listConnections('{}.oGeo'.format(tet_name),
+                                                      type='zRestShape')
                 if rest_shape:
                     nodes.extend(rest_shape)
 
@@ -286,24 +330,51 @@ class Ziva(Builder):
             return []
 
     @time_this
+    @cache_scene_queries
     def retrieve_connections(self):
         """ This retrieves the scene items from the scene based on connections to
         selection and does not get parameters for speed.  This is main call to 
         check scene for loading into a ui.
+
+        The connections come from a ZivaSceneGraph of the solver of the selection,
+        the nodes of other solvers are queried one by one.
         """
         scene_selection = cmds.ls(sl=True, l=True)
         selection = transform_rivet_and_LoA_into_tissue_meshes(scene_selection)
 
+        cmds.select(selection)
+        solver = cmds.zQuery(t='zSolver', l=True)
+        if solver:
+            self.scene_graph = ZivaSceneGraph(solver[0], _get_solver_nodes(solver[0]))
+        try:
+            self.__retrieve_connections(selection)
+        finally:
+            # The snapshot goes stale as soon as the scene changes
+            self.scene_graph = None
+            cmds.select(scene_selection)
+
+        self.stats()
+        self.make_node_connections()
+
+    def __retrieve_connections(self, selection):
+        """ Populates the nodes connected to the selection for retrieve_connections().
+        """
+        graph = self.scene_graph or ()
+
         nodes = []
         nodes.extend(self.__add_bodies(selection))
 
         # find attahment source and or targets to add to nodes.................
         attachment_names = [x for x in nodes if is_type(x, 'zAttachment')]
         meshes = []
-        if attachment_names:
-            for attachment in attachment_names:
-                meshes.extend(cmds.zQuery(attachment, attachmentSource=True, l=True))
-                meshes.extend(cmds.zQuery(attachment, attachmentSource=True, l=True))
+        for attachment in attachment_names:
+            if attachment in graph:
+                meshes.extend(graph.get_attachment_meshes(attachment) or [])
+            else:
+                meshes.extend(none_to_empty(
+                    cmds.zQuery(attachment, attachmentSource=True, l=True)))
+                meshes.extend(none_to_empty(
+                    cmds.zQuery(attachment, attachmentTarget=True, l=True)))
 
         if meshes:
             nodes.extend(self.__add_bodies(meshes))
@@ -313,12 +384,18 @@ class Ziva(Builder):
 
         children = []
         for tissue in tissue_names:
-            children.extend(none_to_empty(cmds.listConnections(tissue + '.oChildTissue')))
+            if tissue in graph:
+                children.extend(graph.get_tissue_children(tissue))
+            else:
+                children.extend(none_to_empty(cmds.listConnections(tissue + '.oChildTissue')))
 
         if children:
             nodes.extend(self.__add_bodies(children))
 
         body_names = [x for x in nodes if get_type(x) in ['zCloth', 'zTissue']]
+        for body_name in [x for x in body_names if x in graph]:
+            nodes.extend(graph.get_fields(body_name))
+        body_names = [x for x in body_names if x not in graph]
         if body_names:
             history = cmds.listHistory(body_names)
             types = []
@@ -352,14 +429,13 @@ class Ziva(Builder):
             nodes_reordered = list(
                 OrderedDict.fromkeys(filter(lambda n: get_type(n) not in exclude_node_list, nodes)))
 
-            # Sort nodes by order defined in the ZNODES list.
+            # Sort nodes so each node type comes after the ones it depends on.
+            type_order = dict((x, i) for i, x in enumerate(get_build_order()))
+
             def key_fn(node):
-                try:
-                    return ZNODES.index(get_type(node))
-                except ValueError:
-                    # For node types not in the list, return a big enough index value
-                    # to make them append at the end of the list.
-                    return 1000
+                # For node types without declared dependencies, return a big enough index value
+                # to make them append at the end of the list.
+                return type_order.get(get_type(node), 1000)
 
             nodes_reordered.sort(key=key_fn)
             return nodes_reordered
@@ -371,11 +447,8 @@ class Ziva(Builder):
             self._populate_nodes(nodes, False)
             self.setup_tree_hierarchy()
 
-        cmds.select(scene_selection)
-        self.stats()
-        self.make_node_connections()
-
     @time_this
+    @cache_scene_queries
     def retrieve_from_scene(self, *args, **kwargs):
         """
         This gets the scene items from the scene for further manipulation or saving.
@@ -420,33 +493,21 @@ class Ziva(Builder):
 
         solver = solver[0]
 
-        b_solver = self.node_factory(solver, parent=None)
-        self._extend_scene_items(b_solver)
-
-        node_types = [
-            'zSolverTransform',
-            'zBone',
-            'zTet',
-            'zTissue',
-            'zCloth',
-            'zMaterial',
-            'zAttachment',
-            'zFiber',
-            'zEmbedder',
-            'zLineOfAction',
-            'zFieldAdaptor',
-            'zRivetToBone',
-            'zRestShape',
-        ]
-
-        node_types.extend(FIELD_TYPES)
-        nodes = _zQuery(node_types, solver)
-        if nodes:
-            self._populate_nodes(nodes, True)
-            self.setup_tree_hierarchy()
+        nodes = _get_solver_nodes(solver)
+        self.scene_graph = ZivaSceneGraph(solver, nodes)
+        try:
+            b_solver = self.node_factory(solver, parent=None)
+            self._extend_scene_items(b_solver)
 
-        self.stats()
-        self.make_node_connections()
+            if nodes:
+                self._populate_nodes(nodes, True)
+                self.setup_tree_hierarchy()
+
+            self.stats()
+            self.make_node_connections()
+        finally:
+            # The snapshot goes stale as soon as the scene changes
+            self.scene_graph = None
 
     @time_this
     def retrieve_from_scene_selection(self, *args, **kwargs):
@@ -568,7 +629,97 @@ class Ziva(Builder):
 
                 item.retrieve_values()
 
+    def plan_build(self,
+                   association_filter=None,
+                   interp_maps='auto',
+                   solver=True,
+                   bones=True,
+                   tissues=True,
+                   attachments=True,
+                   materials=True,
+                   fibers=True,
+                   embedder=True,
+                   cloth=True,
+                   fields=True,
+                   lineOfActions=True,
+                   rivetToBone=True,
+                   restShape=True,
+                   permissive=True,
+                   target_prefix=None,
+                   center_prefix=None,
+                   skip_unchanged=False):
+        """
+        This plans building the Ziva rig into the Maya scene, without changing the scene.
+        The plan has a stage per node type, which can be dry-run, written out for review
+        and executed, see :class:`zBuilder.builders.build_plan.BuildPlan`.
+        Arguments are the same as build().
+
+        Args:
+            association_filter (str): filter by node association.  Defaults to None
+            interp_maps (str): Option to interpolate maps.
+                True: Yes interpolate
+                False: No
+                auto: Interpolate if it needs it (vert check)        
+            solver (bool): Build the solver.
+            bones (bool): Build the bones.
+            tissues (bool): Build the tissue and tets.
+            attachments (bool): Build the attachments.
+            materials (bool): Build the materials.
+            fibers (bool): Build the fibers.
+            embedder (bool): Build the embedder.
+            cloth (bool): Build the cloth.
+            fields (bool): Build the fields.
+            lineOfActions (bool): Build the line of actions.
+            rivetToBone (bool): Build the rivet to bone.
+            restShape (bool): Build the zRestShape.
+            permissive (bool): False raises errors if something is wrong. Defaults to True
+            target_prefix (str): Target prefix used for mirroring. Defaults to None
+            center_prefix (str): Center prefix used for mirroring. Defaults to None
+            skip_unchanged (bool): Only write attribute values and maps that differ from
+                the scene.  Useful for building again on a scene with a few edits.
+                Defaults to False
+
+        Returns:
+            :obj:`BuildPlan`: The build plan.
+        """
+        build_kwargs = {'permissive': permissive, 'interp_maps': interp_maps}
+
+        solver_stages = []
+        if solver:
+            # solver nodes are built without prefixes and post build
+            steps = [
+                BuildStep(scene_item, build_kwargs, post_build=False)
+                for scene_item in self.get_scene_items(type_filter=['zSolver', 'zSolverTransform'],
+                                                       association_filter=association_filter)
+            ]
+            solver_stages.append(BuildStage(['zSolver', 'zSolverTransform'], steps))
+
+        build_kwargs = dict(build_kwargs, target_prefix=target_prefix, center_prefix=center_prefix)
+        node_types_to_build = _get_node_types_to_build(bones=bones,
+                                                       tissues=tissues,
+                                                       cloth=cloth,
+                                                       materials=materials,
+                                                       attachments=attachments,
+                                                       fibers=fibers,
+                                                       lineOfActions=lineOfActions,
+                                                       rivetToBone=rivetToBone,
+                                                       restShape=restShape,
+                                                       embedder=embedder,
+                                                       fields=fields)
+        # Node types of a level do not depend on each other and are built in one stage.
+        stages = []
+        for node_types in get_build_levels(node_types_to_build):
+            steps = []
+            for node_type in node_types:
+                scene_items = self.get_scene_items(type_filter=node_type,
+                                                   association_filter=association_filter)
+                steps.extend(BuildStep(scene_item, build_kwargs) for scene_item in scene_items)
+            stages.append(BuildStage(node_types, steps))
+
+        return BuildPlan(self, solver_stages, stages, skip_unchanged=skip_unchanged)
+
     @time_this
+    @cache_scene_queries
     def build(self,
               association_filter=None,
               interp_maps='auto',
@@ -586,10 +737,12 @@ class Ziva(Builder):
               restShape=True,
               permissive=True,
               target_prefix=None,
-              center_prefix=None):
+              center_prefix=None,
+              skip_unchanged=False):
         """
         This builds the Ziva rig into the Maya scene.
         It does not build geometry as the expectation is that the geometry is in the scene.
+        Nodes already in the scene are updated rather than created again.
 
         Args:
             association_filter (str): filter by node association.  Defaults to None
@@ -612,72 +765,63 @@ class Ziva(Builder):
             permissive (bool): False raises errors if something is wrong. Defaults to True
             target_prefix (str): Target prefix used for mirroring. Defaults to None
             center_prefix (str): Center prefix used for mirroring. Defaults to None
+            skip_unchanged (bool): Only write attribute values and maps that differ from
+                the scene.  Useful for building again on a scene with a few edits.
+                Defaults to False
         """
-
         logger.info('Building Ziva Rig.')
-        sel = cmds.ls(sl=True)
-
-        # get stored solver enable value to build later. The solver comes in OFF
-        solver_transform = self.get_scene_items(type_filter='zSolverTransform')
-
-        solvers = list()
-        if solver:
-            solvers.append('zSolver')
-            solvers.append('zSolverTransform')
-
-            # build the nodes by calling build method on each one
-            for scene_item in self.get_scene_items(type_filter=solvers,
-                                                   association_filter=association_filter):
-                logger.info('Building: {}'.format(scene_item.type))
-                scene_item.do_build(permissive=permissive,
-                                    interp_maps=interp_maps)
-
-        with SolverDisabler(solver_transform[0].name):
-
-            # generate list of node types to build
-            node_types_to_build = list()
-            if bones:
-                node_types_to_build.append('zBone')
-            if tissues:
-                node_types_to_build.append('zTissue')
-                node_types_to_build.append('zTet')
-            if cloth:
-                node_types_to_build.append('zCloth')
-            if materials:
-                node_types_to_build.append('zMaterial')
-            if attachments:
-                node_types_to_build.append('zAttachment')
-            if fibers:
-                node_types_to_build.append('zFiber')
-            if lineOfActions:
-                node_types_to_build.append('zLineOfAction')
-            if rivetToBone:
-                node_types_to_build.append('zRivetToBone')
-            if restShape:
-                node_types_to_build.append('zRestShape')
-            if embedder:
-                node_types_to_build.append('zEmbedder')
-            if fields:
-                node_types_to_build.extend(FIELD_TYPES)
-                node_types_to_build.append('zFieldAdaptor')
-
-            # build the nodes by calling build method on each one
-            for node_type in node_types_to_build:
-                scene_items = self.get_scene_items(type_filter=node_type,
-                                                   association_filter=association_filter)
-                if scene_items:
-                    logger.info('Building: {}'.format(node_type))
-                for scene_item in scene_items:
-                    scene_item.do_build(permissive=permissive,
-                                        interp_maps=interp_maps,
-                                        target_prefix=target_prefix,
-                                        center_prefix=center_prefix)
-                    scene_item.do_post_build()
-
-        cmds.select(sel, r=True)
-
-        # last ditch check of map validity for zAttachments and zFibers
-        _check_map_validity(self.get_scene_items(type_filter='map'))
+        plan = self.plan_build(association_filter=association_filter,
+                               interp_maps=interp_maps,
+                               solver=solver,
+                               bones=bones,
+                               tissues=tissues,
+                               attachments=attachments,
+                               materials=materials,
+                               fibers=fibers,
+                               embedder=embedder,
+                               cloth=cloth,
+                               fields=fields,
+                               lineOfActions=lineOfActions,
+                               rivetToBone=rivetToBone,
+                               restShape=restShape,
+                               permissive=permissive,
+                               target_prefix=target_prefix,
+                               center_prefix=center_prefix,
+                               skip_unchanged=skip_unchanged)
+        plan.execute()
+
+
+def _get_node_types_to_build(bones, tissues, cloth, materials, attachments, fibers,
+                             lineOfActions, rivetToBone, restShape, embedder, fields):
+    """ Lists the node types Ziva.build() builds after the solver.
+    The order they are built in comes from build_order.get_build_levels().
+    """
+    node_types_to_build = list()
+    if bones:
+        node_types_to_build.append('zBone')
+    if tissues:
+        node_types_to_build.append('zTissue')
+        node_types_to_build.append('zTet')
+    if cloth:
+        node_types_to_build.append('zCloth')
+    if materials:
+        node_types_to_build.append('zMaterial')
+    if attachments:
+        node_types_to_build.append('zAttachment')
+    if fibers:
+        node_types_to_build.append('zFiber')
+    if lineOfActions:
+        node_types_to_build.append('zLineOfAction')
+    if rivetToBone:
+        node_types_to_build.append('zRivetToBone')
+    if restShape:
+        node_types_to_build.append('zRestShape')
+    if embedder:
+        node_types_to_build.append('zEmbedder')
+    if fields:
+        node_types_to_build.extend(FIELD_TYPES)
+        node_types_to_build.append('zFieldAdaptor')
+    return node_types_to_build
 
 
 def transform_rivet_and_LoA_into_tissue_meshes(selection):
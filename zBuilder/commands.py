@@ -13,7 +13,7 @@ from zBuilder.utils.mayaUtils import get_short_name, get_type, safe_rename, buil
 from zBuilder.utils.vfxUtils import get_zSolver, isSolver, check_body_type
 from zBuilder.utils.solverDisabler import SolverDisabler
 from zBuilder.builders.skinClusters import SkinCluster
-from zBuilder.builders.serialize import read, write
+from zBuilder.builders.serialize import read, write, write_async
 
 logger = logging.getLogger(__name__)
 
@@ -416,27 +416,33 @@ def skincluster_transfer(prefix=""):
     builder.build()
 
 
-def load_rig(file_name, solver_name=None):
+def load_rig(file_name, solver_name=None, skip_unchanged=False):
     # Load a Ziva rig from a file. Geometry must already be in the scene.
     # If solverName is not provided, the rig is applied to the solver stored in the zBuilder file.
     # If solverName is provided, replace the name of the solver stored in the zBuilder file
     # with a given solverName, and apply the rig to that solver.
+    # With skip_unchanged=True only the attribute values and maps that differ from the
+    # rig already in the scene are written, which is faster to load over a rig with a few edits.
     builder = zva.Ziva()
     read(file_name, builder)
     if solver_name != None:
         # replace the solver name stored in the .zBuilder file with solverName
         solver_name_in_file = builder.get_scene_items(type_filter='zSolverTransform')[0].name
         builder.string_replace(solver_name_in_file, solver_name)
-    builder.build()
+    builder.build(skip_unchanged=skip_unchanged)
 
 
-def save_rig(file_name):
+def save_rig(file_name, background=False):
     # Save a Ziva rig to a file.
     # If there is only one solver in the scene, it is saved.
     # If there is multiple solvers, save the first solver in the union
     # of selected solvers and the default solver.
+    # With background=True the file is written in a background thread,
+    # the returned WriteHandle tells when it is done.
     builder = zva.Ziva()
     builder.retrieve_from_scene()
+    if background:
+        return write_async(file_name, builder)
     write(file_name, builder)
 
 
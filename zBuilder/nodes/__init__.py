@@ -31,3 +31,8 @@ from .deformers.skinCluster import SkinCluster
 from .deformers.blendShape import BlendShape
 from .deformers.deltaMush import DeltaMush
 from .deformers.wrap import Wrap
+
+
+# registry----------------------------------------------------------------------
+from .registry import register_node_classes_in_module
+register_node_classes_in_module(__name__)
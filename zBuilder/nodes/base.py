@@ -1,11 +1,19 @@
-import json
 import logging
-from maya import cmds
-from zBuilder.utils.mayaUtils import get_short_name, replace_long_name, replace_dict_keys
+import sys
+from zBuilder.utils.mayaUtils import (get_long_names, get_short_name, replace_long_name,
+                                      replace_dict_keys)
 from zBuilder.utils.commonUtils import is_string, is_sequence
 
 logger = logging.getLogger(__name__)
 
+# scene item class -> attribute names handled specially by Base.serialize()
+_serialize_schemas = {}
+
+if sys.version_info[0] < 3:
+    _JSON_SCALAR_TYPES = (basestring, int, long, float, type(None))
+else:
+    _JSON_SCALAR_TYPES = (str, int, float, type(None))
+
 
 class Base(object):
 
@@ -36,6 +44,10 @@ class Base(object):
         'children_tissues',  # for sub-tissues
     ]
 
+    # The attributes holding large number arrays, mapped to the data type they are saved with.
+    # These are saved as binary data next to the json when writing to a file.
+    ARRAY_ATTRIBUTES = {}
+
     def __init__(self, *args, **kwargs):
         self._name = None
         self._class = (self.__class__.__module__, self.__class__.__name__)
@@ -142,37 +154,65 @@ class Base(object):
 
     @name.setter
     def name(self, name):
-        if cmds.ls(name, long=True):
-            self._name = cmds.ls(name, long=True)[0]
+        long_names = get_long_names(name)
+        if long_names:
+            self._name = long_names[0]
         else:
             self._name = name
+        self._reindex()
+
+    def _reindex(self):
+        """ Lets the builder holding this scene item know its name or association changed,
+        so the scene item lookup stays up to date.
+        """
+        builder = self.__dict__.get('builder')
+        if builder is not None and hasattr(builder, 'scene_items') and self in builder.scene_items:
+            old_long_name = builder.scene_items.reindex(self)
+            if old_long_name != self.long_name and hasattr(builder, '_refresh_parameter_cache'):
+                builder._refresh_parameter_cache(self.type, old_long_name)
+                builder._refresh_parameter_cache(self.type, self.long_name)
 
     def serialize(self):
         """  Makes node serializable.
 
         It loops through keys in __dict__ and saves out a temp dict of items
         that can be serializable and returns that temp dict for json writing
-        purposes.
+        purposes.  Scene items in SCENE_ITEM_ATTRIBUTES are written by name,
+        the scene item itself is left untouched.
 
         Returns:
             dict: of serializable items
         """
         from zBuilder.builders.serialize import replace_scene_items_with_string
 
+        pointer_keys, array_keys = self._serialize_schema()
         output = dict()
 
-        for key in self.__dict__:
-            if key in Base.SCENE_ITEM_ATTRIBUTES:
-                self.__dict__[key] = replace_scene_items_with_string(self.__dict__[key])
-
-            try:
-                json.dumps(self.__dict__[key])
-                output[key] = self.__dict__[key]
+        for key, value in self.__dict__.items():
+            if key in pointer_keys:
+                value = replace_scene_items_with_string(value)
+            elif key in array_keys and (value is None or is_sequence(value)):
+                # Number arrays can be large, they are not checked item by item.
+                output[key] = value
+                continue
 
-            except TypeError:
-                pass
+            if _is_json_value(value):
+                output[key] = value
         return output
 
+    @classmethod
+    def _serialize_schema(cls):
+        """ Gets the attribute names serialize() handles specially for this class.
+
+        Returns:
+            tuple: Scene item attribute names and number array attribute names.
+        """
+        schema = _serialize_schemas.get(cls)
+        if schema is None:
+            schema = (frozenset(cls.SCENE_ITEM_ATTRIBUTES), frozenset(cls.ARRAY_ATTRIBUTES))
+            _serialize_schemas[cls] = schema
+        return schema
+
     def deserialize(self, dictionary):
         """ Deserializes a node with given dict.
 
@@ -203,7 +243,11 @@ class Base(object):
             replace (str): string to replace it with.
 
         """
-        searchable = [x for x in self.__dict__ if x not in self.SEARCH_EXCLUDE]
+        # Number arrays hold no names, and may be shared with other scene items.
+        searchable = [
+            x for x in self.__dict__
+            if x not in self.SEARCH_EXCLUDE and x not in self.ARRAY_ATTRIBUTES
+        ]
         for item in searchable:
             if is_sequence(self.__dict__[item]):
                 new_names = []
@@ -230,6 +274,21 @@ class Base(object):
                                 new_name = replace_long_name(search, replace, name)
                                 new_names.append(new_name)
                                 self.__dict__[item][key] = new_names
+        self._reindex()
+
+
+def _is_json_value(value):
+    """ Tells if json can encode a value without a custom encoder.
+    This is the check json.dumps() does, without building the json text.
+    """
+    if isinstance(value, _JSON_SCALAR_TYPES):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_json_value(x) for x in value)
+    if isinstance(value, dict):
+        return all(
+            isinstance(k, _JSON_SCALAR_TYPES) and _is_json_value(v) for k, v in value.items())
+    return False
 
 
 def equal_dicts(dict_1, dict_2, ignore_keys):
@@ -3,6 +3,7 @@ import logging
 from collections import defaultdict
 from maya import cmds
 from zBuilder.utils.mayaUtils import construct_map_names
+from zBuilder.utils.paintable_maps import set_paintable_maps, split_map_name
 from .dg_node import DGNode
 
 logger = logging.getLogger(__name__)
@@ -80,8 +81,11 @@ class Deformer(DGNode):
                 auto checks if it needs to.  Default = "auto"
         """
         self.check_map_interpolation(interp_maps)
+        skip_unchanged = self.is_skipping_unchanged()
         for map_ in self.parameters['map']:
             if cmds.objExists(self.name):
+                if skip_unchanged and map_.is_same_as_scene():
+                    continue
                 map_.apply_weights()
             else:
                 logger.warning('Missing {} from scene. Not applying map.'.format(self.name))
@@ -104,3 +108,30 @@ class Deformer(DGNode):
         if interp_maps in [True, 'True', 'true']:
             for map_object in map_objects:
                 map_object.interpolate()
+
+
+def set_maya_weights_multiple(scene_items, interp_maps=False):
+    """ Applies the maps of the scene items in the maya scene in one pass.
+    This is the same as calling set_maya_weights() on each of them,
+    but the maps are written together, see paintable_maps.set_paintable_maps().
+
+    Args:
+        scene_items (list): Deformer scene items to apply the maps of.
+        interp_maps (str): Do you want maps interpolated?
+            True forces interpolation.
+            False cancels it.
+            auto checks if it needs to.  Default = "auto"
+    """
+    maps = []
+    for scene_item in scene_items:
+        scene_item.check_map_interpolation(interp_maps)
+        if not cmds.objExists(scene_item.name):
+            logger.warning('Missing {} from scene. Not applying map.'.format(scene_item.name))
+            continue
+        skip_unchanged = scene_item.is_skipping_unchanged()
+        for map_ in scene_item.parameters['map']:
+            if skip_unchanged and map_.is_same_as_scene():
+                continue
+            node, attr = split_map_name(map_.name)
+            maps.append((node, attr, map_.values))
+    set_paintable_maps(maps)
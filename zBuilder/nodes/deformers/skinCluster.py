@@ -1,5 +1,6 @@
 import logging
 
+from collections import defaultdict
 from maya import cmds
 from maya.api import OpenMaya as om2
 from maya.api import OpenMayaAnim as oma2
@@ -64,26 +65,37 @@ class SkinCluster(Deformer):
 
     def copy_weights_from_internal_mesh(self):
         """ This is invoked if the topology is different between mesh in scene and mesh in builder.
-        It creates a mesh from its internal storage, then it applies the skinCluster to that mesh.
-        Then it copySkinWeights from that mesh to desired mesh.
+        The weights of each vertex in scene are blended from the vertices of the closest triangle
+        of the mesh in builder, the same way Map.interpolate() interpolates maps.
         """
         logger.info('interpolating map:  {}.weightList[*].weights'.format(self.name))
         mesh = self.parameters['mesh'][0]
 
-        tmp_mesh = mesh.build_mesh()
-        cmds.select(self.influences, tmp_mesh, r=True)
+        correspondence = mesh.get_correspondence(self.association[0])
+        weights = interpolate_weights(self.weights, correspondence)
+        apply_weights(self.name, self.association, self.influences, weights)
 
-        if cmds.objExists('tmp_skinCluster'):
-            cmds.delete('tmp_skinCluster')
-        cmds.skinCluster(toSelectedBones=True, name='tmp_skinCluster')
 
-        apply_weights('tmp_skinCluster', tmp_mesh, self.influences, self.weights)
-        cmds.select(tmp_mesh, self.association[0])
-        cmds.copySkinWeights(noMirror=True,
-                             surfaceAssociation='closestPoint',
-                             influenceAssociation='closestJoint')
+def interpolate_weights(weights, correspondence):
+    """ Interpolates skinCluster weights to another mesh.
 
-        cmds.delete(tmp_mesh)
+    Args:
+        weights (dict): Weights as get_weights() returns them.
+        correspondence (:obj:`MeshCorrespondence`): From the mesh of the weights
+            to the other mesh.
+
+    Returns:
+        dict: The weights of the other mesh, in the same format.
+    """
+    interpolated = {}
+    for vtx, (ids, bary_weights) in enumerate(
+            zip(correspondence.vertex_ids, correspondence.weights)):
+        vtx_weights = defaultdict(float)
+        for i, bary_weight in zip(ids, bary_weights):
+            for influence, weight in weights.get('weightList[{}].weights'.format(i), {}).items():
+                vtx_weights[influence] += bary_weight * weight
+        interpolated['weightList[{}].weights'.format(vtx)] = dict(vtx_weights)
+    return interpolated
 
 
 def get_associations(skin_cluster):
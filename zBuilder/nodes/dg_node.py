@@ -2,7 +2,8 @@ import logging
 
 from maya import cmds
 from zBuilder.utils.commonUtils import get_first_element
-from zBuilder.utils.mayaUtils import get_short_name, build_attr_list, build_attr_key_values, get_type
+from zBuilder.utils.mayaUtils import (get_short_name, build_attrs, get_type, object_exists,
+                                      set_attrs)
 from .base import Base
 
 logger = logging.getLogger(__name__)
@@ -91,7 +92,7 @@ class DGNode(Base):
         """
         out = []
         for i, item in enumerate(self._association):
-            if cmds.objExists(item):
+            if object_exists(item):
                 out.append(item)
             else:
                 out.append(self.association[i])
@@ -104,6 +105,7 @@ class DGNode(Base):
     @association.setter
     def association(self, association):
         self._association = cmds.ls(association, long=True)
+        self._reindex()
 
     @property
     def long_association(self):
@@ -129,47 +131,57 @@ class DGNode(Base):
     def get_maya_attrs(self):
         """ Get attribute values from maya and update self.
         """
-        # build the attribute list to aquire from scene
-        attr_list = build_attr_list(self.long_name)
-        if self.EXTEND_ATTR_LIST:
-            attr_list.extend(self.EXTEND_ATTR_LIST)
-
-        # with attribute list, get values in dictionary format and update node.
-        self.attrs = build_attr_key_values(self.long_name, attr_list)
+        # get the keyable, channel box and extended attribute values in dictionary format
+        # and update node.
+        self.attrs = build_attrs(self.long_name, self.EXTEND_ATTR_LIST)
 
     def set_maya_attrs(self):
         """ Given a Builder node this set the attributes of the object in the maya scene.
         """
-        for attr in self.attrs.keys():
-            node_dot_attr = '{}.{}'.format(self.name, attr)
-            if not cmds.objExists(node_dot_attr):
-                logger.info('{} not found, skipping.'.format(node_dot_attr))
-                continue
-
-            # Skip locked or connected attributes
-            if cmds.getAttr(node_dot_attr, settable=True):
-                try:
-                    cmds.setAttr(node_dot_attr,
-                                 self.attrs[attr]['value'],
-                                 type=self.attrs[attr]['type'])
-                except RuntimeError:
-                    # setAttr() throws when attr type is bool, double, or other types.
-                    # For such case, call setAttr() again w/o specifying type should make it work.
-                    try:
-                        cmds.setAttr(node_dot_attr, self.attrs[attr]['value'])
-                    except RuntimeError:
-                        # Unfortunately, in the Maya field nodes unit test,
-                        # when retrieving Maya DragField node attr list,
-                        # its maxDistance attr returns -1.0, not minimum value 0.
-                        # When setting "dragField1.maxDistance" attr during do_build() operation,
-                        # it first throws exception:
-                        # RuntimeError: setAttr: The type 'doubleLinear' is not the name of a recognized type.
-                        # This makes sense. But after invoking setAttr() again with -1.0 value,
-                        # it throw another exception:
-                        # RuntimeError: setAttr: Cannot set the attribute 'dragField1.maxDistance' below its minimum value of 0.
-                        # If we want to prevent this problem, we need to verify attr type and its min/max range,
-                        # in the build_attr_key_values() function.
-                        # That imposes extra work in our code for Maya's bug.
-                        # The easiest solution is mute this error and skip setting this attr value.
-                        # The downside is it also mutes any our errors.
-                        pass
+        set_maya_attrs_multiple([self])
+
+    def is_skipping_unchanged(self):
+        """ Whether the builder of this node is building only what differs from the scene,
+        see Ziva.build(skip_unchanged=True), and the node in the scene is connected
+        the same way as this one.  Otherwise all the attributes and maps are written.
+        """
+        if not getattr(self.builder, 'skip_unchanged', False):
+            return False
+        return self.is_connected_as_in_scene(getattr(self.builder, 'scene_connections', None) or {})
+
+    def is_connected_as_in_scene(self, scene_connections):
+        """ Checks the node in the scene has the type and meshes of this node.
+        Nodes without meshes are not checked.
+
+        Args:
+            scene_connections (dict): long name -> (type, long associations) of the nodes
+                in the scene, see build_plan.retrieve_scene_connections().
+
+        Returns:
+            bool
+        """
+        association = self.long_association
+        if not association:
+            return True
+        scene_connection = scene_connections.get(self.long_name)
+        return scene_connection is not None and scene_connection[0] == self.type and \
+            sorted(scene_connection[1]) == sorted(association)
+
+
+def set_maya_attrs_multiple(scene_items):
+    """ Sets the attributes of the scene items in the maya scene in one pass.
+    This is the same as calling set_maya_attrs() on each of them,
+    but faster for many scene items, e.g. all the nodes of one type.
+
+    Args:
+        scene_items (list): DGNode scene items to set the attributes of.
+
+    Returns:
+        tuple: lists of the node.attr names skipped and those that failed to set.
+    """
+    skip_unchanged = any(item.is_skipping_unchanged() for item in scene_items)
+    skipped, failed = set_attrs([(item.name, item.attrs) for item in scene_items],
+                                skip_unchanged=skip_unchanged)
+    for node_dot_attr in failed:
+        logger.debug('Failed to set {}.'.format(node_dot_attr))
+    return skipped, failed
@@ -6,6 +6,7 @@ from maya.api import OpenMaya as om2
 from zBuilder.utils.paintable_maps import get_paintable_map, set_paintable_map, split_map_name
 from zBuilder.utils.commonUtils import clamp
 from zBuilder.utils.mayaUtils import get_short_name, get_dag_path_from_mesh, get_type, invert_weights
+from .mesh import flatten_points, get_default_interpolation_backend, get_mesh_points, split_points
 from ..base import Base
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,14 @@ class Map(Base):
     # This is an inherited class attribute.
     SEARCH_EXCLUDE = Base.SEARCH_EXCLUDE + ['map_type', 'interp_method']
 
+    ARRAY_ATTRIBUTES = {'values': 'float64'}
+
+    # How interpolate() finds the closest points when no backend is given,
+    # one of mesh.INTERPOLATION_BACKENDS.  None picks 'numpy' where NumPy 1.17 or later
+    # is available, it is faster on dense meshes, else 'maya',
+    # see mesh.get_default_interpolation_backend().
+    INTERPOLATION_BACKEND = None
+
     def __init__(self, *args, **kwargs):
         super(Map, self).__init__(*args, **kwargs)
 
@@ -83,6 +92,15 @@ class Map(Base):
         split_map = split_map_name(self.long_name)
         self.values = get_paintable_map(split_map[0], split_map[1], self.get_mesh(long_name=True))
 
+    def set_values(self, values):
+        """ Replaces the values of the map.  Values read from a file are shared with
+        the other maps of the same values and can not be changed in place.
+
+        Args:
+            values (list): One value per vertex of the mesh.
+        """
+        self.values = list(values)
+
     def set_mesh(self, mesh):
         """ Stores the mesh name.
 
@@ -125,8 +143,13 @@ class Map(Base):
         mesh_data = self.get_mesh_component()
         return mesh_data.is_topologically_corresponding()
 
-    def interpolate(self):
-        """ Interpolates map against mesh in scene.  Re-sets value."""
+    def interpolate(self, backend=None):
+        """ Interpolates map against mesh in scene.  Re-sets value.
+
+        Args:
+            backend (str, optional): How the closest points are found,
+                see Mesh.get_correspondence().  Defaults to INTERPOLATION_BACKEND.
+        """
         mesh_data = self.get_mesh_component()
 
         mesh_name = mesh_data.long_name
@@ -134,20 +157,18 @@ class Map(Base):
             mesh_name = mesh_data.name
         if cmds.objExists(mesh_name):
             logger.info('interpolating map:  {}'.format(self.name))
-            created_mesh = mesh_data.build_mesh()
-            interp_weights = self.values
             if self.interp_method == "barycentric":
-                interp_weights = interpolate_values(created_mesh, mesh_name, self.values)
+                # Shared by all the maps on this mesh
+                correspondence = mesh_data.get_correspondence(
+                    mesh_name, backend=backend or self.INTERPOLATION_BACKEND)
+                self.values = correspondence.interpolate(self.values, clamp_range=[0, 1])
             elif self.interp_method == "endPoints":
-                interp_weights = interpolate_end_points_weights(created_mesh, mesh_name,
-                                                                self.values)
+                self.values = transfer_end_points_weights(
+                    mesh_data.get_points(), mesh_name, self.values,
+                    backend=backend or self.INTERPOLATION_BACKEND)
             else:
                 assert False, "Unknown interpolation method: {}.".format(self.interp_method)
 
-            self.values = interp_weights
-
-            cmds.delete(created_mesh)
-
     def invert(self):
         """ Invert the map.
         """
@@ -159,6 +180,19 @@ class Map(Base):
         node, attr = split_map_name(self.name)
         set_paintable_map(node, attr, self.values)
 
+    def is_same_as_scene(self):
+        """ Checks if the map in the maya scene already has the values of this node.
+
+        Returns:
+            True if they are the same, else False.
+        """
+        node, attr = split_map_name(self.name)
+        mesh = self.get_mesh(long_name=True)
+        if self.values is None or not cmds.objExists(node) or not cmds.objExists(mesh):
+            return False
+        scene_values = get_paintable_map(node, attr, mesh)
+        return list(scene_values) == list(self.values)
+
     def copy_values_from(self, map_parameter):
         self.values = map_parameter.values
 
@@ -233,7 +267,7 @@ def interpolate_values(source_mesh, destination_mesh, weight_list, clamp_range=[
     return interpolated_weights
 
 
-def interpolate_end_points_weights(source_mesh, target_mesh, weight_list):
+def interpolate_end_points_weights(source_mesh, target_mesh, weight_list, backend=None):
     """ Will transfer values between similar meshes with differing topology.
         Takes value from the closest point on mesh. Works only for zFiber.endPoints map.
         
@@ -241,27 +275,63 @@ def interpolate_end_points_weights(source_mesh, target_mesh, weight_list):
         source_mesh(string): name on the mesh transform to interpolate from
         target_mesh(string): name of the mesh transform to interpolate to
         weight_list(list): weights to interpolate
+        backend(string, optional): How the closest points are found, ``maya`` or ``numpy``.
+            Defaults to mesh.get_default_interpolation_backend().
 
     Returns:
         list(float)
     """
+    source_points = flatten_points(get_mesh_points(source_mesh))
+    return transfer_end_points_weights(source_points, target_mesh, weight_list, backend)
+
+
+def transfer_end_points_weights(source_points, target_mesh, weight_list, backend=None):
+    """ The same as interpolate_end_points_weights(), from the world space points
+    of the source mesh in internal units, one flat list of x, y, z of each vertex,
+    e.g. Mesh.get_points().
+
+    The target mesh is read once as arrays.  The ``numpy`` backend finds the closest polygons
+    of all the source vertices at once with zBuilder.utils.barycentric_transfer,
+    it is the default when NumPy 1.17 or later is available.  The ``maya`` backend queries
+    MMeshIntersector one source vertex at a time.
+
+    Returns:
+        list(float)
+    """
+    if backend is None:
+        backend = get_default_interpolation_backend()
+
     tgt_mesh_dag_path = get_dag_path_from_mesh(target_mesh)
     tgt_shape_dag_path = om2.MDagPath(tgt_mesh_dag_path)
     tgt_shape_dag_path.extendToShape()
+    tgt_mesh_fn = om2.MFnMesh(tgt_shape_dag_path)
+    tgt_points = tgt_mesh_fn.getPoints(om2.MSpace.kWorld)
+    tgt_poly_counts, tgt_poly_connects = tgt_mesh_fn.getVertices()
+
+    if backend == 'numpy':
+        try:
+            from zBuilder.utils.barycentric_transfer import transfer_end_points
+        except ImportError:
+            raise ValueError(
+                'The numpy interpolation backend needs NumPy 1.17 or later, it is not available.')
+        return transfer_end_points(source_points, weight_list, flatten_points(tgt_points),
+                                   tgt_poly_counts, tgt_poly_connects).tolist()
 
     tgt_mesh_intersector = om2.MMeshIntersector()
     tgt_mesh_intersector.create(tgt_shape_dag_path.node(), tgt_mesh_dag_path.inclusiveMatrix())
 
-    src_mesh_dag_path = get_dag_path_from_mesh(source_mesh)
-    src_mesh_vtx_iter = om2.MItMeshVertex(src_mesh_dag_path)
-    tgt_mesh_vtx_iter = om2.MItMeshVertex(tgt_mesh_dag_path)
-    tgt_mesh_poly_iter = om2.MItMeshPolygon(tgt_mesh_dag_path)
+    # First vertex of each polygon in tgt_poly_connects
+    tgt_poly_starts = []
+    start = 0
+    for count in tgt_poly_counts:
+        tgt_poly_starts.append(start)
+        start += count
 
     # Fill the map with 0.5 values
-    interpolated_weights = [0.5] * tgt_mesh_vtx_iter.count()
+    interpolated_weights = [0.5] * len(tgt_points)
 
-    while not src_mesh_vtx_iter.isDone():
-        current_weight = weight_list[src_mesh_vtx_iter.index()]
+    for index, source_point in enumerate(split_points(source_points)):
+        current_weight = weight_list[index]
         # Round the weight value in [0.9, 1) and [0, 0.1] range
         if current_weight >= 0.9:
             current_weight = 1.0
@@ -271,34 +341,21 @@ def interpolate_end_points_weights(source_mesh, target_mesh, weight_list):
         # Process the weight value is either 0 or 1
         if current_weight in (0, 1):
             # closest polygon
-            pos = src_mesh_vtx_iter.position(om2.MSpace.kWorld)
-            closest_point_on_src_mesh = tgt_mesh_intersector.getClosestPoint(pos)
-            tgt_mesh_poly_iter.setIndex(closest_point_on_src_mesh.face)
-            closest_polygon_vtx_array = tgt_mesh_poly_iter.getPoints(om2.MSpace.kWorld)
-            closest_polygon_idx_array = tgt_mesh_poly_iter.getVertices()
-
-            # Iterate through vertices on the polygon to get distance sum
-            # and distance list to each vertex
-            distance_sum = 0
-            distance_array = []
-            for cur_point in closest_polygon_vtx_array:
-                distance = pos.distanceTo(cur_point)
-                distance_sum += distance
-                distance_array.append(distance)
-            average_distance = distance_sum / len(closest_polygon_vtx_array)
+            pos = om2.MPoint(source_point)
+            face = tgt_mesh_intersector.getClosestPoint(pos).face
+            first = tgt_poly_starts[face]
+            closest_polygon_idx_array = tgt_poly_connects[first:first + tgt_poly_counts[face]]
+
+            # Distance to each vertex of the polygon
+            distance_array = [pos.distanceTo(tgt_points[idx]) for idx in closest_polygon_idx_array]
+            average_distance = sum(distance_array) / len(distance_array)
 
             # If distance from projected point to face vertex is
-            # equal or less than average distance, set corresponding weight value
-            found = False
-            for idx, dist in enumerate(distance_array):
+            # equal or less than average distance, set corresponding weight value.
+            # The closest vertex is never farther than the average,
+            # so at least one vertex gets a new value.
+            for idx, dist in zip(closest_polygon_idx_array, distance_array):
                 if dist <= average_distance:
-                    interpolated_weights[closest_polygon_idx_array[idx]] = current_weight
-                    found = True
-            # make sure that at least one vertex has a new value
-            if not found:
-                closest_index = distance_array.index(min(distance_array))
-                interpolated_weights[closest_polygon_idx_array[closest_index]] = current_weight
-
-        src_mesh_vtx_iter.next()
+                    interpolated_weights[idx] = current_weight
 
     return interpolated_weights
@@ -1,22 +1,63 @@
 import logging
 
+from collections import OrderedDict
+from itertools import chain
 from maya import cmds
 from maya.api import OpenMaya as om2
-from zBuilder.utils.mayaUtils import get_dag_path_from_mesh, get_name_from_mobject, get_maya_api_version
+from zBuilder.utils.commonUtils import clamp, is_sequence
+from zBuilder.utils.mayaUtils import get_dag_path_from_mesh
 from ..base import Base
 
 logger = logging.getLogger(__name__)
 
+# Ways to find the closest points of a mesh correspondence, see Mesh.get_correspondence().
+# 'maya' uses MMeshIntersector, 'numpy' uses zBuilder.utils.barycentric_transfer.
+INTERPOLATION_BACKENDS = ('maya', 'numpy')
+
+# See get_default_interpolation_backend(), None until it is first called.
+_default_backend = None
+
+# (stored mesh key, scene mesh key, backend) -> MeshCorrespondence,
+# see Mesh.get_correspondence().
+# The oldest correspondences are dropped once there are more than _MAX_CORRESPONDENCES.
+_correspondences = OrderedDict()
+_MAX_CORRESPONDENCES = 32
+
+
+def get_default_interpolation_backend():
+    """ Gets the interpolation backend used when none is given, ``numpy`` when
+    zBuilder.utils.barycentric_transfer can be imported, else ``maya``.
+    It can not without NumPy or with NumPy older than spatial_index.MIN_NUMPY_VERSION.
+    """
+    global _default_backend
+    if _default_backend is None:
+        try:
+            from zBuilder.utils import barycentric_transfer
+            _default_backend = 'numpy'
+        except ImportError:
+            _default_backend = 'maya'
+    return _default_backend
+
 
 class Mesh(Base):
     type = 'mesh'
 
+    ARRAY_ATTRIBUTES = {'_pCountList': 'int32', '_pConnectList': 'int32', '_pointList': 'float64'}
+
+    # _pointList holds the world space points in UI units, as cmds.xform() returns them,
+    # as one flat list of x, y, z of each vertex, see get_mesh_info().
+    # Older files hold a list of [x, y, z] per vertex, deserialize() flattens them.
+
+    # _key caches get_key(), it is cleared whenever the stored points change.
+    COMPARE_EXCLUDE = Base.COMPARE_EXCLUDE + ['_key']
+
     def __init__(self, *args, **kwargs):
         super(Mesh, self).__init__(*args, **kwargs)
 
         self._pCountList = []
         self._pConnectList = []
         self._pointList = []
+        self._key = None
 
         if args:
             mesh_name = args[0]
@@ -27,7 +68,7 @@ class Mesh(Base):
         if self._pCountList and self._pointList:
             return "< MESH: {} -- Poly: {}  Vert: {} >".format(self.long_name,
                                                                len(self._pCountList),
-                                                               len(self._pointList))
+                                                               len(self._pointList) // 3)
         else:
             return "< MESH: {} -- Not retrieved yet. >".format(self.long_name)
 
@@ -44,9 +85,22 @@ class Mesh(Base):
         self.type = 'mesh'
         # Defer retrieve mesh value to retrieve_values() until it is needed.
 
+    def deserialize(self, dictionary):
+        super(Mesh, self).deserialize(dictionary)
+        # Older files hold a list of [x, y, z] per vertex
+        if self._pointList and is_sequence(self._pointList[0]):
+            self._pointList = list(chain.from_iterable(self._pointList))
+        self._key = None
+
+    def serialize(self):
+        output = super(Mesh, self).serialize()
+        output.pop('_key', None)
+        return output
+
     def retrieve_values(self):
         # get the values of the mesh from the scene and update the scene_item
         self._pCountList, self._pConnectList, self._pointList = get_mesh_info(self.long_name)
+        self._key = None
 
     def build_mesh(self):
         """ Builds mesh in maya scene.
@@ -56,11 +110,78 @@ class Mesh(Base):
         """
         # Thanks to Maya Python API 2.0, we can copy python list to M*Array in the constructor
         mesh_fn = om2.MFnMesh()
-        new_mesh = mesh_fn.create(om2.MPointArray(self._pointList), om2.MIntArray(self._pCountList),
+        new_mesh = mesh_fn.create(om2.MPointArray(split_points(self.get_points())),
+                                  om2.MIntArray(self._pCountList),
                                   om2.MIntArray(self._pConnectList))
         new_mesh_dep_node = om2.MFnDependencyNode(new_mesh)
         return cmds.rename(new_mesh_dep_node.name(), self.name + '_rebuilt')
 
+    def get_points(self):
+        """ Gets the stored world space points in internal units, the units of the Maya API,
+        as one flat list of x, y, z of each vertex.
+        """
+        return scale_points(self._pointList, om2.MDistance.uiToInternal(1.0))
+
+    def get_key(self):
+        """ Hashes the stored topology and points, see get_mesh_key().
+        """
+        if self._key is None:
+            self._key = hash(
+                (tuple(self._pCountList), tuple(self._pConnectList), tuple(self._pointList)))
+        return self._key
+
+    def get_spatial_index(self):
+        """ Gets the spatial index of the stored mesh, for closest point, nearest vertex and
+        radius queries, see zBuilder.utils.spatial_index.
+        It is shared with the transfers and queries on the same points and topology,
+        e.g. the numpy interpolation backend of get_correspondence().
+
+        Returns:
+            :obj:`MeshSpatialIndex`
+        """
+        try:
+            from zBuilder.utils.spatial_index import get_spatial_index
+        except ImportError:
+            raise ValueError('The spatial index needs NumPy 1.17 or later, it is not available.')
+        # Keyed by get_key() and the units of get_points(), instead of hashing the arrays again
+        return get_spatial_index(self.get_points(), self._pCountList, self._pConnectList,
+                                 mesh_hash=(self.get_key(), om2.MDistance.uiToInternal(1.0)))
+
+    def get_correspondence(self, scene_mesh, backend=None):
+        """ Gets where each vertex of a mesh in scene lands on the stored mesh,
+        to interpolate values stored per vertex of this mesh onto the mesh in scene.
+        It is computed once per stored mesh and scene mesh pair and shared by
+        all the maps and weights interpolated between them.
+
+        Args:
+            scene_mesh (str): Name of the mesh in scene to interpolate to.
+            backend (str, optional): One of INTERPOLATION_BACKENDS.
+                Defaults to get_default_interpolation_backend().
+
+        Returns:
+            :obj:`MeshCorrespondence`
+        """
+        if backend is None:
+            backend = get_default_interpolation_backend()
+        assert backend in INTERPOLATION_BACKENDS, 'Unknown interpolation backend: {}.'.format(
+            backend)
+        # The scene mesh is read once, for its key and for the correspondence
+        scene_points = get_mesh_points(scene_mesh)
+        key = (self.get_key(), get_mesh_key(scene_mesh, scene_points), backend)
+        correspondence = _correspondences.pop(key, None)
+        if correspondence is None:
+            if backend == 'numpy':
+                correspondence = MeshCorrespondence.from_numpy(
+                    self.get_points(), self._pCountList, self._pConnectList, scene_points,
+                    spatial_index=self.get_spatial_index())
+            else:
+                correspondence = MeshCorrespondence.from_maya(
+                    self.get_points(), self._pCountList, self._pConnectList, scene_points)
+        _correspondences[key] = correspondence
+        while len(_correspondences) > _MAX_CORRESPONDENCES:
+            _correspondences.popitem(last=False)
+        return correspondence
+
     def mirror(self, mirror_axis='X'):
         """ Mirrors the mesh
 
@@ -69,15 +190,12 @@ class Mesh(Base):
         """
         assert mirror_axis in ['X', 'Y', 'Z'], "Expected character 'X', 'Y' or 'Z'"
         logger.info('Mirroring mesh {} along {} axis'.format(self.name, mirror_axis))
-        if mirror_axis == 'X':
-            for pos in self._pointList:
-                pos[0] = -pos[0]
-        elif mirror_axis == 'Y':
-            for pos in self._pointList:
-                pos[1] = -pos[1]
-        elif mirror_axis == 'Z':
-            for pos in self._pointList:
-                pos[2] = -pos[2]
+        # Meshes read from the same file share the point list, it is replaced, not changed.
+        axis = 'XYZ'.index(mirror_axis)
+        points = list(self._pointList)
+        points[axis::3] = [-x for x in points[axis::3]]
+        self._pointList = points
+        self._key = None
 
     def is_topologically_corresponding(self):
         """ Compare an in scene mesh, with the one saved in this node.
@@ -94,44 +212,199 @@ class Mesh(Base):
             logger.error("Failed to check mesh {} topoloy info as it doesn't exist.")
             return False
 
-        pt_list = get_mesh_info(mesh)[2]
-        return len(pt_list) == len(self._pointList)
+        return get_mesh_fn(mesh).numVertices * 3 == len(self._pointList)
+
+
+class MeshCorrespondence(object):
+    """ For each vertex of a destination mesh, the closest triangle on a source mesh
+    and the barycentric coordinates of the closest point on it.
+    Values per vertex of the source mesh interpolate to the destination mesh
+    as a weighted sum of the values of the triangle vertices.
+
+    Args:
+        vertex_ids (list): Per destination vertex, the 3 source vertex ids of the triangle.
+        weights (list): Per destination vertex, the weights of the 3 source vertices.
+    """
+
+    def __init__(self, vertex_ids, weights):
+        self.vertex_ids = vertex_ids
+        self.weights = weights
+
+    @classmethod
+    def from_maya(cls, point_list, poly_count_list, poly_connect_list, destination_points):
+        """ Finds the closest points with MMeshIntersector.
+
+        Args:
+            point_list (list): World space points of the source mesh in internal units,
+                a flat list of x, y, z of each vertex.
+            poly_count_list (list): Vertex count of each polygon of the source mesh.
+            poly_connect_list (list): Vertex ids of each polygon of the source mesh.
+            destination_points (om2.MPointArray): World space points of the destination mesh,
+                see get_mesh_points().
+        """
+        vertex_ids = []
+        weights = []
+
+        # The source mesh is built as mesh data, it does not get added to the scene.
+        src_mesh_data = om2.MFnMeshData().create()
+        om2.MFnMesh().create(om2.MPointArray(split_points(point_list)),
+                             om2.MIntArray(poly_count_list), om2.MIntArray(poly_connect_list),
+                             parent=src_mesh_data)
+        src_mesh_intersector = om2.MMeshIntersector()
+        src_mesh_intersector.create(src_mesh_data, om2.MMatrix())
+        src_mesh_poly_iter = om2.MItMeshPolygon(src_mesh_data)
+
+        for point in destination_points:
+            closest_point = src_mesh_intersector.getClosestPoint(point)
+            src_mesh_poly_iter.setIndex(closest_point.face)
+            _, triangle_vertex_ids = src_mesh_poly_iter.getTriangle(closest_point.triangle,
+                                                                    om2.MSpace.kObject)
+            bary_u, bary_v = closest_point.barycentricCoords
+            vertex_ids.append(tuple(triangle_vertex_ids))
+            weights.append((bary_u, bary_v, 1 - bary_u - bary_v))
+        return cls(vertex_ids, weights)
+
+    @classmethod
+    def from_numpy(cls,
+                   point_list,
+                   poly_count_list,
+                   poly_connect_list,
+                   destination_points,
+                   spatial_index=None):
+        """ Finds the closest points with zBuilder.utils.barycentric_transfer,
+        the same arguments as from_maya().
+        The vertex ids and weights are NumPy arrays.
+
+        Args:
+            spatial_index (:obj:`MeshSpatialIndex`, optional): Index of the source mesh,
+                e.g. Mesh.get_spatial_index().
+        """
+        try:
+            from zBuilder.utils import barycentric_transfer
+        except ImportError:
+            raise ValueError(
+                'The numpy interpolation backend needs NumPy 1.17 or later, it is not available.')
+
+        vertex_ids, weights = barycentric_transfer.get_correspondence(
+            point_list, poly_count_list, poly_connect_list, flatten_points(destination_points),
+            spatial_index=spatial_index)
+        return cls(vertex_ids, weights)
+
+    def __len__(self):
+        return len(self.vertex_ids)
+
+    def interpolate(self, values, clamp_range=None):
+        """ Interpolates values per source vertex to the destination mesh.
+
+        Args:
+            values (list): One value per source vertex.
+            clamp_range (list, optional): Min and max to clamp the values to.
+
+        Returns:
+            list(float): One value per destination vertex.
+        """
+        if not isinstance(self.vertex_ids, list):
+            from zBuilder.utils.barycentric_transfer import transfer_values
+            return transfer_values(self.vertex_ids, self.weights, values, clamp_range).tolist()
+
+        interpolated = []
+        for (id0, id1, id2), (w0, w1, w2) in zip(self.vertex_ids, self.weights):
+            interpolated.append(w0 * values[id0] + w1 * values[id1] + w2 * values[id2])
+        if clamp_range:
+            interpolated = [clamp(x, clamp_range[0], clamp_range[1]) for x in interpolated]
+        return interpolated
+
+
+def get_mesh_fn(mesh_name):
+    """ Gets the function set of the shape of a mesh in scene, with its world space path.
+
+    Returns:
+        om2.MFnMesh
+    """
+    mesh_dag_path = get_dag_path_from_mesh(mesh_name)
+    mesh_dag_path.extendToShape()
+    return om2.MFnMesh(mesh_dag_path)
+
+
+def get_mesh_points(mesh_name):
+    """ Gets the world space points of a mesh in scene.
+
+    Returns:
+        om2.MPointArray
+    """
+    return get_mesh_fn(mesh_name).getPoints(om2.MSpace.kWorld)
+
+
+def get_mesh_key(mesh_name, points=None):
+    """ Hashes the topology and world space points of a mesh in scene.
+    Meshes with the same key interpolate the same way.
+
+    Args:
+        mesh_name (str): Name of the mesh.
+        points (om2.MPointArray, optional): The points of the mesh if they are already read,
+            see get_mesh_points().
+
+    Returns:
+        int
+    """
+    mesh_fn = get_mesh_fn(mesh_name)
+    poly_counts, poly_connects = mesh_fn.getVertices()
+    if points is None:
+        points = mesh_fn.getPoints(om2.MSpace.kWorld)
+    return hash((tuple(poly_counts), tuple(poly_connects), tuple(flatten_points(points))))
+
+
+def flatten_points(points):
+    """ Gets the x, y, z coordinates of points as one flat list.
+
+    Args:
+        points (om2.MPointArray): The points.
+
+    Returns:
+        list(float)
+    """
+    # x, y, z, w of each point, chain() reads them without a python loop per point.
+    flat = list(chain.from_iterable(points))
+    del flat[3::4]
+    return flat
+
+
+def split_points(points):
+    """ Splits a flat list of x, y, z coordinates into a list of [x, y, z] per point,
+    e.g. to build an om2.MPointArray.
+    """
+    return [points[i:i + 3] for i in range(0, len(points), 3)]
+
+
+def scale_points(points, factor):
+    """ Scales a flat list of coordinates, e.g. to convert them between units.
+    The list is returned as is when the factor is 1.
+    """
+    if factor == 1.0:
+        return points
+    return [x * factor for x in points]
+
+
+def clear_correspondence_cache():
+    """ Drops the mesh correspondences computed so far, see Mesh.get_correspondence().
+    """
+    _correspondences.clear()
 
 
 def get_mesh_info(mesh_name):
     """ Gets mesh connectivity for given mesh.
+    The whole mesh is read at once from its MFnMesh arrays.
 
     Args:
         mesh_name: Name of mesh to process.
 
     Returns:
         tuple: tuple of polygon counts, polygon connects, and points.
+        Points are one flat list of the x, y, z worldspace coordinates of each vertex,
+        in UI units as cmds.xform() returns them.
     """
-    mesh_dag_path = get_dag_path_from_mesh(mesh_name)
-    mesh_dag_path.extendToShape()
-
-    poly_count_list = []
-    poly_connect_list = []
-    mesh_poly_iter = om2.MItMeshPolygon(mesh_dag_path)
-    while not mesh_poly_iter.isDone():
-        poly_connect_array = mesh_poly_iter.getVertices()
-        for elem in poly_connect_array:
-            poly_connect_list.append(elem)
-
-        poly_count_list.append(len(poly_connect_array))
-        # TODO: Remove version check after Maya 2019 retires
-        if get_maya_api_version() < 20200000:
-            mesh_poly_iter.next(mesh_poly_iter)
-        else:
-            mesh_poly_iter.next()
-
-    # Get mesh vertex position
-    mesh_name = get_name_from_mobject(mesh_dag_path)
-    poly_vertex_list = cmds.xform(mesh_name + '.vtx[*]', q=True, ws=True, t=True)
-    assert len(
-        poly_vertex_list) % 3 == 0, 'Mesh vertex position list size is not a multiplier of 3.'
-    # convert flat list of points to list containing 3 element lists.
-    # Each 3 element list is x, y, z worldspace coordinate of vert.
-    poly_vertex_list = [poly_vertex_list[x:x + 3] for x in range(0, len(poly_vertex_list), 3)]
-
-    return poly_count_list, poly_connect_list, poly_vertex_list
+    mesh_fn = get_mesh_fn(mesh_name)
+    poly_counts, poly_connects = mesh_fn.getVertices()
+    points = flatten_points(mesh_fn.getPoints(om2.MSpace.kWorld))
+    return (list(poly_counts), list(poly_connects),
+            scale_points(points, om2.MDistance.internalToUI(1.0)))
@@ -0,0 +1,143 @@
+'''
+The module keeps the registry that maps a scene item type to its zBuilder node class.
+'''
+import inspect
+import logging
+import sys
+
+from zBuilder.utils.commonUtils import parse_version_info
+from zBuilder import __version__
+
+logger = logging.getLogger(__name__)
+
+# scene item type -> zBuilder node class
+_node_classes = {}
+
+# module name -> {scene item type -> zBuilder node class},
+# for classes living outside of zBuilder.nodes that are found by find_class().
+_module_classes = {}
+
+
+def _class_types(node_class):
+    """ The scene item types a node class handles, its ``type`` followed by its ``TYPES``.
+    """
+    types = [node_class.type]
+    types.extend(getattr(node_class, 'TYPES', None) or [])
+    return types
+
+
+def register_node_class(node_class, override=True):
+    """ Registers a zBuilder node class for the scene item types it handles.
+    Those are given by the ``type`` and ``TYPES`` class attributes.
+    This can be used as a class decorator for custom node types.
+
+    Args:
+        node_class (class): Class derived from zBuilder.nodes.Base.
+        override (bool): Replace existing registrations of the same types.
+            Defaults to ``True``
+
+    Returns:
+        class: The node class.
+    """
+    for type_ in _class_types(node_class):
+        if override or type_ not in _node_classes:
+            _node_classes[type_] = node_class
+    return node_class
+
+
+def unregister_node_class(node_class):
+    """ Removes all the registrations of a zBuilder node class.
+
+    Args:
+        node_class (class): The node class to remove.
+    """
+    for type_ in [k for k, v in _node_classes.items() if v is node_class]:
+        del _node_classes[type_]
+
+
+def register_node_classes_in_module(module_name):
+    """ Registers every zBuilder node class found in a module.
+    Classes are visited by name and the first one handling a type keeps it,
+    that is the same type resolution zBuilder always had.
+
+    Args:
+        module_name (str): Name of an imported module.
+    """
+    for _, obj in _get_module_classes(module_name):
+        register_node_class(obj, override=False)
+
+
+def get_node_class(type_name, default=None):
+    """ Gets the zBuilder node class registered for a scene item type.
+
+    Args:
+        type_name (str): The scene item type, e.g. 'zTissue' or 'map'.
+        default (class, optional): Returned if nothing is registered for type_name.
+
+    Returns:
+        class: The node class.
+    """
+    return _node_classes.get(type_name, default)
+
+
+def get_node_classes():
+    """ Returns:
+        list: All registered node classes.
+    """
+    classes = []
+    for node_class in _node_classes.values():
+        if node_class not in classes:
+            classes.append(node_class)
+    return classes
+
+
+def _get_module_classes(module_name):
+    module = sys.modules.get(module_name)
+    if module is None:
+        return []
+    return [(name, obj) for name, obj in inspect.getmembers(module)
+            if inspect.isclass(obj) and hasattr(obj, 'type')]
+
+
+def find_class(module, obj_type):
+    """
+    Given a module and a type returns class object. If no class objects are
+    found it returns a DGNode class object.
+
+    The classes of the module come first.  Types the module has no class for,
+    and the module ``zBuilder.nodes`` itself, are looked up in the registry,
+    see register_node_class().
+
+    Args:
+        module (:obj:`str`): The module to look for.
+        obj_type (:obj:`str`): The type to look for.
+
+    Returns:
+        obj: class object.
+    """
+    # The parameters module is moved to zBuilder.nodes since version 2.1,
+    # patch the module path to compatible old setups.
+    major, minor, patch, _ = parse_version_info(__version__)
+    if module == 'zBuilder.parameters' and (major, minor, patch) >= (2, 1, 0):
+        module = 'zBuilder.nodes'
+
+    # Classes of other modules, looked up once per module.
+    # The classes of zBuilder.nodes are the registered ones.
+    if module != 'zBuilder.nodes':
+        if module not in _module_classes:
+            classes = {}
+            for _, obj in _get_module_classes(module):
+                for type_ in _class_types(obj):
+                    classes.setdefault(type_, obj)
+            _module_classes[module] = classes
+        node_class = _module_classes[module].get(obj_type)
+        if node_class is not None:
+            return node_class
+
+    node_class = get_node_class(obj_type)
+    if node_class is not None:
+        return node_class
+
+    # if class object is not found lets return a DG node object
+    from zBuilder.nodes.dg_node import DGNode
+    return DGNode
@@ -7,7 +7,7 @@ class Field(DGNode):
 
     type = None
 
-    # The TYPES is required by find_class() function,
+    # The TYPES is required by the node class registry,
     # to correctly build Field node instances.
     TYPES = FIELD_TYPES
 
@@ -2,8 +2,11 @@ import logging
 
 from maya import cmds
 from zBuilder.utils.vfxUtils import check_body_type
+from zBuilder.utils.commonUtils import none_to_empty
 from zBuilder.utils.mayaUtils import safe_rename
-from .zivaBase import Ziva
+from ..deformer import set_maya_weights_multiple
+from ..dg_node import set_maya_attrs_multiple
+from .zivaBase import Ziva, create_multiple, get_nodes_by_meshes
 
 logger = logging.getLogger(__name__)
 
@@ -32,29 +35,87 @@ class AttachmentNode(Ziva):
         if check_body_type([source_mesh, target_mesh]):
             # check existing attachments in scene
             existing_attachments = cmds.zQuery(source_mesh, t='zAttachment')
-            existing = []
-            if existing_attachments:
-                for existing_attachment in existing_attachments:
-                    att_s = cmds.zQuery(existing_attachment, attachmentSource=True, l=True)[0]
-                    att_t = cmds.zQuery(existing_attachment, attachmentTarget=True, l=True)[0]
-                    if att_s == source_mesh and att_t == target_mesh:
-                        existing.append(existing_attachment)
-
-            if self.name not in existing:
-                cmds.select(source_mesh, r=True)
-                cmds.select(target_mesh, add=True)
-                new_att = cmds.ziva(a=True)
-                self.name = safe_rename(new_att[0], self.name)
-
-            self.check_parameter_name()
+            existing = get_attachments_by_meshes(existing_attachments).get(
+                (source_mesh, target_mesh), [])
+            self._create(existing)
 
             # set the attributes
             self.set_maya_attrs()
             self.set_maya_weights(interp_maps=interp_maps)
 
         else:
-            if permissive:
-                logger.info('skipping attachment creation...' + self.name)
-            else:
-                raise Exception('Cannot create attachment between {} and {}.  Check meshes.'.format(
-                    source_mesh, target_mesh))
+            self._report_missing_meshes(permissive)
+
+    @classmethod
+    def do_build_multiple(cls, scene_items, *args, **kwargs):
+        """ Builds the zAttachments in maya scene, the same as calling do_build() on each.
+        The existing attachments are looked up once for all of them,
+        the new ones are created with one command for each target mesh,
+        and the attributes and maps of all of them are set in one pass.
+
+        Args:
+            scene_items (list): The zAttachment scene items to build.
+            interp_maps (str): Interpolating maps.  Defaults to ``auto``
+            permissive (bool): Pass on errors. Defaults to ``True``
+        """
+        interp_maps = kwargs.get('interp_maps', 'auto')
+        permissive = kwargs.get('permissive', True)
+        if not scene_items:
+            return
+
+        meshes = set()
+        for scene_item in scene_items:
+            meshes.update(scene_item.nice_association[:2])
+        # Checks the meshes one attachment at a time only when some of them can not be attached
+        if check_body_type(list(meshes)):
+            built = list(scene_items)
+        else:
+            built = []
+            for scene_item in scene_items:
+                if check_body_type(scene_item.nice_association[:2]):
+                    built.append(scene_item)
+                else:
+                    scene_item._report_missing_meshes(permissive)
+
+        create_multiple(built, 'a', get_nodes_by_meshes(cmds.ls(type='zAttachment')),
+                        lambda scene_item, existing: scene_item.name not in existing)
+        for scene_item in built:
+            scene_item.check_parameter_name()
+
+        set_maya_attrs_multiple(built)
+        set_maya_weights_multiple(built, interp_maps=interp_maps)
+
+    def _create(self, existing):
+        """ Creates the zAttachment unless it is one of the existing ones.
+
+        Args:
+            existing (list): Names of the zAttachments in the scene between the same meshes.
+                The name of the new zAttachment is added to it.
+        """
+        if self.name not in existing:
+            cmds.select(self.nice_association[0], r=True)
+            cmds.select(self.nice_association[1], add=True)
+            new_att = cmds.ziva(a=True)
+            self.name = safe_rename(new_att[0], self.name)
+            existing.append(self.name)
+
+        self.check_parameter_name()
+
+    def _report_missing_meshes(self, permissive):
+        if permissive:
+            logger.info('skipping attachment creation...' + self.name)
+        else:
+            raise Exception('Cannot create attachment between {} and {}.  Check meshes.'.format(
+                self.nice_association[0], self.nice_association[1]))
+
+
+def get_attachments_by_meshes(attachments):
+    """ Groups zAttachments by the meshes they attach.
+
+    Args:
+        attachments (list): zAttachment names in the maya scene.
+
+    Returns:
+        dict: (long source mesh name, long target mesh name) -> list of zAttachment names
+    """
+    return get_nodes_by_meshes(none_to_empty(attachments))
@@ -2,6 +2,7 @@ from maya import cmds
 from maya import mel
 from zBuilder.utils.mayaUtils import safe_rename
 from zBuilder.utils.vfxUtils import cull_creation_nodes
+from ..dg_node import set_maya_attrs_multiple
 from .zivaBase import Ziva
 
 
@@ -26,8 +27,7 @@ class BoneNode(Ziva):
             # This needs to run even if there are no zBone to build.
             # This case happens during a copy paste.
             # any time you 'build' when the zBone is in scene.
-            for scene_item in scene_items:
-                scene_item.set_maya_attrs()
+            set_maya_attrs_multiple(scene_items)
 
 
 def build_multiple(scene_items):
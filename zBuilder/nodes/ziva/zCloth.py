@@ -2,6 +2,7 @@ from maya import cmds
 from maya import mel
 from zBuilder.utils.vfxUtils import cull_creation_nodes
 from zBuilder.utils.mayaUtils import safe_rename
+from ..dg_node import set_maya_attrs_multiple
 from .zivaBase import Ziva
 
 
@@ -25,16 +26,31 @@ class ClothNode(Ziva):
 
             # set the attributes.  This needs to run even if there are no zCloth to build. This case happens during a copy paste.
             # any time you 'build' when the zCloth is in scene.
-            for item in scene_items:
-                item.set_maya_attrs()
+            set_maya_attrs_multiple(scene_items)
 
-    def build_multiple(self):
+    @classmethod
+    def do_build_multiple(cls, scene_items, *args, **kwargs):
+        """ Builds the zCloth in maya scene, the same as calling do_build() on each
+        but for only the given ones, with one command, see build_multiple().
+
+        Args:
+            scene_items (list): The zCloth scene items to build.
+        """
+        scene_items[0].build_multiple(scene_items)
+        set_maya_attrs_multiple(scene_items)
+
+    def build_multiple(self, scene_items=None):
         """ Each node can deal with it's own building.  Though, with zCLoth it is much
         faster to build them all at once with one command instead of looping
         through them.  This function builds all the zCloth at once.
+
+        Args:
+            scene_items (list, optional): The zCloth scene items to build.
+                Defaults to all the zCloth of the builder.
         """
         sel = cmds.ls(sl=True)
-        scene_items = self.builder.get_scene_items(type_filter='zCloth')
+        if scene_items is None:
+            scene_items = self.builder.get_scene_items(type_filter='zCloth')
 
         # cull none buildable------------------------------------------------------
         culled = cull_creation_nodes(scene_items)
@@ -55,12 +71,13 @@ class ClothNode(Ziva):
             for new_name, builder_name in zip(results[1::3], culled['names']):
                 safe_rename(new_name, builder_name)
 
-            # rename zMaterial
+            # rename zMaterial, to the first one stored on the mesh
+            materials = {}
+            for material in reversed(self.builder.get_scene_items(type_filter='zMaterial')):
+                materials[tuple(material.association)] = material.name
             for new_name, node in zip(results[2::3], culled['scene_items']):
-                mesh = node.association
-                for material in self.builder.get_scene_items(type_filter='zMaterial'):
-                    if material.association == mesh:
-                        safe_rename(new_name, material.name)
-                        break
+                material_name = materials.get(tuple(node.association))
+                if material_name:
+                    safe_rename(new_name, material_name)
 
         cmds.select(sel)
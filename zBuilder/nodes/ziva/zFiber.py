@@ -3,7 +3,9 @@ import logging
 from maya import cmds
 from zBuilder.utils.mayaUtils import safe_rename, construct_map_names
 from zBuilder.utils.commonUtils import none_to_empty
-from .zivaBase import Ziva
+from ..deformer import set_maya_weights_multiple
+from ..dg_node import set_maya_attrs_multiple
+from .zivaBase import Ziva, create_multiple, get_nodes_by_meshes
 
 logger = logging.getLogger(__name__)
 
@@ -53,15 +55,9 @@ class FiberNode(Ziva):
         interp_maps = kwargs.get('interp_maps', 'auto')
 
         mesh = self.nice_association[0]
-
         if cmds.objExists(mesh):
             # get exsisting node names in scene on specific mesh and in data
-            existing_fibers = none_to_empty(cmds.zQuery(mesh, t='zFiber'))
-
-            if self.name not in existing_fibers:
-                cmds.select(mesh, r=True)
-                results = cmds.ziva(f=True)
-                self.name = safe_rename(results[0], self.name)
+            self._create(none_to_empty(cmds.zQuery(mesh, t='zFiber')))
         else:
             logger.warning(mesh + ' does not exist in scene, skipping zFiber creation')
 
@@ -70,3 +66,45 @@ class FiberNode(Ziva):
         # set the attributes
         self.set_maya_attrs()
         self.set_maya_weights(interp_maps=interp_maps)
+
+    @classmethod
+    def do_build_multiple(cls, scene_items, *args, **kwargs):
+        """ Builds the zFibers in maya scene, the same as calling do_build() on each.
+        The existing fibers are looked up once for all of them,
+        the new ones are created with one command for all the meshes,
+        and the attributes and maps of all of them are set in one pass.
+
+        Args:
+            scene_items (list): The zFiber scene items to build.
+            interp_maps (str): Interpolating maps.  Defaults to ``auto``
+        """
+        interp_maps = kwargs.get('interp_maps', 'auto')
+
+        built = []
+        for scene_item in scene_items:
+            mesh = scene_item.nice_association[0]
+            if cmds.objExists(mesh):
+                built.append(scene_item)
+            else:
+                logger.warning(mesh + ' does not exist in scene, skipping zFiber creation')
+
+        create_multiple(built, 'f', get_nodes_by_meshes(cmds.ls(type='zFiber')),
+                        lambda scene_item, existing: scene_item.name not in existing)
+        for scene_item in scene_items:
+            scene_item.check_parameter_name()
+
+        set_maya_attrs_multiple(scene_items)
+        set_maya_weights_multiple(scene_items, interp_maps=interp_maps)
+
+    def _create(self, existing_fibers):
+        """ Creates the zFiber unless it is one of the existing ones.
+
+        Args:
+            existing_fibers (list): Names of the zFibers on the mesh in the scene.
+                The name of the new zFiber is added to it.
+        """
+        if self.name not in existing_fibers:
+            cmds.select(self.nice_association[0], r=True)
+            results = cmds.ziva(f=True)
+            self.name = safe_rename(results[0], self.name)
+            existing_fibers.append(self.name)
@@ -24,7 +24,11 @@ class LineOfActionNode(Ziva):
         """
         super(LineOfActionNode, self).populate(maya_node=maya_node)
 
-        fiber_name = get_lineOfAction_fiber(self.name)
+        scene_graph = self.get_scene_graph()
+        if scene_graph:
+            fiber_name = scene_graph.get_line_of_action_fiber(self.name)
+        else:
+            fiber_name = get_lineOfAction_fiber(self.name)
 
         scene_item = self.builder.get_scene_items(name_filter=fiber_name)
         if scene_item:
@@ -2,7 +2,9 @@ import logging
 
 from maya import cmds
 from zBuilder.utils.mayaUtils import safe_rename
-from .zivaBase import Ziva
+from ..deformer import set_maya_weights_multiple
+from ..dg_node import set_maya_attrs_multiple
+from .zivaBase import Ziva, create_multiple, get_nodes_by_meshes
 
 logger = logging.getLogger(__name__)
 
@@ -40,32 +42,7 @@ class MaterialNode(Ziva):
             existing_materials = cmds.zQuery(mesh, t='zMaterial')
             data_materials = self.builder.get_scene_items(type_filter='zMaterial',
                                                           association_filter=mesh)
-
-            # case 1: normal workflow.
-            is_normal_workflow = (center_prefix is None)
-            is_new_material = (self.name not in existing_materials)
-            build_material_case1 = is_normal_workflow and is_new_material
-
-            # case 2: mirrow workflow, not center mesh, new material and material name is not in scene
-            is_mirror_workflow = not is_normal_workflow
-            is_center_mesh = bool(center_prefix) and mesh.split('|')[-1].startswith(center_prefix)
-            is_new_material_for_non_center_mesh = (len(existing_materials) < len(data_materials))
-            build_material_case2 = is_mirror_workflow and (
-                not is_center_mesh) and is_new_material_for_non_center_mesh and is_new_material
-
-            # case 3: mirrow workflow, center mesh, new side material
-            sided_materials = [x for x in data_materials
-                               if x.name.startswith(target_prefix)] if target_prefix else []
-            has_side_material_prefix = bool(target_prefix) and self.name.startswith(target_prefix)
-            is_new_side_material = len(existing_materials) < (len(data_materials) +
-                                                              len(sided_materials))
-            build_material_case3 = is_mirror_workflow and is_center_mesh and has_side_material_prefix and is_new_side_material
-
-            # Build material instance
-            if any((build_material_case1, build_material_case2, build_material_case3)):
-                cmds.select(mesh, r=True)
-                results = cmds.ziva(m=True)
-                self.name = safe_rename(results[0], self.name)
+            self._create(existing_materials, data_materials, target_prefix, center_prefix)
         else:
             logger.warning(mesh + ' does not exist in scene, skipping zMaterial creation')
 
@@ -79,3 +56,92 @@ class MaterialNode(Ziva):
         parent_weight_node = self.name + ".weightList"
         if not cmds.getAttr(parent_weight_node, l=True):
             self.set_maya_weights(interp_maps=interp_maps)
+
+    @classmethod
+    def do_build_multiple(cls, scene_items, *args, **kwargs):
+        """ Builds the zMaterials in maya scene, the same as calling do_build() on each.
+        The existing materials are looked up once for all of them,
+        the new ones are created with one command for all the meshes,
+        and the attributes and maps of all of them are set in one pass.
+
+        Args:
+            scene_items (list): The zMaterial scene items to build.
+            interp_maps (str): Interpolating maps.  Defaults to ``auto``
+            target_prefix (str): Target prefix used for mirroring. Defaults to None
+            center_prefix (str): Center prefix used for mirroring. Defaults to None
+        """
+        interp_maps = kwargs.get('interp_maps', 'auto')
+        target_prefix = kwargs.get('target_prefix', None)
+        center_prefix = kwargs.get('center_prefix', None)
+
+        data_by_mesh = {}
+        built = []
+        for scene_item in scene_items:
+            mesh = scene_item.nice_association[0]
+            if mesh not in data_by_mesh and cmds.objExists(mesh):
+                data_by_mesh[mesh] = scene_item.builder.get_scene_items(
+                    type_filter='zMaterial', association_filter=mesh)
+            if mesh in data_by_mesh:
+                built.append(scene_item)
+            else:
+                logger.warning(mesh + ' does not exist in scene, skipping zMaterial creation')
+
+        create_multiple(
+            built, 'm', get_nodes_by_meshes(cmds.ls(type='zMaterial')),
+            lambda scene_item, existing: scene_item._needs_node(
+                existing, data_by_mesh[scene_item.nice_association[0]], target_prefix,
+                center_prefix))
+        for scene_item in scene_items:
+            scene_item.check_parameter_name()
+
+        set_maya_attrs_multiple(scene_items)
+        # See the note in do_build() on locked weightList attributes.
+        set_maya_weights_multiple(
+            [x for x in scene_items if not cmds.getAttr(x.name + ".weightList", l=True)],
+            interp_maps=interp_maps)
+
+    def _create(self, existing_materials, data_materials, target_prefix, center_prefix):
+        """ Creates the zMaterial if the scene needs it.
+
+        Args:
+            existing_materials (list): Names of the zMaterials on the mesh in the scene.
+                The name of the new zMaterial is added to it.
+            data_materials (list): The zMaterial scene items on the mesh.
+            target_prefix (str): Target prefix used for mirroring.
+            center_prefix (str): Center prefix used for mirroring.
+        """
+        if self._needs_node(existing_materials, data_materials, target_prefix, center_prefix):
+            cmds.select(self.nice_association[0], r=True)
+            results = cmds.ziva(m=True)
+            self.name = safe_rename(results[0], self.name)
+            existing_materials.append(self.name)
+
+    def _needs_node(self, existing_materials, data_materials, target_prefix, center_prefix):
+        """ Tells if the scene needs the zMaterial to be created, see _create().
+
+        Returns:
+            bool: True if the zMaterial has to be created.
+        """
+        mesh = self.nice_association[0]
+
+        # case 1: normal workflow.
+        is_normal_workflow = (center_prefix is None)
+        is_new_material = (self.name not in existing_materials)
+        build_material_case1 = is_normal_workflow and is_new_material
+
+        # case 2: mirrow workflow, not center mesh, new material and material name is not in scene
+        is_mirror_workflow = not is_normal_workflow
+        is_center_mesh = bool(center_prefix) and mesh.split('|')[-1].startswith(center_prefix)
+        is_new_material_for_non_center_mesh = (len(existing_materials) < len(data_materials))
+        build_material_case2 = is_mirror_workflow and (
+            not is_center_mesh) and is_new_material_for_non_center_mesh and is_new_material
+
+        # case 3: mirrow workflow, center mesh, new side material
+        sided_materials = [x for x in data_materials
+                           if x.name.startswith(target_prefix)] if target_prefix else []
+        has_side_material_prefix = bool(target_prefix) and self.name.startswith(target_prefix)
+        is_new_side_material = len(existing_materials) < (len(data_materials) +
+                                                          len(sided_materials))
+        build_material_case3 = is_mirror_workflow and is_center_mesh and has_side_material_prefix and is_new_side_material
+
+        return any((build_material_case1, build_material_case2, build_material_case3))
@@ -25,7 +25,10 @@ class RestShapeNode(Ziva):
 
         self.targets = cmds.listConnections(self.name + '.target')
         self.targets = cmds.ls(self.targets, long=True)  # find long names
-        tissue_name = cmds.zQuery(self.name, type="zTissue")[0]
+        scene_graph = self.get_scene_graph()
+        tissue_name = scene_graph.get_rest_shape_tissue(self.name) if scene_graph else None
+        if not tissue_name:
+            tissue_name = cmds.zQuery(self.name, type="zTissue")[0]
         self.tissue_item = self.builder.get_scene_items(name_filter=tissue_name)[0]
 
         # we need to add the zRestShape targets to the attr_list.
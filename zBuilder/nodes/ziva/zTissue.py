@@ -24,7 +24,11 @@ class TissueNode(Ziva):
         This is assiging any parent_tissues to this scene item.
         parent_tissues are its parent sub-tissue.
         """
-        parent_name = get_tissue_parent(self.name)
+        scene_graph = self.get_scene_graph()
+        if scene_graph:
+            parent_name = scene_graph.get_tissue_parent(self.name)
+        else:
+            parent_name = get_tissue_parent(self.name)
         if parent_name:
             temp = self.builder.get_scene_items(name_filter=parent_name)
             if temp:
@@ -1,9 +1,9 @@
 import logging
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from maya import cmds
-from zBuilder.utils.commonUtils import get_first_element
-from zBuilder.utils.mayaUtils import build_attr_list, build_attr_key_values, get_type
+from zBuilder.utils.commonUtils import get_first_element, none_to_empty
+from zBuilder.utils.mayaUtils import build_attrs, get_type, get_deformer_meshes, safe_rename
 from zBuilder.utils.vfxUtils import get_association
 from ..deformer import Deformer
 
@@ -43,23 +43,37 @@ class Ziva(Deformer):
         maya_node = get_first_element(maya_node)
 
         self.name = maya_node
-        self.type = get_type(maya_node)
-        attr_list = build_attr_list(maya_node)
-        if self.EXTEND_ATTR_LIST:
-            attr_list.extend(self.EXTEND_ATTR_LIST)
-        attrs = build_attr_key_values(maya_node, attr_list)
-        self.attrs = attrs
+        scene_graph = self.get_scene_graph()
+        self.type = scene_graph.get_type(maya_node) if scene_graph else get_type(maya_node)
+        self.attrs = build_attrs(maya_node, self.EXTEND_ATTR_LIST)
 
-        mesh = get_association(maya_node)
-        self.association = mesh
+        if scene_graph:
+            self.association = scene_graph.get_meshes(maya_node)
+        else:
+            self.association = get_association(maya_node)
 
         if self.type == 'zSolver':
             self.solver = self
         else:
-            solver = cmds.zQuery(self.long_name, t='zSolver')
+            if scene_graph:
+                solver = [scene_graph.get_solver(maya_node)]
+            else:
+                solver = cmds.zQuery(self.long_name, t='zSolver')
             if solver:
                 self.solver = self.builder.get_scene_items(name_filter=solver[0])[0]
 
+    def get_scene_graph(self):
+        """ Gets the snapshot of the solver being retrieved if it has this node,
+        see ZivaSceneGraph.
+
+        Returns:
+            :obj:`ZivaSceneGraph`: The snapshot, or None to query the scene instead.
+        """
+        scene_graph = getattr(self.builder, 'scene_graph', None)
+        if scene_graph and self.name in scene_graph:
+            return scene_graph
+        return None
+
     def post_populate(self):
         '''
         This is a callback function that can be customized by each Ziva ZVX node.
@@ -161,3 +175,105 @@ class Ziva(Deformer):
             parameter_name = item.name.split('.')[0]
             if parameter_name != self.name:
                 item.string_replace(parameter_name, self.name)
+
+
+def get_nodes_by_meshes(nodes):
+    """ Groups Ziva deformer nodes by the meshes they deform.
+
+    Args:
+        nodes (list): Names of the nodes in the maya scene, e.g. all the zMaterials.
+
+    Returns:
+        dict: tuple of long mesh names, e.g. (source, target) of zAttachments
+            -> list of the node names
+    """
+    by_meshes = {}
+    for node, meshes in get_deformer_meshes(cmds.ls(nodes)).items():
+        by_meshes.setdefault(tuple(meshes), []).append(node)
+    return by_meshes
+
+
+def create_multiple(scene_items, flag, existing, needs_node):
+    """ Creates the Ziva nodes of the scene items and names them after the scene items.
+    All the meshes are selected for one ziva command instead of one command for each node,
+    zAttachments are created with one command for each target mesh and all its sources.
+
+    The new nodes are matched to the scene items by the meshes they deform,
+    so the scene items on the same meshes are created in turns.
+
+    Args:
+        scene_items (list): Ziva scene items of one type, their meshes exist in the scene.
+        flag (str): The ziva command flag creating the nodes, e.g. 'm' for zMaterials.
+        existing (dict): tuple of long mesh names -> names of the nodes in the scene,
+            see get_nodes_by_meshes().  The names of the new nodes are added to it.
+        needs_node (function): Takes a scene item and the existing nodes on its meshes,
+            tells if the node has to be created.
+    """
+    sel = cmds.ls(sl=True)
+    long_names = {}
+
+    def get_meshes(scene_item):
+        for mesh in scene_item.nice_association:
+            if mesh not in long_names:
+                long_names[mesh] = get_first_element(cmds.ls(mesh, long=True)) or mesh
+        return tuple(long_names[x] for x in scene_item.nice_association)
+
+    pending = list(scene_items)
+    while pending:
+        # One scene item for each meshes in a turn, the others wait for the next turn
+        turn = OrderedDict()
+        later = []
+        for scene_item in pending:
+            meshes = get_meshes(scene_item)
+            if meshes in turn:
+                later.append(scene_item)
+            else:
+                turn[meshes] = scene_item
+        pending = later
+
+        # Targets -> meshes of the scene items to create, the targets are empty but for zAttachments
+        to_create = OrderedDict()
+        for meshes, scene_item in turn.items():
+            if needs_node(scene_item, existing.setdefault(meshes, [])):
+                to_create.setdefault(meshes[1:], []).append(meshes)
+
+        for targets, meshes_list in to_create.items():
+            cmds.select([x[0] for x in meshes_list] + list(targets), r=True)
+            waiting = OrderedDict((x, turn[x]) for x in meshes_list)
+            created = _run_ziva(flag, scene_items[0].type)
+            for node, meshes in get_deformer_meshes(created).items():
+                scene_item = waiting.pop(tuple(meshes), None)
+                if scene_item:
+                    scene_item.name = safe_rename(node, scene_item.name)
+                    existing[tuple(meshes)].append(scene_item.name)
+                else:
+                    cmds.delete(node)
+
+            # Anything the command did not create for all the meshes at once
+            for meshes, scene_item in waiting.items():
+                cmds.select(list(meshes), r=True)
+                created = _run_ziva(flag, scene_item.type)
+                if not created:
+                    logger.warning('Failed to create {} on {}, skipping it.'.format(
+                        scene_item.name, ', '.join(meshes)))
+                    continue
+                scene_item.name = safe_rename(created[0], scene_item.name)
+                existing[meshes].append(scene_item.name)
+
+    cmds.select(sel)
+
+
+def _run_ziva(flag, node_type):
+    """ Runs the ziva command on the selection.
+
+    Returns:
+        list: Names of the new nodes of the type, empty if the command created none of them.
+    """
+    try:
+        created = cmds.ziva(**{flag: True})
+    except RuntimeError as error:
+        logger.debug('ziva -{} failed: {}'.format(flag, error))
+        return []
+    if not created:
+        return []
+    return none_to_empty(cmds.ls(created, type=node_type))
@@ -0,0 +1,119 @@
+'''
+Closest point barycentric transfer of per vertex values between meshes, written with NumPy.
+
+It works on plain point and polygon arrays, the way Mesh parameters store meshes,
+so it does not need Maya.  The closest points are found with the spatial index of
+the source mesh, see zBuilder.utils.spatial_index, shared by the transfers from that mesh.
+'''
+import numpy as np
+
+from zBuilder.utils.spatial_index import get_spatial_index
+
+
+def get_correspondence(source_points,
+                       poly_count_list,
+                       poly_connect_list,
+                       destination_points,
+                       workers=None,
+                       spatial_index=None):
+    """ Finds, for each destination point, the closest triangle of the source mesh and
+    the barycentric weights of its vertices at the closest point.
+
+    Args:
+        source_points (list): (vertex count, 3) world space points of the source mesh.
+        poly_count_list (list): Vertex count of each polygon of the source mesh.
+        poly_connect_list (list): Vertex ids of each polygon of the source mesh.
+        destination_points (list): (n, 3) world space points to find the closest points of.
+        workers (int, optional): Number of threads.  Defaults to the number of CPUs.
+        spatial_index (:obj:`MeshSpatialIndex`, optional): Index of the source mesh,
+            e.g. Mesh.get_spatial_index().  Defaults to get_spatial_index() of the source mesh.
+
+    Returns:
+        tuple: (n, 3) source vertex ids and (n, 3) weights of them.
+    """
+    index = spatial_index or get_spatial_index(source_points, poly_count_list, poly_connect_list)
+    _, vertex_ids, weights = index.closest_points(destination_points, workers)
+    return vertex_ids, weights
+
+
+def transfer_values(vertex_ids, weights, values, clamp_range=None):
+    """ Interpolates per vertex values of the source mesh to the destination points
+    of a correspondence, see get_correspondence().
+
+    Args:
+        vertex_ids (numpy.ndarray): (n, 3) source vertex ids.
+        weights (numpy.ndarray): (n, 3) weights of the source vertices.
+        values (list): One value per source vertex.
+        clamp_range (list, optional): Min and max to clamp the values to.
+
+    Returns:
+        numpy.ndarray: (n, ) interpolated values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    interpolated = np.einsum('ij,ij->i', values[vertex_ids], weights)
+    if clamp_range:
+        interpolated = np.clip(interpolated, clamp_range[0], clamp_range[1])
+    return interpolated
+
+
+def transfer_end_points(source_points,
+                        values,
+                        target_points,
+                        poly_count_list,
+                        poly_connect_list,
+                        workers=None,
+                        spatial_index=None):
+    """ Transfers a zFiber.endPoints map, the same as maps.interpolate_end_points_weights().
+    Source values of 0 or 1, after rounding values within 0.1 of them,
+    go to the vertices of the closest target polygon that are no farther than the average
+    distance to the polygon vertices.  The other target vertices get 0.5.
+
+    Args:
+        source_points (list): (vertex count, 3) world space points of the source mesh.
+        values (list): One value per source vertex.
+        target_points (list): (n, 3) world space points of the target mesh.
+        poly_count_list (list): Vertex count of each polygon of the target mesh.
+        poly_connect_list (list): Vertex ids of each polygon of the target mesh.
+        workers (int, optional): Number of threads.  Defaults to the number of CPUs.
+        spatial_index (:obj:`MeshSpatialIndex`, optional): Index of the target mesh.
+            Defaults to get_spatial_index() of the target mesh.
+
+    Returns:
+        numpy.ndarray: (n, ) values of the target mesh.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = np.where(values >= 0.9, 1.0, np.where(values <= 0.1, 0.0, values))
+    sources = np.nonzero((values == 0) | (values == 1))[0]
+
+    target_points = np.asarray(target_points, dtype=np.float64).reshape(-1, 3)
+    transferred = np.full(len(target_points), 0.5)
+    if not len(sources):
+        return transferred
+
+    source_points = np.asarray(source_points, dtype=np.float64).reshape(-1, 3)[sources]
+    counts = np.asarray(poly_count_list, dtype=np.int64)
+    connects = np.asarray(poly_connect_list, dtype=np.int64)
+    index = spatial_index or get_spatial_index(target_points, counts, connects)
+    faces = index.closest_polygons(source_points, workers)
+
+    # One pair per source vertex and vertex of its closest polygon
+    pair_counts = counts[faces]
+    pair_sources = np.repeat(np.arange(len(faces)), pair_counts)
+    pair_firsts = np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    pair_vertices = connects[(np.cumsum(counts) - counts)[faces][pair_sources] +
+                             np.arange(len(pair_sources)) - pair_firsts]
+    distances = np.sqrt(
+        ((target_points[pair_vertices] - source_points[pair_sources])**2).sum(axis=1))
+    average_distances = np.bincount(pair_sources, distances) / pair_counts
+
+    # The closest vertex is never farther than the average,
+    # so every source vertex sets at least one target vertex.
+    near = distances <= average_distances[pair_sources]
+    vertices = pair_vertices[near]
+    vertex_values = values[sources][pair_sources[near]]
+
+    # Later source vertices overwrite the earlier ones, keep the last value of each vertex
+    vertices, last = np.unique(vertices[::-1], return_index=True)
+    transferred[vertices] = vertex_values[::-1][last]
+    return transferred
+
@@ -1,11 +1,17 @@
 '''
 The module contains helper functions depends on Maya Python API.
 '''
+import logging
 import re
 
+from functools import wraps
 from maya import cmds
 from maya.api import OpenMaya as om2
-from zBuilder.utils.commonUtils import is_sequence
+from maya.api import OpenMayaAnim as oma2
+from zBuilder.utils.commonUtils import is_sequence, is_string
+from zBuilder.utils.undoable_modifier import run_modifier
+
+logger = logging.getLogger(__name__)
 
 FIELD_TYPES = (
     'airField',
@@ -35,6 +41,97 @@ def get_short_name(node_name):
     return node_name.split('|')[-1]
 
 
+# Memoized results of read-only scene queries, see scene_query_cache().
+# query name -> {node name -> result}, None while no cache is open.
+_scene_queries = None
+
+
+class SceneQueryCache(object):
+    """ A context manager memoizing the read-only scene queries zBuilder repeats
+    for the same node names during one operation: get_type(), object_exists()
+    and get_long_names().
+
+    The cache is cleared whenever a node is created, deleted, renamed or reparented
+    while it is open, including by zBuilder itself.
+    Nested caches share the cache opened first.
+    """
+
+    def __init__(self):
+        self.callback_ids = []
+        # Whether this is the cache opened first, the one to close the cache
+        self.is_outermost = False
+
+    def __enter__(self):
+        global _scene_queries
+        if _scene_queries is not None:
+            return self
+
+        _scene_queries = {}
+        self.is_outermost = True
+        add_callbacks = [
+            lambda: om2.MDGMessage.addNodeAddedCallback(_clear_scene_queries),
+            lambda: om2.MDGMessage.addNodeRemovedCallback(_clear_scene_queries),
+            lambda: om2.MNodeMessage.addNameChangedCallback(om2.MObject.kNullObj,
+                                                            _clear_scene_queries),
+            lambda: om2.MDagMessage.addAllDagChangesCallback(_clear_scene_queries),
+        ]
+        try:
+            for add_callback in add_callbacks:
+                self.callback_ids.append(add_callback())
+        except RuntimeError:
+            # Without the callbacks the cache could go stale, so do not cache
+            self.__exit__(None, None, None)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        global _scene_queries
+        if self.is_outermost:
+            if self.callback_ids:
+                om2.MMessage.removeCallbacks(self.callback_ids)
+            self.callback_ids = []
+            self.is_outermost = False
+            _scene_queries = None
+
+
+def scene_query_cache():
+    """ Memoizes read-only scene queries for the duration of a with block,
+    see SceneQueryCache.
+
+    Example:
+        with scene_query_cache():
+            builder.retrieve_from_scene()
+    """
+    return SceneQueryCache()
+
+
+def cache_scene_queries(func):
+    """ A decorator running the function inside scene_query_cache().
+    """
+
+    @wraps(func)
+    def new_function(*args, **kwargs):
+        with scene_query_cache():
+            return func(*args, **kwargs)
+
+    return new_function
+
+
+def _clear_scene_queries(*args):
+    if _scene_queries is not None:
+        _scene_queries.clear()
+
+
+def _query_scene(query, name, query_fn):
+    """ Runs query_fn(name), or returns its memoized result while a scene query cache is open.
+    """
+    if _scene_queries is None or not is_string(name):
+        return query_fn(name)
+    results = _scene_queries.setdefault(query, {})
+    if name not in results:
+        results[name] = query_fn(name)
+    return results[name]
+
+
 def get_type(body):
     """
     Really light wrapper for getting type of maya node.  Ya, I know.
@@ -45,7 +142,22 @@ def get_type(body):
     Returns:
         str: String of node type.
     """
-    return cmds.objectType(body)
+    return _query_scene('objectType', body, cmds.objectType)
+
+
+def object_exists(name):
+    """ The same as cmds.objExists(), memoized while a scene query cache is open.
+    """
+    return _query_scene('objExists', name, cmds.objExists)
+
+
+def get_long_names(name):
+    """ The same as cmds.ls(name, long=True), memoized while a scene query cache is open.
+
+    Returns:
+        list: of long names, empty if nothing matches.
+    """
+    return list(_query_scene('ls', name, lambda x: cmds.ls(x, long=True) or []))
 
 
 def is_type(body, type_name):
@@ -160,16 +272,148 @@ def replace_dict_keys(search, replace, dictionary):
     return tmp
 
 
-def build_attr_list(selection):
+# MFnNumericData types read straight from MPlug -> type name returned by getAttr(type=True)
+_NUMERIC_PLUG_TYPES = {
+    om2.MFnNumericData.kBoolean: 'bool',
+    om2.MFnNumericData.kByte: 'byte',
+    om2.MFnNumericData.kShort: 'short',
+    om2.MFnNumericData.kInt: 'long',
+    om2.MFnNumericData.kFloat: 'float',
+    om2.MFnNumericData.kDouble: 'double',
+}
+
+# (node type, plugin version) -> {attribute name: AttrInfo}, see get_attr_schema().
+_attr_schemas = {}
+
+
+class AttrInfo(object):
+    """ What zBuilder needs to know about an attribute besides its value.
     """
-    Builds a list of attributes to store values for.  It is looking at keyable
-    attributes and if they are in channelBox.
+    __slots__ = ('type', 'writable', 'min', 'max')
+
+    def __init__(self, type_, writable, min_=None, max_=None):
+        self.type = type_
+        self.writable = writable
+        # Hard limits of single numeric attributes, None if there is no limit.
+        self.min = min_
+        self.max = max_
+
+
+def clear_attr_schema_cache():
+    """ Forgets the attribute schemas of all node types, see get_attr_schema().
+    """
+    _attr_schemas.clear()
+
+
+def _get_node_fn(selection):
+    """ Gets MFnDependencyNode of a node.
+
+    Returns:
+        om2.MFnDependencyNode: The node function set, or None if the node does not exist.
+    """
+    selection_list = om2.MSelectionList()
+    try:
+        selection_list.add(selection)
+        return om2.MFnDependencyNode(selection_list.getDependNode(0))
+    except (RuntimeError, TypeError):
+        return None
+
+
+def get_attr_schema(selection):
+    """ Gets the attribute schema shared by all nodes of the same type and plugin version.
+    Attribute types and writable flags are the same for every node of a type,
+    so they are worked out once, the first time an attribute is seen.
 
     Args:
-        selection (str): Maya object to find attributes
+        selection (str): Maya node to get the schema of.
 
-    returns:
-        list: list of attributes names
+    Returns:
+        dict: attribute name -> AttrInfo
+    """
+    return _get_attr_schema(_get_node_fn(selection))
+
+
+def _get_attr_schema(node_fn):
+    plugin = node_fn.pluginName
+    version = cmds.pluginInfo(plugin, q=True, version=True) if plugin else None
+    return _attr_schemas.setdefault((node_fn.typeName, version), {})
+
+
+def _is_static_attr(node_fn, plug, attr):
+    """ Whether the AttrInfo of attr is the same for every node of this type.
+    Dynamic attributes, aliases and array elements belong to a single node,
+    as do generic attributes whose type is that of the data they hold.
+    """
+    mobject = plug.attribute()
+    if plug.isElement or mobject.apiType() == om2.MFn.kGenericAttribute:
+        return False
+    if node_fn.attributeClass(mobject) != om2.MFnDependencyNode.kNormalAttr:
+        return False
+    fn_attr = om2.MFnAttribute(mobject)
+    return attr in (fn_attr.name, fn_attr.shortName)
+
+
+def _get_attr_info(schema, node_fn, plug, attr, node_dot_attr):
+    """ Gets the AttrInfo of an attribute from the schema of its node type.
+    Attributes that only belong to this node are looked up on every call,
+    as a per node overlay of the shared schema.
+    """
+    info = schema.get(attr)
+    if info is not None:
+        return info
+
+    mobject = plug.attribute()
+    type_ = None
+    min_ = max_ = None
+    if not plug.isArray and not plug.isCompound:
+        if mobject.apiType() == om2.MFn.kNumericAttribute:
+            fn_numeric = om2.MFnNumericAttribute(mobject)
+            type_ = _NUMERIC_PLUG_TYPES.get(fn_numeric.numericType())
+            if type_:
+                min_ = fn_numeric.getMin() if fn_numeric.hasMin() else None
+                max_ = fn_numeric.getMax() if fn_numeric.hasMax() else None
+        elif mobject.apiType() == om2.MFn.kEnumAttribute:
+            type_ = 'enum'
+    if type_ is None:
+        type_ = cmds.getAttr(node_dot_attr, type=True)
+    info = AttrInfo(type_, om2.MFnAttribute(mobject).writable, min_, max_)
+
+    if _is_static_attr(node_fn, plug, attr):
+        schema[attr] = info
+    return info
+
+
+def _get_plug(node_dot_attr):
+    """ Gets the MPlug of a node.attr name, this also resolves aliases and
+    element indexes, e.g. 'blendShape1.weight[0]'.
+
+    Returns:
+        om2.MPlug: The plug, or None if it does not exist.
+    """
+    selection_list = om2.MSelectionList()
+    try:
+        selection_list.add(node_dot_attr)
+        return selection_list.getPlug(0)
+    except (RuntimeError, TypeError):
+        return None
+
+
+def _get_plug_value(plug, type_, node_dot_attr):
+    """ Gets the value of a plug, the same as cmds.getAttr().
+    """
+    if type_ == 'bool':
+        return plug.asBool()
+    if type_ in ('byte', 'short', 'long', 'enum'):
+        return plug.asInt()
+    if type_ == 'float':
+        return plug.asFloat()
+    if type_ == 'double':
+        return plug.asDouble()
+    return cmds.getAttr(node_dot_attr)
+
+
+def _list_channel_box_attrs(selection):
+    """ Lists the channel box attributes followed by the keyable attributes of a node.
     """
     attributes = []
     keyable = cmds.listAttr(selection, k=True)
@@ -178,21 +422,64 @@ def build_attr_list(selection):
         attributes.extend(channel_box)
     if keyable:
         attributes.extend(keyable)
+    return attributes
+
+
+def build_attr_list(selection):
+    """
+    Builds a list of attributes to store values for.  It is looking at keyable
+    attributes and if they are in channelBox.
+
+    Args:
+        selection (str): Maya object to find attributes
+
+    returns:
+        list: list of attributes names
+    """
+    attributes = _list_channel_box_attrs(selection)
+    node_fn = _get_node_fn(selection)
+    if node_fn is None:
+        return []
+    schema = _get_attr_schema(node_fn)
 
     attribute_names = []
     for attr in attributes:
         obj = '{}.{}'.format(selection, attr)
-        if cmds.objExists(obj):
-            type_ = cmds.getAttr(obj, type=True)
-            if not type_ == 'TdataCompound':
+        plug = _get_plug(obj)
+        if plug is not None:
+            info = _get_attr_info(schema, node_fn, plug, attr, obj)
+            if not info.type == 'TdataCompound':
                 attribute_names.append(attr)
 
     return attribute_names
 
 
+def build_attrs(selection, extend_attr_list=None):
+    """ Builds the attribute key/values of a node in one pass, the same as
+    build_attr_key_values(selection, build_attr_list(selection) + extend_attr_list)
+    while looking up each attribute once.
+
+    Args:
+        selection (str): Maya object to save attributes for.
+        extend_attr_list (list, optional): Attribute names to save on top of the
+            keyable and channel box attributes.
+
+    Returns:
+        dict: of attribute values.
+    """
+    attributes = _list_channel_box_attrs(selection)
+    if extend_attr_list:
+        attributes.extend(extend_attr_list)
+    return build_attr_key_values(selection, attributes)
+
+
 def build_attr_key_values(selection, attr_list):
     """ Builds a dictionary of attribute key/values.  Stores the value, type, and
     locked status.
+    Values are read through OpenMaya plugs, types Maya python commands do not
+    return the same way fall back to cmds.getAttr().
+    Attribute types and writable flags come from the schema of the node type.
+
     Args:
         selection: Items to save attributes for.
         attr_list: List of attributes to save.
@@ -202,22 +489,218 @@ def build_attr_key_values(selection, attr_list):
 
     """
     attr_dict = {}
+    node_fn = _get_node_fn(selection)
+    if node_fn is None:
+        return attr_dict
+    schema = _get_attr_schema(node_fn)
+
     for attr in attr_list:
         obj = '{}.{}'.format(selection, attr)
-        for item in cmds.ls(obj):
-            type_ = cmds.getAttr(item, type=True)
-            if not type_ == 'TdataCompound':
-                # we do not want to get any attribute that is not writable as we cannot change it.
-                if cmds.attributeQuery(attr, node=selection, w=True):
-                    attr_dict[attr] = {}
-                    attr_dict[attr]['type'] = type_
-                    attr_dict[attr]['value'] = cmds.getAttr(item)
-                    attr_dict[attr]['locked'] = cmds.getAttr(item, lock=True)
-                    attr_dict[attr]['alias'] = cmds.aliasAttr(obj, q=True)
+        plug = _get_plug(obj)
+        if plug is None:
+            continue
+        info = _get_attr_info(schema, node_fn, plug, attr, obj)
+        if not info.type == 'TdataCompound':
+            # we do not want to get any attribute that is not writable as we cannot change it.
+            if info.writable:
+                attr_dict[attr] = {}
+                attr_dict[attr]['type'] = info.type
+                attr_dict[attr]['value'] = _get_plug_value(plug, info.type, obj)
+                attr_dict[attr]['locked'] = plug.isLocked
+                attr_dict[attr]['alias'] = node_fn.plugsAlias(plug) or None
 
     return attr_dict
 
 
+def _iter_attr_plugs(selection, attr_list):
+    """ Looks up the attributes of a node.
+
+    Yields:
+        tuple: attribute name, node.attr name, MPlug and AttrInfo,
+        the plug and info are None when the node does not have the attribute.
+    """
+    node_fn = _get_node_fn(selection)
+    schema = _get_attr_schema(node_fn) if node_fn is not None else None
+    for attr in attr_list:
+        obj = '{}.{}'.format(selection, attr)
+        plug = _get_plug(obj) if node_fn is not None else None
+        if plug is None:
+            yield attr, obj, None, None
+        else:
+            yield attr, obj, plug, _get_attr_info(schema, node_fn, plug, attr, obj)
+
+
+def _is_plug_settable(plug, info):
+    # The same as cmds.getAttr(settable=True) on writable attributes
+    return info.writable and plug.isFreeToChange() == om2.MPlug.kFreeToChange
+
+
+def get_settable_attrs(selection, attr_list):
+    """ Finds which attributes of a node can be set, the same as
+    cmds.getAttr(settable=True) on writable attributes.
+    Attributes are not settable when they are locked or connected.
+
+    Args:
+        selection (str): Maya object the attributes belong to.
+        attr_list (list): Attribute names to check.
+
+    Returns:
+        dict: attribute name -> bool, attributes not on the node are left out.
+    """
+    settable = {}
+    for attr, _, plug, info in _iter_attr_plugs(selection, attr_list):
+        if plug is not None:
+            settable[attr] = _is_plug_settable(plug, info)
+    return settable
+
+
+def _queue_plug_value(modifier, plug, info, value):
+    """ Queues setting a single numeric plug on the modifier.
+
+    Returns:
+        bool: True if queued, False if the value has to be set with cmds.setAttr().
+    """
+    if info.type not in _NUMERIC_PLUG_TYPES.values() and info.type != 'enum':
+        return False
+    if isinstance(value, (list, tuple, dict)) or value is None:
+        return False
+    # setAttr() refuses values outside of the hard limits, so do not queue them either.
+    if (info.min is not None and value < info.min) or \
+       (info.max is not None and value > info.max):
+        return False
+
+    if info.type == 'bool':
+        modifier.newPlugValueBool(plug, bool(value))
+    elif info.type == 'float':
+        modifier.newPlugValueFloat(plug, float(value))
+    elif info.type == 'double':
+        modifier.newPlugValueDouble(plug, float(value))
+    else:
+        modifier.newPlugValueInt(plug, int(value))
+    return True
+
+
+def _set_attr(node_dot_attr, value, type_):
+    """ Sets an attribute with cmds.setAttr().
+
+    Returns:
+        bool: True if set, False if Maya refused the value.
+    """
+    try:
+        cmds.setAttr(node_dot_attr, value, type=type_)
+    except RuntimeError:
+        # setAttr() throws when attr type is bool, double, or other types.
+        # For such case, call setAttr() again w/o specifying type should make it work.
+        try:
+            cmds.setAttr(node_dot_attr, value)
+        except RuntimeError:
+            # Unfortunately, in the Maya field nodes unit test,
+            # when retrieving Maya DragField node attr list,
+            # its maxDistance attr returns -1.0, not minimum value 0.
+            # When setting "dragField1.maxDistance" attr during do_build() operation,
+            # it first throws exception:
+            # RuntimeError: setAttr: The type 'doubleLinear' is not the name of a recognized type.
+            # This makes sense. But after invoking setAttr() again with -1.0 value,
+            # it throw another exception:
+            # RuntimeError: setAttr: Cannot set the attribute 'dragField1.maxDistance' below its minimum value of 0.
+            # If we want to prevent this problem, we need to verify attr type and its min/max range,
+            # in the build_attr_key_values() function.
+            # That imposes extra work in our code for Maya's bug.
+            # The easiest solution is mute this error and skip setting this attr value.
+            # The downside is it also mutes any our errors.
+            return False
+    return True
+
+
+def _is_same_value(scene_value, value):
+    """ Compares a value from the scene with a saved one.
+    Values read back from a file have lists where getAttr() returns tuples.
+    """
+    if isinstance(scene_value, (list, tuple)) and isinstance(value, (list, tuple)):
+        return len(scene_value) == len(value) and all(
+            _is_same_value(a, b) for a, b in zip(scene_value, value))
+    return scene_value == value
+
+
+def get_changed_attrs(selection, attrs):
+    """ Finds the saved attributes whose values differ from those of the node in the scene.
+
+    Args:
+        selection (str): Maya object the attributes belong to.
+        attrs (dict): Saved attributes, as built by build_attr_key_values().
+
+    Returns:
+        list: Names of the attributes that differ or are not on the node.
+    """
+    changed = []
+    for attr, obj, plug, info in _iter_attr_plugs(selection, attrs.keys()):
+        if plug is None or not _is_same_value(_get_plug_value(plug, info.type, obj),
+                                              attrs[attr]['value']):
+            changed.append(attr)
+    return changed
+
+
+def set_attrs(attrs_by_node, skip_unchanged=False):
+    """ Sets the saved attribute values of many nodes in one pass.
+    Missing, locked and connected attributes are skipped.
+
+    Single numeric and enum values are queued on one MDGModifier and set together,
+    through the zBuilderDGModifier command so Maya undo records them,
+    see zBuilder.utils.undoable_modifier.  The other values are set with cmds.setAttr().
+    All the edits are one undo chunk.
+
+    Args:
+        attrs_by_node (list): of (node name, attrs) tuples,
+            attrs is a dictionary as built by build_attr_key_values().
+        skip_unchanged (bool): Leave attributes that already have the saved value alone.
+            Defaults to ``False``
+
+    Returns:
+        tuple: lists of the node.attr names skipped and those Maya failed to set.
+    """
+    skipped = []
+    failed = []
+    queued = []
+    modifier = om2.MDGModifier()
+
+    cmds.undoInfo(openChunk=True, chunkName='zBuilder set attrs')
+    try:
+        for node, attrs in attrs_by_node:
+            for attr, obj, plug, info in _iter_attr_plugs(node, attrs.keys()):
+                if plug is None:
+                    logger.info('{} not found, skipping.'.format(obj))
+                    skipped.append(obj)
+                    continue
+
+                # Skip locked or connected attributes
+                if not _is_plug_settable(plug, info):
+                    skipped.append(obj)
+                    continue
+
+                value = attrs[attr]['value']
+                if skip_unchanged and _is_same_value(_get_plug_value(plug, info.type, obj),
+                                                     value):
+                    continue
+
+                if _queue_plug_value(modifier, plug, info, value):
+                    queued.append((obj, value, attrs[attr]['type']))
+                elif not _set_attr(obj, value, attrs[attr]['type']):
+                    failed.append(obj)
+
+        if queued:
+            try:
+                run_modifier(modifier)
+            except RuntimeError:
+                # Find out which ones Maya refuses by setting them one at a time.
+                for obj, value, type_ in queued:
+                    if not _set_attr(obj, value, type_):
+                        failed.append(obj)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return skipped, failed
+
+
 def safe_rename(old_name, new_name):
     """
     Same as cmds.rename but does not throw an exception if renaming failed
@@ -269,6 +752,38 @@ def get_mobject(node_name):
     return sel.getDependNode(0)
 
 
+def get_deformer_meshes(deformers):
+    """ Gets the meshes each deformer deforms, in the order of the deformer geometry indices,
+    e.g. the source then the target mesh of a zAttachment.
+    The meshes are read from the deformers with the API instead of querying each deformer.
+
+    Args:
+        deformers (list): Names of deformer nodes in the maya scene.
+
+    Returns:
+        dict: deformer name -> list of long names of the mesh transforms.
+            Deformers whose meshes can not be read are left out.
+    """
+    sel = om2.MSelectionList()
+    for deformer in deformers:
+        sel.add(deformer)
+
+    meshes = {}
+    for i, deformer in enumerate(deformers):
+        try:
+            deformer_fn = oma2.MFnGeometryFilter(sel.getDependNode(i))
+            indices = sorted(
+                deformer_fn.indexForOutputConnection(x)
+                for x in range(deformer_fn.numOutputConnections()))
+            meshes[deformer] = [
+                om2.MFnDagNode(deformer_fn.getPathAtIndex(x).transform()).fullPathName()
+                for x in indices
+            ]
+        except RuntimeError:
+            logger.debug('Failed to read the meshes of {}.'.format(deformer))
+    return meshes
+
+
 def construct_map_names(name, map_list):
     """ This builds the map names.
     maps from map_list with the object name in front.
@@ -243,6 +243,32 @@ def set_paintable_map(node_name, attr_name, new_weights):
         - (zFiber1, endPoints)
         - (zBoneWarp1, landmarkList[0].landmarks)
     """
+    _get_paintable_map_setter(node_name, attr_name)(node_name, attr_name, new_weights)
+
+
+def set_paintable_maps(maps):
+    # type: (List[Tuple[str, str, List[float]]]) -> None
+    """
+    Set many arrays of paintable weights, the same as calling set_paintable_map() on each.
+    How to set an attribute is looked up once for each node type and attribute,
+    e.g. once for all the zAttachment.weightList[i].weights maps.
+
+    Args:
+        maps (list): of (node name, attr name, weights) tuples.
+    """
+    setters = {}
+    for node_name, attr_name, new_weights in maps:
+        # 'weightList[1].weights' --> 'weightList.weights'
+        key = (cmds.nodeType(node_name), re.sub(r'\[\d+\]', '', attr_name))
+        if key not in setters:
+            setters[key] = _get_paintable_map_setter(node_name, attr_name)
+        setters[key](node_name, attr_name, new_weights)
+
+
+def _get_paintable_map_setter(node_name, attr_name):
+    """ Gets the fastest function we've found to set the paintable map,
+    see set_paintable_map().
+    """
     # There are 3 cases we need to distinguish between:
     # 1) attribute is a kFooArray
     # 2) attribute is deformer weightList[i].weights
@@ -257,22 +283,25 @@ def set_paintable_map(node_name, attr_name, new_weights):
     is_multi = cmds.attributeQuery(child_attr, node=node_name, multi=True)
     if not is_multi:
         # case 1
-        set_paintable_map_by_setAttr_numericArray(node_name, attr_name, new_weights)
-        return
-    
+        return set_paintable_map_by_setAttr_numericArray
+
     is_deformer = 'weightGeometryFilter' in cmds.nodeType(node_name, inherited=True)
     if is_deformer and child_attr == 'weights':
         # case 2
-        try:
-            set_paintable_map_by_MFnWeightGeometryFilter(node_name, attr_name, new_weights)
-        except RuntimeError:
-            # TODO: revisit after Maya 2022 retires
-            _set_paintable_map_by_MFnWeightGeometryFilter_fallback_impl(node_name, attr_name, new_weights)
-        return
-    
+        return _set_paintable_map_by_MFnWeightGeometryFilter_or_fallback
+
     # case 3
-    set_paintable_map_by_ArrayDataBuilder(node_name, attr_name, new_weights)
-    
+    return set_paintable_map_by_ArrayDataBuilder
+
+
+def _set_paintable_map_by_MFnWeightGeometryFilter_or_fallback(node_name, attr_name, new_weights):
+    try:
+        set_paintable_map_by_MFnWeightGeometryFilter(node_name, attr_name, new_weights)
+    except RuntimeError:
+        # TODO: revisit after Maya 2022 retires
+        _set_paintable_map_by_MFnWeightGeometryFilter_fallback_impl(node_name, attr_name, new_weights)
+
+
 def set_paintable_map_by_MFnWeightGeometryFilter(node_name, attr_name, new_weights):
     """ 
     This only works for deformer weightList attributes,
@@ -0,0 +1,661 @@
+'''
+Spatial indices over meshes stored as point and polygon arrays, the way Mesh parameters
+store them, for batched closest point, nearest vertex and radius queries written with NumPy.
+
+A MeshSpatialIndex holds a bounding volume hierarchy over the triangles of a mesh and
+a KD-tree over its vertices, each built the first time it is queried.
+get_spatial_index() keeps the indices of the last meshes queried, keyed by a hash of
+the mesh, so the transfers and proximity queries on the same mesh share them.
+Indices convert to and from plain dicts, e.g. to be stored in json.
+
+Queries are split in chunks run by a pool of threads,
+NumPy releases the GIL while it works on the arrays so the threads use several CPUs.
+
+It needs NumPy 1.17 or later, for the where and initial arguments of reductions and
+nan_to_num(neginf=...).  Importing the module with an older NumPy raises ImportError,
+so the Maya builds shipping one fall back to the Maya interpolation backend.
+'''
+import hashlib
+import re
+
+from collections import OrderedDict
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+MIN_NUMPY_VERSION = (1, 17)
+
+if tuple(int(x) for x in re.findall(r'\d+', np.__version__)[:2]) < MIN_NUMPY_VERSION:
+    raise ImportError('zBuilder.utils.spatial_index needs NumPy {}.{} or later, found {}.'.format(
+        MIN_NUMPY_VERSION[0], MIN_NUMPY_VERSION[1], np.__version__))
+
+# Number of items, triangles or vertices, in each leaf of the trees
+LEAF_SIZE = 8
+
+# Number of points queried at once by each thread
+CHUNK_SIZE = 4096
+
+# Mesh hash -> MeshSpatialIndex, see get_spatial_index().
+# The oldest indices are dropped once there are more than _MAX_INDICES.
+_indices = OrderedDict()
+_MAX_INDICES = 8
+
+
+def triangulate(poly_count_list, poly_connect_list):
+    """ Splits polygons into triangles, fanning out from the first vertex of each polygon.
+
+    Args:
+        poly_count_list (list): Vertex count of each polygon.
+        poly_connect_list (list): Vertex ids of each polygon, one polygon after another.
+
+    Returns:
+        numpy.ndarray: (triangle count, 3) vertex ids of the triangles.
+    """
+    counts = np.asarray(poly_count_list, dtype=np.int64)
+    connects = np.asarray(poly_connect_list, dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    tri_counts = np.maximum(counts - 2, 0)
+
+    poly_ids = np.repeat(np.arange(len(counts)), tri_counts)
+    # Index of each triangle in its polygon, 1 for the first one
+    fan_ids = np.arange(tri_counts.sum()) - np.repeat(np.cumsum(tri_counts) - tri_counts,
+                                                      tri_counts) + 1
+    first = starts[poly_ids]
+    return np.stack(
+        [connects[first], connects[first + fan_ids], connects[first + fan_ids + 1]], axis=1)
+
+
+def closest_points_on_triangles(points, corners_a, corners_b, corners_c):
+    """ Finds the closest point to each point on the matching triangle.
+    See Real-Time Collision Detection by Christer Ericson, 5.1.5.
+
+    Args:
+        points (numpy.ndarray): (n, 3) points.
+        corners_a, corners_b, corners_c (numpy.ndarray): (n, 3) corners of the triangles.
+
+    Returns:
+        tuple: (n, ) squared distances and (n, 3) barycentric weights of the corners.
+    """
+    ab = corners_b - corners_a
+    ac = corners_c - corners_a
+    ap = points - corners_a
+    bp = points - corners_b
+    cp = points - corners_c
+
+    d1 = np.einsum('ij,ij->i', ab, ap)
+    d2 = np.einsum('ij,ij->i', ac, ap)
+    d3 = np.einsum('ij,ij->i', ab, bp)
+    d4 = np.einsum('ij,ij->i', ac, bp)
+    d5 = np.einsum('ij,ij->i', ab, cp)
+    d6 = np.einsum('ij,ij->i', ac, cp)
+
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    # Inside the triangle
+    denom = _safe_divide(np.ones_like(va), va + vb + vc)
+    v = vb * denom
+    w = vc * denom
+    weights = np.stack([1 - v - w, v, w], axis=1)
+
+    # The regions of the edges and corners, checked last to first so the first one that
+    # matches wins, the same order as in the book.
+    edge_bc = (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)
+    w = _safe_divide(d4 - d3, (d4 - d3) + (d5 - d6))
+    weights[edge_bc] = np.stack([np.zeros_like(w), 1 - w, w], axis=1)[edge_bc]
+
+    edge_ac = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+    w = _safe_divide(d2, d2 - d6)
+    weights[edge_ac] = np.stack([1 - w, np.zeros_like(w), w], axis=1)[edge_ac]
+
+    weights[(d6 >= 0) & (d5 <= d6)] = (0, 0, 1)
+
+    edge_ab = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+    v = _safe_divide(d1, d1 - d3)
+    weights[edge_ab] = np.stack([1 - v, v, np.zeros_like(v)], axis=1)[edge_ab]
+
+    weights[(d3 >= 0) & (d4 <= d3)] = (0, 1, 0)
+    weights[(d1 <= 0) & (d2 <= 0)] = (1, 0, 0)
+
+    closest = (weights[:, 0:1] * corners_a + weights[:, 1:2] * corners_b +
+               weights[:, 2:3] * corners_c)
+    distances = np.einsum('ij,ij->i', points - closest, points - closest)
+    return distances, weights
+
+
+def _safe_divide(numerator, denominator):
+    """ Divides, giving 0 where the denominator is 0, e.g. for degenerate triangles.
+    """
+    out = np.zeros_like(numerator, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def _box_distances(points, box_min, box_max):
+    """ Squared distances from points to axis aligned boxes, 0 inside them.
+    """
+    delta = np.maximum(np.maximum(box_min - points, points - box_max), 0)
+    return np.einsum('ij,ij->i', delta, delta)
+
+
+def _farthest_box_distances(points, box_min, box_max):
+    """ Squared distances from points to the farthest corners of axis aligned boxes,
+    no item in a box is farther than that.  Infinite for empty boxes.
+    """
+    delta = np.maximum(np.abs(points - box_min), np.abs(points - box_max))
+    return np.einsum('ij,ij->i', delta, delta)
+
+
+class _BoxTree(object):
+    """ A complete binary tree over items of a mesh, stored level by level,
+    each level splitting the items of its nodes in half along their longest axis.
+    Each leaf holds LEAF_SIZE items, the leaves are padded with -1 to fill the tree.
+    Each node has the axis aligned box bounding its items.
+
+    Subclasses hold the items, they build the tree with __init__()
+    or restore it from to_dict() with _restore().
+
+    Args:
+        centers (numpy.ndarray): (item count, 3) center of each item, to split the items.
+        item_min, item_max (numpy.ndarray): (item count, 3) bounds of each item.
+    """
+
+    def __init__(self, centers, item_min, item_max):
+        item_count = len(centers)
+        assert item_count, 'The tree has no items.'
+
+        leaf_count = max(1, -(-item_count // LEAF_SIZE))
+        self.depth = int(np.ceil(np.log2(leaf_count)))
+        padded_count = LEAF_SIZE * 2**self.depth
+        order = np.concatenate(
+            [np.arange(item_count),
+             np.full(padded_count - item_count, -1, dtype=np.int64)])
+
+        for level in range(self.depth):
+            order = order.reshape(2**level, -1)
+            valid = (order >= 0)[:, :, np.newaxis]
+            node_centers = centers[order]
+            extents = (node_centers.max(axis=1, where=valid, initial=-np.inf) -
+                       node_centers.min(axis=1, where=valid, initial=np.inf))
+            axes = np.nan_to_num(extents, neginf=0).argmax(axis=1)
+            # The padding goes last in each node
+            keys = np.where(order >= 0, node_centers[np.arange(len(order)), :, axes], np.inf)
+            order = np.take_along_axis(order, np.argsort(keys, axis=1, kind='stable'), axis=1)
+        # (leaf count, LEAF_SIZE) item ids of each leaf, -1 for the padding
+        self.leaf_items = order.reshape(-1, LEAF_SIZE)
+
+        # Bounds of the nodes of each level, from the root to the leaves.
+        # Leaves holding only padding get empty boxes, infinitely far from any point.
+        valid = (self.leaf_items >= 0)[:, :, np.newaxis]
+        self.box_min = [item_min[self.leaf_items].min(axis=1, where=valid, initial=np.inf)]
+        self.box_max = [item_max[self.leaf_items].max(axis=1, where=valid, initial=-np.inf)]
+        for _ in range(self.depth):
+            self.box_min.insert(0, self.box_min[0].reshape(-1, 2, 3).min(axis=1))
+            self.box_max.insert(0, self.box_max[0].reshape(-1, 2, 3).max(axis=1))
+        self._set_counts()
+
+    def _set_counts(self):
+        # Number of items in the nodes of each level, from the root to the leaves
+        self.counts = [(self.leaf_items >= 0).sum(axis=1)]
+        for _ in range(self.depth):
+            self.counts.insert(0, self.counts[0].reshape(-1, 2).sum(axis=1))
+
+    def to_dict(self):
+        return {
+            'depth': self.depth,
+            'leaf_items': self.leaf_items.tolist(),
+            'box_min': [x.tolist() for x in self.box_min],
+            'box_max': [x.tolist() for x in self.box_max],
+        }
+
+    def _restore(self, data):
+        """ Restores the tree from to_dict(), without building it again.
+        """
+        self.depth = data['depth']
+        self.leaf_items = np.asarray(data['leaf_items'], dtype=np.int64).reshape(-1, LEAF_SIZE)
+        self.box_min = [np.asarray(x, dtype=np.float64).reshape(-1, 3) for x in data['box_min']]
+        self.box_max = [np.asarray(x, dtype=np.float64).reshape(-1, 3) for x in data['box_max']]
+        self._set_counts()
+
+    def _find_leaves(self, points, k, bounds=None):
+        """ Finds the leaves that could hold one of the k closest items to each point,
+        going down the tree one level at a time.
+        The farthest corners of the boxes holding at least k items bound the distance to
+        the k-th closest item, nodes with boxes farther than that are left out.
+
+        Args:
+            points (numpy.ndarray): (n, 3) points.
+            k (int): Number of closest items looked for.
+            bounds (numpy.ndarray, optional): (n, ) squared distances,
+                leaves with boxes farther than them are left out too.
+
+        Returns:
+            tuple: query ids, leaf ids and squared distances to the leaf boxes,
+            sorted by query, and the (n, ) squared distance bounds.
+        """
+        count = len(points)
+        bounds = np.full(count, np.inf) if bounds is None else np.array(bounds, dtype=np.float64)
+        query_ids = np.arange(count)
+        nodes = np.zeros(count, dtype=np.int64)
+        for level in range(self.depth + 1):
+            if level:
+                query_ids = np.repeat(query_ids, 2)
+                nodes = (2 * np.repeat(nodes, 2)) + np.tile([0, 1], len(nodes))
+            box_min, box_max = self.box_min[level][nodes], self.box_max[level][nodes]
+            box_distances = _box_distances(points[query_ids], box_min, box_max)
+            bounds = np.minimum(
+                bounds,
+                _get_bounds(count, k, query_ids,
+                            _farthest_box_distances(points[query_ids], box_min, box_max),
+                            self.counts[level][nodes]))
+            keep = box_distances <= bounds[query_ids]
+            query_ids, nodes, box_distances = query_ids[keep], nodes[keep], box_distances[keep]
+        return query_ids, nodes, box_distances, bounds
+
+
+class TriangleBVH(_BoxTree):
+    """ A bounding volume hierarchy over the triangles of a mesh, for closest point queries.
+
+    Args:
+        points (numpy.ndarray): (vertex count, 3) points of the mesh.
+        triangles (numpy.ndarray): (triangle count, 3) vertex ids of the triangles.
+    """
+
+    def __init__(self, points, triangles):
+        self._set_items(points, triangles)
+        assert len(self.triangles), 'The mesh has no triangles.'
+        corners = self.points[self.triangles]
+        super(TriangleBVH, self).__init__(corners.mean(axis=1), corners.min(axis=1),
+                                          corners.max(axis=1))
+
+    @classmethod
+    def from_dict(cls, data, points, triangles):
+        """ Restores a tree from to_dict() over the same points and triangles.
+        """
+        tree = cls.__new__(cls)
+        tree._set_items(points, triangles)
+        tree._restore(data)
+        return tree
+
+    def _set_items(self, points, triangles):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+
+    def _get_leaf_distances(self, query_ids, points, leaves):
+        """ Closest points on the triangles of the leaves, one leaf per query.
+
+        Returns:
+            tuple: query ids, squared distances, triangle ids and barycentric weights,
+            one per triangle of the leaves.
+        """
+        triangle_ids = self.leaf_items[leaves].ravel()
+        query_ids = np.repeat(query_ids, LEAF_SIZE)
+        valid = triangle_ids >= 0
+        triangle_ids, query_ids = triangle_ids[valid], query_ids[valid]
+        corners = self.points[self.triangles[triangle_ids]]
+        distances, weights = closest_points_on_triangles(points[query_ids], corners[:, 0],
+                                                         corners[:, 1], corners[:, 2])
+        return query_ids, distances, triangle_ids, weights
+
+    def closest_triangles(self, points):
+        """ Finds the closest point on the mesh to each point.
+
+        Args:
+            points (numpy.ndarray): (n, 3) points to query.
+
+        Returns:
+            tuple: (n, ) closest triangle ids and (n, 3) barycentric weights of their corners.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        count = len(points)
+        all_ids = np.arange(count)
+
+        # Go down to the closest leaf of each point for a first guess of the distance
+        nodes = np.zeros(count, dtype=np.int64)
+        for level in range(1, self.depth + 1):
+            left, right = 2 * nodes, 2 * nodes + 1
+            left_distances = _box_distances(points, self.box_min[level][left],
+                                            self.box_max[level][left])
+            right_distances = _box_distances(points, self.box_min[level][right],
+                                             self.box_max[level][right])
+            nodes = np.where(right_distances < left_distances, right, left)
+        best_distances, best_triangles, best_weights = _reduce_closest(
+            count, *self._get_leaf_distances(all_ids, points, nodes))
+
+        # Find every leaf that could hold a closer triangle than the best one so far
+        query_ids, nodes, box_distances, _ = self._find_leaves(points, 1, best_distances)
+        keep = box_distances < best_distances[query_ids]
+        query_ids, nodes, box_distances = query_ids[keep], nodes[keep], box_distances[keep]
+
+        # Visit the leaves of each query from the closest box to the farthest,
+        # the closer triangles found first rule out more of the leaves left.
+        # Each round visits twice as many leaves per query as the one before,
+        # so queries with many leaves at about the same distance take few rounds.
+        order = np.lexsort((box_distances, query_ids))
+        query_ids, nodes, box_distances = query_ids[order], nodes[order], box_distances[order]
+        ranks = _get_ranks(query_ids)
+        rank, step = 0, 1
+        while len(query_ids):
+            current = ranks < rank + step
+            distances, triangles, weights = _reduce_closest(
+                count, *self._get_leaf_distances(query_ids[current], points, nodes[current]))
+            closer = distances < best_distances
+            best_distances[closer] = distances[closer]
+            best_triangles[closer] = triangles[closer]
+            best_weights[closer] = weights[closer]
+
+            rank, step = rank + step, 2 * step
+            left = ~current & (box_distances < best_distances[query_ids])
+            query_ids, nodes, box_distances, ranks = (query_ids[left], nodes[left],
+                                                      box_distances[left], ranks[left])
+        return best_triangles, best_weights
+
+
+class VertexKDTree(_BoxTree):
+    """ A KD-tree over the vertices of a mesh, for nearest vertex and radius queries.
+
+    Args:
+        points (numpy.ndarray): (vertex count, 3) points of the mesh.
+    """
+
+    def __init__(self, points):
+        self._set_items(points)
+        super(VertexKDTree, self).__init__(self.points, self.points, self.points)
+
+    @classmethod
+    def from_dict(cls, data, points):
+        """ Restores a tree from to_dict() over the same points.
+        """
+        tree = cls.__new__(cls)
+        tree._set_items(points)
+        tree._restore(data)
+        return tree
+
+    def _set_items(self, points):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+    def _get_leaf_distances(self, query_ids, points, leaves):
+        """ Squared distances to the vertices of the leaves, one leaf per query.
+
+        Returns:
+            tuple: query ids, vertex ids and squared distances, one per vertex of the leaves.
+        """
+        vertex_ids = self.leaf_items[leaves].ravel()
+        query_ids = np.repeat(query_ids, LEAF_SIZE)
+        valid = vertex_ids >= 0
+        vertex_ids, query_ids = vertex_ids[valid], query_ids[valid]
+        delta = self.points[vertex_ids] - points[query_ids]
+        return query_ids, vertex_ids, np.einsum('ij,ij->i', delta, delta)
+
+    def nearest_vertices(self, points, k=1):
+        """ Finds the k closest vertices to each point.
+
+        Args:
+            points (numpy.ndarray): (n, 3) points to query.
+            k (int): Number of vertices to find per point, at most the vertex count.
+
+        Returns:
+            tuple: (n, k) vertex ids and (n, k) distances, closest first.
+        """
+        assert 0 < k <= len(self.points), 'Can not find {} of {} vertices.'.format(
+            k, len(self.points))
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        count = len(points)
+        query_ids, leaves, _, _ = self._find_leaves(points, k)
+        query_ids, vertex_ids, distances = _select_nearest(
+            *self._get_leaf_distances(query_ids, points, leaves), k=k)
+        return vertex_ids.reshape(count, k), np.sqrt(distances).reshape(count, k)
+
+    def vertices_in_radius(self, points, radius):
+        """ Finds the vertices within the radius of each point.
+
+        Args:
+            points (numpy.ndarray): (n, 3) points to query.
+            radius (float): The distance from the points.
+
+        Returns:
+            tuple: vertex ids and distances of all the points, closest first for each point,
+            and (n + 1, ) offsets where those of each point start.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        bounds = np.full(len(points), float(radius)**2)
+        query_ids, leaves, _, _ = self._find_leaves(points, 1, bounds)
+        query_ids, vertex_ids, distances = self._get_leaf_distances(query_ids, points, leaves)
+        within = distances <= bounds[query_ids]
+        query_ids, vertex_ids, distances = query_ids[within], vertex_ids[within], distances[
+            within]
+        order = np.lexsort((vertex_ids, distances, query_ids))
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(query_ids,
+                                                             minlength=len(points)))])
+        return vertex_ids[order], np.sqrt(distances[order]), offsets
+
+
+class MeshSpatialIndex(object):
+    """ The spatial indices of a mesh, a TriangleBVH and a VertexKDTree,
+    each built the first time it is queried.
+
+    Args:
+        points (list): (vertex count, 3) world space points of the mesh.
+        poly_count_list (list): Vertex count of each polygon.
+        poly_connect_list (list): Vertex ids of each polygon, one polygon after another.
+    """
+
+    def __init__(self, points, poly_count_list, poly_connect_list):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.poly_count_list = np.asarray(poly_count_list, dtype=np.int64)
+        self.poly_connect_list = np.asarray(poly_connect_list, dtype=np.int64)
+        self.triangles = triangulate(self.poly_count_list, self.poly_connect_list)
+        # Polygon id of each triangle
+        self.triangle_polygons = np.repeat(np.arange(len(self.poly_count_list)),
+                                           np.maximum(self.poly_count_list - 2, 0))
+        self._triangle_tree = None
+        self._vertex_tree = None
+
+    @property
+    def triangle_tree(self):
+        if self._triangle_tree is None:
+            self._triangle_tree = TriangleBVH(self.points, self.triangles)
+        return self._triangle_tree
+
+    @property
+    def vertex_tree(self):
+        if self._vertex_tree is None:
+            self._vertex_tree = VertexKDTree(self.points)
+        return self._vertex_tree
+
+    def closest_points(self, points, workers=None):
+        """ Finds the closest point on the mesh to each point.
+
+        Args:
+            points (list): (n, 3) points to query.
+            workers (int, optional): Number of threads.  Defaults to the number of CPUs.
+
+        Returns:
+            tuple: (n, ) closest triangle ids, (n, 3) vertex ids of the triangles and
+            (n, 3) barycentric weights of the vertices at the closest points.
+        """
+        triangle_ids, weights = _map_chunks(self.triangle_tree.closest_triangles, points,
+                                            workers)
+        return triangle_ids, self.triangles[triangle_ids], weights
+
+    def closest_polygons(self, points, workers=None):
+        """ Finds the polygon of the closest point on the mesh to each point.
+
+        Returns:
+            numpy.ndarray: (n, ) polygon ids.
+        """
+        triangle_ids, _, _ = self.closest_points(points, workers)
+        return self.triangle_polygons[triangle_ids]
+
+    def nearest_vertices(self, points, k=1, workers=None):
+        """ Finds the k closest vertices to each point, see VertexKDTree.nearest_vertices().
+
+        Returns:
+            tuple: (n, k) vertex ids and (n, k) distances, closest first.
+        """
+        return _map_chunks(lambda chunk: self.vertex_tree.nearest_vertices(chunk, k), points,
+                           workers)
+
+    def vertices_in_radius(self, points, radius):
+        """ Finds the vertices within the radius of each point,
+        see VertexKDTree.vertices_in_radius().
+
+        Returns:
+            list: of (vertex ids, distances) tuples, one per point, closest first.
+        """
+        vertex_ids, distances, offsets = self.vertex_tree.vertices_in_radius(points, radius)
+        return [(vertex_ids[start:end], distances[start:end])
+                for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def to_dict(self):
+        """ Gets the mesh and the trees built so far as lists, e.g. to write to json.
+        """
+        data = {
+            'points': self.points.tolist(),
+            'poly_count_list': self.poly_count_list.tolist(),
+            'poly_connect_list': self.poly_connect_list.tolist(),
+        }
+        if self._triangle_tree is not None:
+            data['triangle_tree'] = self._triangle_tree.to_dict()
+        if self._vertex_tree is not None:
+            data['vertex_tree'] = self._vertex_tree.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """ Restores an index from to_dict(), the trees in it are not built again.
+        """
+        index = cls(data['points'], data['poly_count_list'], data['poly_connect_list'])
+        if 'triangle_tree' in data:
+            index._triangle_tree = TriangleBVH.from_dict(data['triangle_tree'], index.points,
+                                                         index.triangles)
+        if 'vertex_tree' in data:
+            index._vertex_tree = VertexKDTree.from_dict(data['vertex_tree'], index.points)
+        return index
+
+
+def get_mesh_hash(points, poly_count_list, poly_connect_list):
+    """ Hashes the topology and points of a mesh, the key of its spatial index.
+
+    Returns:
+        str
+    """
+    digest = hashlib.sha1()
+    digest.update(np.asarray(poly_count_list, dtype=np.int64).tobytes())
+    digest.update(np.asarray(poly_connect_list, dtype=np.int64).tobytes())
+    digest.update(np.asarray(points, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def get_spatial_index(points, poly_count_list, poly_connect_list, mesh_hash=None):
+    """ Gets the spatial index of a mesh, shared with the previous queries of the same mesh.
+
+    Args:
+        points (list): (vertex count, 3) world space points of the mesh.
+        poly_count_list (list): Vertex count of each polygon.
+        poly_connect_list (list): Vertex ids of each polygon, one polygon after another.
+        mesh_hash (optional): Key of the mesh in the cache,
+            defaults to get_mesh_hash() of the mesh.
+
+    Returns:
+        :obj:`MeshSpatialIndex`
+    """
+    if mesh_hash is None:
+        mesh_hash = get_mesh_hash(points, poly_count_list, poly_connect_list)
+    index = _indices.pop(mesh_hash, None)
+    if index is None:
+        index = MeshSpatialIndex(points, poly_count_list, poly_connect_list)
+    _indices[mesh_hash] = index
+    while len(_indices) > _MAX_INDICES:
+        _indices.popitem(last=False)
+    return index
+
+
+def clear_spatial_index_cache():
+    """ Drops the spatial indices built so far, see get_spatial_index().
+    """
+    _indices.clear()
+
+
+def _map_chunks(function, points, workers=None):
+    """ Runs the function on chunks of the points with a pool of threads and
+    concatenates the arrays it returns.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    chunks = [points[i:i + CHUNK_SIZE] for i in range(0, len(points), CHUNK_SIZE)] or [points]
+    if len(chunks) > 1:
+        pool = ThreadPool(min(workers or cpu_count(), len(chunks)))
+        try:
+            results = pool.map(function, chunks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [function(chunks[0])]
+    return tuple(np.concatenate(arrays) for arrays in zip(*results))
+
+
+def _get_ranks(query_ids):
+    """ Position of each entry among the entries of its query, query ids sorted.
+    """
+    starts = np.concatenate([[True], query_ids[1:] != query_ids[:-1]]).nonzero()[0]
+    return np.arange(len(query_ids)) - np.repeat(starts, np.diff(np.append(starts,
+                                                                          len(query_ids))))
+
+
+def _get_bounds(count, k, query_ids, distances, item_counts):
+    """ Bounds the distance to the k-th closest item of each query by the closest
+    of its entries holding at least k items.
+
+    Args:
+        count (int): Number of queries.
+        k (int): Number of closest items.
+        query_ids (numpy.ndarray): Query of each entry, sorted.
+        distances (numpy.ndarray): Squared distance within which the items of each entry are.
+        item_counts (numpy.ndarray): Number of items of each entry.
+
+    Returns:
+        numpy.ndarray: (count, ) squared distances, inf for queries without such an entry.
+    """
+    bounds = np.full(count, np.inf)
+    if len(query_ids):
+        starts = np.concatenate([[True], query_ids[1:] != query_ids[:-1]]).nonzero()[0]
+        bounds[query_ids[starts]] = np.minimum.reduceat(
+            np.where(item_counts >= k, distances, np.inf), starts)
+    return bounds
+
+
+def _select_nearest(query_ids, vertex_ids, distances, k):
+    """ Keeps the k closest vertices of each query.
+
+    Returns:
+        tuple: query ids, vertex ids and squared distances, sorted by query then distance.
+    """
+    order = np.lexsort((distances, query_ids))
+    query_ids, vertex_ids, distances = query_ids[order], vertex_ids[order], distances[order]
+    keep = _get_ranks(query_ids) < k
+    return query_ids[keep], vertex_ids[keep], distances[keep]
+
+
+def _reduce_closest(count, query_ids, distances, triangle_ids, weights):
+    """ Keeps the closest triangle of each query.
+
+    Returns:
+        tuple: (count, ) squared distances, inf for queries without any triangle,
+        (count, ) triangle ids and (count, 3) barycentric weights.
+    """
+    best_distances = np.full(count, np.inf)
+    best_triangles = np.zeros(count, dtype=np.int64)
+    best_weights = np.zeros((count, 3))
+    if len(query_ids):
+        # Sort by query then distance, the first of each query is the closest
+        order = np.lexsort((distances, query_ids))
+        query_ids = query_ids[order]
+        first = np.concatenate([[True], query_ids[1:] != query_ids[:-1]])
+        picked = order[first]
+        best_distances[query_ids[first]] = distances[picked]
+        best_triangles[query_ids[first]] = triangle_ids[picked]
+        best_weights[query_ids[first]] = weights[picked]
+    return best_distances, best_triangles, best_weights
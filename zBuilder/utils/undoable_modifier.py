@@ -0,0 +1,86 @@
+'''
+A Maya plugin with one command, zBuilderDGModifier, running an MDGModifier
+so Maya undo records it: undo calls undoIt() of the modifier, redo calls doIt() again.
+
+Scripts hand the modifier over with run_modifier(), which loads the plugin when needed.
+Maya loads the plugin file as its own module, the command takes the modifier from
+the zBuilder.utils.undoable_modifier module scripts import.
+'''
+import logging
+import os
+
+from maya import cmds
+from maya.api import OpenMaya as om2
+
+logger = logging.getLogger(__name__)
+
+PLUGIN_NAME = 'undoable_modifier'
+COMMAND_NAME = 'zBuilderDGModifier'
+
+# Modifiers handed over by run_modifier() to the command
+_pending = []
+
+
+def maya_useNewAPI():
+    """ Tells Maya the plugin uses the Python API 2.0.
+    """
+    pass
+
+
+class DGModifierCommand(om2.MPxCommand):
+
+    def __init__(self):
+        om2.MPxCommand.__init__(self)
+        self.modifier = None
+
+    def doIt(self, args):
+        from zBuilder.utils import undoable_modifier
+        self.modifier = undoable_modifier._pending.pop()
+        self.redoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+    @staticmethod
+    def creator():
+        return DGModifierCommand()
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin).registerCommand(COMMAND_NAME, DGModifierCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
+
+
+def run_modifier(modifier):
+    """ Runs modifier.doIt() through the zBuilderDGModifier command, so it can be undone.
+    If the plugin can not be loaded the modifier runs on its own, Maya undo then skips it.
+
+    Args:
+        modifier (om2.MDGModifier): The modifier to run.
+
+    Raises:
+        RuntimeError: If Maya fails to apply the modifier.
+    """
+    if not cmds.pluginInfo(PLUGIN_NAME, q=True, loaded=True):
+        plugin_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), PLUGIN_NAME + '.py')
+        try:
+            cmds.loadPlugin(plugin_path, quiet=True)
+        except RuntimeError:
+            logger.warning('Failed to load {}, the changes can not be undone.'.format(plugin_path))
+            modifier.doIt()
+            return
+
+    _pending.append(modifier)
+    try:
+        getattr(cmds, COMMAND_NAME)()
+    finally:
+        del _pending[:]